@@ -2,11 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import argparse
+import cProfile
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
+from storage import BackgroundSaver, diff_op, open_storage, supersede, touched_fields
+from outbox import SyncOutbox, outbox_path, sync_enabled
+from instrument import metrics
+from scheduler import WAIT, TkScheduler
+from search import SearchIndex
+from todo_core import TodoList
+import todo_io
+from lists import ListManifest
+from archive import ARCHIVE_AFTER_DAYS, KEEP_COMPLETED, Archive, archive_path, select_for_archive
+from reminders import MORNING, DeadlineTimer, day_end, format_short, format_when, parse_when
+from filters import PRIORITY_NAMES, format_tags, parse_query, parse_tags
+from todo_store import SORT_KEYS, Todo, TodoOrder, TodoStore, TodoView, bisect_seq
+
 # Šeit tiek izveidota klase ar mūsdienīgu dizainu
 class ModernUI:
     # Krāsu palete - lai programma izskatītos smuki
@@ -29,8 +46,528 @@ class ModernUI:
     # Pogām ir plakans izskats - tā ir modernāk
     BTN_RELIEF = tk.FLAT
 
+# Arhīva logs - arhīvs tiek nolasīts fonā tikai tad, kad logs tiek atvērts
+class ArchiveWindow:
+    # Cik atrasto uzdevumu rādīt - pārējos var atrast ar meklēšanu
+    ROW_LIMIT = 1000
+
+    def __init__(self, app):
+        self.app = app
+        ui = app.ui
+        # Arhivētie uzdevumi pēc id arhivēšanas secībā un to meklēšanas indekss
+        self.todos = {}
+        self.index = SearchIndex()
+        self.loaded = False
+        self._search_job = None
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Arhīvs")
+        self.window.geometry("500x450")
+        self.window.configure(bg=ui.LIGHT)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        container = tk.Frame(self.window, bg=ui.LIGHT, padx=20, pady=20)
+        container.pack(fill=tk.BOTH, expand=True)
+
+        top_frame = tk.Frame(container, bg=ui.LIGHT)
+        top_frame.pack(fill=tk.X, pady=(0, 10))
+
+        # Cik uzdevumu ir arhīvā vai atbilst meklēšanai
+        self.status_label = tk.Label(top_frame, text="Ielādē arhīvu...", font=(ui.FONT_FAMILY, 10),
+                                     fg=ui.GRAY, bg=ui.LIGHT)
+        self.status_label.pack(side=tk.LEFT)
+
+        search_frame = tk.Frame(top_frame, bg=ui.WHITE, highlightbackground=ui.GRAY, highlightthickness=1, bd=0)
+        search_frame.pack(side=tk.RIGHT)
+        tk.Label(search_frame, text="🔍", font=(ui.FONT_FAMILY, 10), bg=ui.WHITE, fg=ui.GRAY).pack(side=tk.LEFT, padx=(5, 0))
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=(ui.FONT_FAMILY, 10),
+                                     bd=0, highlightthickness=0, bg=ui.WHITE, width=18)
+        self.search_entry.pack(side=tk.LEFT, ipady=4, padx=5)
+        self.search_var.trace_add("write", lambda *args: self._on_search_changed())
+
+        list_frame = tk.Frame(container, bg=ui.WHITE, highlightbackground=ui.GRAY, highlightthickness=1, bd=0)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(list_frame, columns=("Task", "Completed"), show="headings",
+                                 selectmode="extended", yscrollcommand=scrollbar.set)
+        self.tree.heading("Task", text="Uzdevums")
+        self.tree.heading("Completed", text="Pabeigts")
+        self.tree.column("Task", width=340)
+        self.tree.column("Completed", width=90, anchor="center")
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tree.yview)
+
+        button_frame = tk.Frame(container, bg=ui.LIGHT)
+        button_frame.pack(fill=tk.X, pady=(15, 0))
+        restore_button = tk.Button(
+            button_frame,
+            text="↩ Atjaunot",
+            command=self.restore_selected,
+            bg=ui.PRIMARY,
+            fg=ui.WHITE,
+            font=(ui.FONT_FAMILY, 10, "bold"),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        restore_button.pack(side=tk.LEFT)
+        close_button = tk.Button(
+            button_frame,
+            text="Aizvērt",
+            command=self.close,
+            bg=ui.LIGHT,
+            fg=ui.DARK,
+            font=(ui.FONT_FAMILY, 10),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        close_button.pack(side=tk.RIGHT)
+
+        app.scheduler.submit(self._load, on_done=self._on_loaded, on_error=self._on_load_error)
+
+    def _load(self):
+        """Fona pavediens - nolasa arhīvu un izveido tā meklēšanas indeksu"""
+        todos = [Todo.from_dict(data) for data in self.app.core.archive.load()]
+        return todos, SearchIndex(todos)
+
+    def _on_loaded(self, result):
+        todos, index = result
+        # Uzdevumi, kas tika arhivēti ielādes laikā, var arī nebūt nolasītajā failā
+        added_meanwhile = list(self.todos.values())
+        self.todos = {todo.id: todo for todo in todos}
+        self.index = index
+        self.loaded = True
+        self.add(added_meanwhile)
+
+    def _on_load_error(self, error):
+        self.status_label.config(text=f"Neizdevās nolasīt arhīvu: {error}")
+
+    def add(self, todos):
+        """Pievieno tikko arhivētus uzdevumus"""
+        for todo in todos:
+            if todo.id not in self.todos:
+                self.todos[todo.id] = todo
+                self.index.add(todo.id, todo.text)
+        if self.loaded:
+            self.refresh()
+
+    def _on_search_changed(self):
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self._search_job = self.window.after(TodoApp.SEARCH_DEBOUNCE_MS, self.refresh)
+
+    def refresh(self):
+        """Parāda jaunākos arhivētos uzdevumus, kas atbilst meklēšanai"""
+        self._search_job = None
+        query = self.search_var.get().strip()
+        matches = self.index.search(query) if query else None
+        shown = []
+        for todo in reversed(self.todos.values()):
+            if matches is None or todo.id in matches:
+                shown.append(todo)
+                if len(shown) == self.ROW_LIMIT:
+                    break
+        total = len(self.todos) if matches is None else len(matches)
+
+        self.tree.delete(*self.tree.get_children())
+        for todo in shown:
+            completed_at = datetime.fromtimestamp(todo.completed_at).strftime("%d.%m.%Y") if todo.completed_at else ""
+            self.tree.insert("", "end", iid=todo.id, values=(todo.text, completed_at))
+        text = f"{total} arhivēti uzdevumi" if matches is None else f"Atrasti {total}"
+        if total > len(shown):
+            text += f" (rādīti {len(shown)} jaunākie)"
+        self.status_label.config(text=text)
+
+    def restore_selected(self):
+        """Atgriež atlasītos uzdevumus sarakstā kā aktīvus"""
+        selected = [todo_id for todo_id in self.tree.selection() if todo_id in self.todos]
+        if not selected:
+            return
+        restored = [self.todos.pop(todo_id) for todo_id in selected]
+        for todo in restored:
+            self.index.remove(todo.id)
+        self.app.restore_archived([todo.to_dict() for todo in restored])
+        self.refresh()
+
+    def close(self):
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+        self.app.archive_window = None
+        self.window.destroy()
+
+
+
+# Dialogi tiek izveidoti vienreiz un pēc tam tikai parādīti un paslēpti - atvēršana nepārbūvē logrīkus
+class PooledDialog:
+    TITLE = ""
+    WIDTH = 400
+    HEIGHT = 150
+
+    def __init__(self, app):
+        self.app = app
+        self.window = tk.Toplevel(app.root)
+        self.window.withdraw()
+        self.window.title(self.TITLE)
+        self.window.geometry(f"{self.WIDTH}x{self.HEIGHT}")
+        self.window.configure(bg=app.ui.LIGHT)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+        # Padara dialoglogu modālu, kad tas parādās - bez bloķējošā update()
+        app.make_modal(self.window)
+
+    def present(self, focus):
+        """Parāda dialogu galvenā loga vidū - izmērs ir zināms, tāpēc nav jāgaida izkārtojums"""
+        root = self.app.root
+        x = root.winfo_x() + (root.winfo_width() - self.WIDTH) // 2
+        y = root.winfo_y() + (root.winfo_height() - self.HEIGHT) // 2
+        self.window.geometry(f"{self.WIDTH}x{self.HEIGHT}+{x}+{y}")
+        self.window.deiconify()
+        self.window.lift()
+        focus.focus_set()
+
+    def hide(self):
+        self.window.grab_release()
+        self.window.withdraw()
+
+
+# Uzdevuma rediģēšanas dialogs - show piesaista to atlasītajam uzdevumam
+class EditDialog(PooledDialog):
+    TITLE = "Rediģēt uzdevumu"
+    WIDTH = 450
+    HEIGHT = 350
+
+    def __init__(self, app):
+        super().__init__(app)
+        ui = app.ui
+        # Rediģējamā uzdevuma id - uzdevums tiek sameklēts no jauna, saglabājot
+        self.todo_id = None
+        # Parādītais termiņa un atgādinājuma teksts - nemainīts teksts patur precīzo laiku
+        self.shown_dates = None
+
+        # Pievieno aizpildījuma konteineru
+        edit_container = tk.Frame(self.window, bg=ui.LIGHT, padx=20, pady=20)
+        edit_container.pack(fill=tk.BOTH, expand=True)
+
+        # Pievieno rediģēšanas logrīkus
+        tk.Label(
+            edit_container,
+            text="Rediģēt uzdevumu",
+            bg=ui.LIGHT,
+            fg=ui.DARK,
+            font=(ui.FONT_FAMILY, 14, "bold")
+        ).pack(anchor="w", pady=(0, 10))
+
+        # Izveido stilizētu ievades lauku ar apmali
+        input_frame = tk.Frame(
+            edit_container,
+            bg=ui.WHITE,
+            highlightbackground=ui.GRAY,
+            highlightthickness=1,
+            bd=0
+        )
+        input_frame.pack(fill=tk.X, pady=(0, 15))
+
+        self.text_entry = tk.Entry(
+            input_frame,
+            font=(ui.FONT_FAMILY, 12),
+            bd=0,
+            highlightthickness=0,
+            bg=ui.WHITE
+        )
+        self.text_entry.pack(fill=tk.X, ipady=10, padx=10)
+
+        # Termiņš un atgādinājums - tukšs lauks nozīmē, ka tā nav
+        dates_frame = tk.Frame(edit_container, bg=ui.LIGHT)
+        dates_frame.pack(fill=tk.X, pady=(0, 15))
+        date_entries = []
+        for column, label in enumerate(("Termiņš", "Atgādināt")):
+            tk.Label(
+                dates_frame,
+                text=label,
+                bg=ui.LIGHT,
+                fg=ui.DARK,
+                font=(ui.FONT_FAMILY, 10)
+            ).grid(row=0, column=column, sticky="w", padx=(0, 10))
+            entry = tk.Entry(
+                dates_frame,
+                font=(ui.FONT_FAMILY, 11),
+                bd=0,
+                highlightbackground=ui.GRAY,
+                highlightthickness=1,
+                bg=ui.WHITE,
+                width=18
+            )
+            entry.grid(row=1, column=column, sticky="w", padx=(0, 10), ipady=4)
+            date_entries.append(entry)
+        self.due_entry, self.remind_entry = date_entries
+        tk.Label(
+            dates_frame,
+            text="dd.mm.gggg hh:mm, dd.mm. vai hh:mm",
+            bg=ui.LIGHT,
+            fg=ui.GRAY,
+            font=(ui.FONT_FAMILY, 9)
+        ).grid(row=2, column=0, columnspan=2, sticky="w")
+
+        # Birkas un prioritāte - pēc tām var filtrēt meklēšanas laukā (#birka, priority>=high)
+        attributes_frame = tk.Frame(edit_container, bg=ui.LIGHT)
+        attributes_frame.pack(fill=tk.X, pady=(0, 15))
+        for column, label in enumerate(("Birkas", "Prioritāte")):
+            tk.Label(
+                attributes_frame,
+                text=label,
+                bg=ui.LIGHT,
+                fg=ui.DARK,
+                font=(ui.FONT_FAMILY, 10)
+            ).grid(row=0, column=column, sticky="w", padx=(0, 10))
+        self.tags_entry = tk.Entry(
+            attributes_frame,
+            font=(ui.FONT_FAMILY, 11),
+            bd=0,
+            highlightbackground=ui.GRAY,
+            highlightthickness=1,
+            bg=ui.WHITE,
+            width=26
+        )
+        self.tags_entry.grid(row=1, column=0, sticky="w", padx=(0, 10), ipady=4)
+        self.priority_var = tk.StringVar(value=PRIORITY_NAMES[0])
+        ttk.Combobox(
+            attributes_frame,
+            textvariable=self.priority_var,
+            values=PRIORITY_NAMES,
+            state="readonly",
+            font=(ui.FONT_FAMILY, 10),
+            width=10
+        ).grid(row=1, column=1, sticky="w", ipady=2)
+
+        # Pogu konteiners
+        button_frame = tk.Frame(edit_container, bg=ui.LIGHT)
+        button_frame.pack(fill=tk.X)
+
+        # Atcelšanas poga
+        cancel_button = tk.Button(
+            button_frame,
+            text="Atcelt",
+            command=self.hide,
+            bg=ui.LIGHT,
+            fg=ui.DARK,
+            font=(ui.FONT_FAMILY, 10),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        cancel_button.pack(side=tk.LEFT, padx=(0, 10))
+
+        # Saglabāšanas poga
+        save_button = tk.Button(
+            button_frame,
+            text="Saglabāt",
+            command=self.save,
+            bg=ui.PRIMARY,
+            fg=ui.WHITE,
+            font=(ui.FONT_FAMILY, 10, "bold"),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        save_button.pack(side=tk.LEFT)
+
+        # Pievieno pogu efektus
+        app.setup_button_hover(cancel_button)
+        app.setup_button_hover(save_button)
+
+        # Enter taustiņš, lai saglabātu
+        self.text_entry.bind("<Return>", lambda event: self.save())
+
+    def show(self, todo):
+        """Aizpilda laukus ar uzdevuma vērtībām un parāda dialogu"""
+        self.todo_id = todo.id
+        self.shown_dates = (format_when(todo.due), format_when(todo.remind_at, MORNING))
+        for entry, value in ((self.text_entry, todo.text), (self.due_entry, self.shown_dates[0]),
+                             (self.remind_entry, self.shown_dates[1]), (self.tags_entry, format_tags(todo.tags))):
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        self.text_entry.select_range(0, tk.END)
+        self.priority_var.set(PRIORITY_NAMES[todo.priority])
+        self.present(self.text_entry)
+
+    def save(self):
+        app = self.app
+        todo = app.todos.get(self.todo_id)
+        if todo is None:
+            # Uzdevumu pa to laiku izdzēsa cita programma vai sinhronizācija
+            self.hide()
+            return
+        new_text = self.text_entry.get().strip()
+        if not new_text:
+            messagebox.showwarning("Brīdinājums", "Uzdevums nevar būt tukšs!", parent=self.window)
+            return
+        due_text, remind_text = self.due_entry.get(), self.remind_entry.get()
+        try:
+            # Lauks rāda laiku līdz minūtei - ja tas nav mainīts, paliek iepriekšējā vērtība
+            due = todo.due if due_text == self.shown_dates[0] else parse_when(due_text)
+            remind_at = todo.remind_at if remind_text == self.shown_dates[1] else parse_when(remind_text, MORNING)
+        except ValueError as e:
+            messagebox.showwarning("Brīdinājums", str(e), parent=self.window)
+            return
+        fields = {"text": new_text, "due": due, "remind_at": remind_at,
+                  "tags": parse_tags(self.tags_entry.get()), "priority": PRIORITY_NAMES.index(self.priority_var.get())}
+        # Viens atsaukšanas solis un viena rakstīšana tikai mainītajiem laukiem - bez izmaiņām nekas netiek saglabāts
+        changed = app.core.update(todo.id, **fields)
+        if changed:
+            app._show_fields_changed(todo, changed)
+            app.update_count_label()
+        self.hide()
+
+
+# Dzēšanas apstiprinājuma dialogs - show piesaista to dzēšamajiem uzdevumiem
+class ConfirmDialog(PooledDialog):
+    TITLE = "Apstiprināt dzēšanu"
+    WIDTH = 400
+    HEIGHT = 150
+
+    def __init__(self, app):
+        super().__init__(app)
+        ui = app.ui
+        self.todo_ids = []
+
+        # Pievieno aizpildījuma konteineru
+        confirm_container = tk.Frame(self.window, bg=ui.LIGHT, padx=20, pady=20)
+        confirm_container.pack(fill=tk.BOTH, expand=True)
+
+        # Brīdinājuma ikona un ziņojums
+        message_frame = tk.Frame(confirm_container, bg=ui.LIGHT)
+        message_frame.pack(fill=tk.X, pady=(0, 15))
+
+        warning_icon = tk.Label(
+            message_frame,
+            text="⚠️",
+            font=(ui.FONT_FAMILY, 24),
+            bg=ui.LIGHT,
+            fg=ui.DANGER
+        )
+        warning_icon.pack(side=tk.LEFT, padx=(0, 15))
+
+        self.message_label = tk.Label(
+            message_frame,
+            text="",
+            font=(ui.FONT_FAMILY, 12),
+            bg=ui.LIGHT,
+            fg=ui.DARK,
+            wraplength=280,
+            justify=tk.LEFT
+        )
+        self.message_label.pack(side=tk.LEFT, fill=tk.BOTH)
+
+        # Pogu konteiners
+        button_frame = tk.Frame(confirm_container, bg=ui.LIGHT)
+        button_frame.pack(fill=tk.X)
+
+        # Atcelšanas poga
+        self.cancel_button = tk.Button(
+            button_frame,
+            text="Atcelt",
+            command=self.hide,
+            bg=ui.LIGHT,
+            fg=ui.DARK,
+            font=(ui.FONT_FAMILY, 10),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        self.cancel_button.pack(side=tk.RIGHT, padx=(10, 0))
+
+        # Dzēšanas poga
+        delete_button = tk.Button(
+            button_frame,
+            text="Dzēst",
+            command=self.confirm,
+            bg=ui.DANGER,
+            fg=ui.WHITE,
+            font=(ui.FONT_FAMILY, 10, "bold"),
+            relief=ui.BTN_RELIEF,
+            padx=ui.BTN_PADDING_X,
+            pady=ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        delete_button.pack(side=tk.RIGHT)
+
+        # Pievieno pogu efektus
+        app.setup_button_hover(self.cancel_button)
+        app.setup_button_hover(delete_button)
+
+    def show(self, message, todo_ids):
+        """Parāda jautājumu par šiem uzdevumiem"""
+        self.todo_ids = todo_ids
+        self.message_label.config(text=message)
+        self.present(self.cancel_button)
+
+    def confirm(self):
+        todo_ids, self.todo_ids = self.todo_ids, []
+        self.hide()
+        self.app.delete_todos(todo_ids)
+
+
 # Galvenā klase, kas veido visu lietotni
 class TodoApp:
+    # Līdz cik rindām izmaiņu parādīt rindu pa rindai - lielākām izmaiņām saraksts tiek pārkārtots vienreiz
+    RESTRIPE_CHUNK = 100
+
+    # Virtuālais režīms - Treeview glabā tikai redzamās rindas, ja uzdevumu ir vairāk par šo skaitu
+    VIRTUAL_THRESHOLD = 5000
+    VIRTUAL_OVERSCAN = 5
+    ROW_HEIGHT = 40
+    HEADING_HEIGHT = 25
+
+    SEARCH_PLACEHOLDER = "Meklēt vai #birka..."
+    # Meklēšanas indekss tiek veidots fonā pa šādām porcijām
+    SEARCH_INDEX_CHUNK = 200
+    # Vaicājumiem bez trigrammām (1-2 burti) jāpārbauda visi teksti, tāpēc tos izpilda ar aizturi
+    SEARCH_DEBOUNCE_MS = 150
+
+    # Ielāde pa daļām - cik rindu pievienot vienā plānotāja solī
+    LOAD_ROWS_PER_STEP = 200
+    # Imports no faila - cik uzdevumu pievienot un saglabāt vienā plānotāja solī
+    IMPORT_ROWS_PER_STEP = 500
+
+    # Cik bieži pārbaudīt, vai kādi pabeigtie uzdevumi jāpārvieto uz arhīvu
+    ARCHIVE_CHECK_MS = 10 * 60 * 1000
+
+    # Cik bieži pārbaudīt, vai sarakstu nav mainījusi cita programma (TODO_WATCH_MS, 0 izslēdz)
+    WATCH_MS = 1000
+    # Citu programmu izmaiņas - cik izpildīt vienā plānotāja solī
+    MERGE_ROWS_PER_STEP = 500
+
+    # Cik bieži sinhronizēt ar serveri (TODO_SYNC_MS, 0 - tikai no izvēlnes)
+    SYNC_MS = 60 * 1000
+    # Sinhronizācija - cik uzdevumu sagatavot sūtīšanai vai saņemto izpildīt vienā plānotāja solī
+    SYNC_ROWS_PER_STEP = 500
+
+    # Taimera atslēgas - tuvākais termiņš (uzdevums kļūst nokavēts) un pusnakts (mainās "šodien")
+    DUE_KEY = ("due", None)
+    DAY_KEY = ("day", None)
+
+    # Prioritātes atzīme uzdevuma teksta priekšā pēc līmeņa
+    PRIORITY_MARKS = ("", "!", "!!", "!!!")
+
+    # Metodes, kuru ilgums tiek mērīts, ja lietotne palaista ar --instrument
+    INSTRUMENTED_METHODS = (
+        "load_todos", "_load_worker", "_append_loaded", "_finish_loading", "save_todos", "record_changes",
+        "refresh_todo_list", "_render_window", "_stripe_visible", "_build_search_index_step", "apply_filter",
+        "add_todo", "toggle_complete", "edit_todo", "delete_todo", "confirm_delete", "delete_todos",
+        "clear_completed", "undo", "redo", "set_sort", "_show_added_many", "start_import", "start_export",
+        "check_archive", "_archive_selected", "switch_list", "_on_deadlines", "check_external",
+        "sync_now",
+    )
+    DEBUG_REFRESH_MS = 1000
+
     def __init__(self, root):
         self.root = root
         self.root.title("Todo App")
@@ -47,17 +584,136 @@ class TodoApp:
         except:
             pass
 
-        # Kur glabāt uzdevumus - saglabā JSON failā
-        self.todo_file = "todos.json"
-        self.todos = self.load_todos()
+        # Saraksti (projekti) - katrs savā failā, ielādēts tiek tikai atvērtais; noklusētais ir todos.json
+        self.lists = ListManifest.open("todos.json")
+        # Krātuvi var izvēlēties ar vides mainīgo TODO_STORAGE=journal|binary|sqlite
+        self.storage_kind = os.environ.get("TODO_STORAGE", "journal")
+        # Sinhronizācijas serveris (TODO_SYNC_URL, piemēram sync_server.py) - bez tā sinhronizācijas nav
+        self.sync_url = os.environ.get("TODO_SYNC_URL")
+        self.sync_ms = int(os.environ.get("TODO_SYNC_MS", self.SYNC_MS))
+        self._sync_job = None
+
+        # Ilgie darbi - fona pavedieni un pa kadriem sadalīts darbs Tk pavedienā
+        self.scheduler = TkScheduler(self.root)
+
+        # Atgādinājumi un termiņi - viens after() taimeris uz tuvāko brīdi, nevis periodiska visu uzdevumu pārbaude
+        self.deadlines = DeadlineTimer(self.root, self._on_deadlines)
+        # Paziņojumi, kas vēl nav aizvērti - redzams ir pirmais
+        self.notifications = deque()
+
+        # Atvērtā saraksta krātuve un tukšs stāvoklis - uzdevumi tiek ielādēti start_loading
+        self._open_current_list()
+
+        # Kārtošana - citu kārtojumu izveido pirmajā izvēlē, pēc tam tas tiek uzturēts pie katras izmaiņas.
+        # Izvēlētais kārtojums paliek, pārslēdzot sarakstus
+        self.sort_key = "seq"
+        self.sort_reverse = False
+        self.group_by_status = False
+        # Kārtojums, kas jāatjauno pēc cita saraksta ielādes
+        self._restore_sort = None
+
+        # Imports vai eksports, kas notiek pašlaik - funkcija tā atcelšanai vai None
+        self._cancel_transfer = None
+
+        # Arhivēšanas noteikumi - TODO_ARCHIVE_DAYS un TODO_ARCHIVE_KEEP (0 izslēdz noteikumu)
+        self.archive_days = float(os.environ.get("TODO_ARCHIVE_DAYS", ARCHIVE_AFTER_DAYS))
+        self.archive_keep = int(os.environ.get("TODO_ARCHIVE_KEEP", KEEP_COMPLETED))
+        self._archive_job = None
+        self.archive_window = None
+
+        # Citu programmu (cita loga, komandrindas) izmaiņu pārbaude - tikai os.stat, kamēr nekas nav mainīts
+        self.watch_ms = int(os.environ.get("TODO_WATCH_MS", self.WATCH_MS))
+        self._watch_job = None
+
+        # Pogu krāsas zem kursora pēc pogas krāsas un vienreiz izveidotie dialogi pēc klases
+        self._hover_colors = {}
+        self.dialogs = {}
 
         # Izveido visus logrīkus
         self.create_widgets()
+        self.create_menu()
+        # Dialogi tiek sagatavoti, kad logs jau ir uzzīmēts, lai pirmā atvēršana nebūtu lēnāka par nākamajām
+        self.root.after_idle(self.prepare_dialogs)
+
+        # Ātrdarbības panelis - pieejams tikai, ja mērīšana ir ieslēgta (F12)
+        self.debug_panel = None
+        self._debug_job = None
+        if metrics.enabled:
+            self.root.bind("<F12>", lambda event: self.toggle_debug_panel())
+
+        # Sāk ielādēt uzdevumus - logs tiek uzzīmēts uzreiz, rindas parādās pakāpeniski
+        self.start_loading()
+
+    def _open_current_list(self):
+        """Atver pašreizējā saraksta krātuvi ar tukšu stāvokli - pārējie saraksti netiek lasīti"""
+        # Kur glabāt uzdevumus - katram sarakstam savs JSON fails
+        self.todo_file = self.lists.current.file
+        self.storage = open_storage(self.storage_kind, self.todo_file)
+
+        # Uzdevumi tiek ielādēti fonā pēc tam, kad logs jau ir redzams
+        self.todos = TodoStore()
+        # Šeit veiktās izmaiņas tiek atzīmētas sinhronizācijai, ja serveris ir norādīts vai saraksts jau sinhronizēts
+        outbox = None
+        if self.sync_url or sync_enabled(self.todo_file):
+            outbox = SyncOutbox(outbox_path(self.todo_file))
+        self.sync = None
+        if self.sync_url:
+            # Tīkla moduļi tiek ielādēti tikai tad, ja sinhronizācija ir ieslēgta
+            from sync import ListSync
+            self.sync = ListSync(self.todo_file, self.sync_url, self.lists.current.name, outbox)
+        self._syncing = False
+        self._sync_task = None
+        self._sync_error = None
+        # Fona rakstīšanas kļūda, par kuru lietotājs jau ir brīdināts
+        self._save_error = None
+        # Visas darbības ar uzdevumiem iet caur TodoList - saglabāšanu veic fona rakstītājs
+        self.core = TodoList(self.storage, self.todos, persist=self.record_changes,
+                             archive=Archive(archive_path(self.todo_file), self.storage.lock), outbox=outbox)
+        self.saver = None
+        self.loading = False
+        self._load_error = None
+        # Izmaiņas, kas veiktas ielādes laikā - tās tiek nodotas rakstītājam pēc ielādes
+        self._pending_ops = []
+        # Citu programmu izmaiņu izpilde - kamēr tā notiek, šeit tiek krāti šīs programmas mainītie lauki
+        self._merge_changes = None
+        self._merge_task = None
+
+        # Pirmā rinda, no kuras joslu atzīmes var būt novecojušas - tās tiek salabotas, kad rindas kļūst redzamas
+        self._stripes_from = None
+
+        # Virtuālā režīma stāvoklis - pirmā redzamā uzdevuma indekss, atlasītie uzdevumi un fokusa uzdevums
+        self.virtual_mode = False
+        self._view_offset = 0
+        self._selected_ids = set()
+        self._focus_id = None
+        self._rendering = False
+
+        # Meklēšana - indekss tiek veidots fonā pa daļām, skats ir None, kad filtra nav
+        self.search_index = SearchIndex()
+        self._index_next_seq = 0
+        self._index_complete = False
+        self._index_task = None
+        self._search_job = None
+        self.search_query = ""
+        # Strukturēts vaicājums (#birka, prioritāte, AND/OR/NOT) vai None parastai teksta meklēšanai
+        self.search_filter = None
+        self.view = None
+
+        # Katra saraksta kārtojumi un jauna kārtojuma veidošana pa kadriem un tās laikā mainīto uzdevumu id
+        self._orders = {}
+        self._sort_task = None
+        self._sort_changes = None
+
+        # Iepriekšējā saraksta atgādinājumi tiek atcelti - līdz šim brīdim termiņi ir apstrādāti
+        self.deadlines.clear()
+        self._due_checked = time.time()
+        self.deadlines.schedule(self.DAY_KEY, day_end(self._due_checked))
 
     def create_widgets(self):
         # Galvenais konteiners ar aizpildījumu malās
         container = tk.Frame(self.root, bg=self.ui.LIGHT)
         container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.container = container
 
         # Aplikācijas augšdaļa ar nosaukumu
         header_frame = tk.Frame(container, bg=self.ui.LIGHT)
@@ -73,16 +729,59 @@ class TodoApp:
         )
         title_label.pack(side=tk.LEFT)
 
+        # Sarakstu pārslēdzējs - skaiti izvēlnē nāk no manifesta, citu sarakstu faili netiek atvērti
+        self.list_var = tk.StringVar(value=self.lists.current_id)
+        self.list_button = tk.Menubutton(
+            header_frame,
+            font=(self.ui.FONT_FAMILY, 12),
+            fg=self.ui.PRIMARY,
+            bg=self.ui.LIGHT,
+            activebackground=self.ui.LIGHT,
+            relief=tk.FLAT,
+            cursor="hand2"
+        )
+        self.list_menu = tk.Menu(self.list_button, tearoff=0, bg=self.ui.WHITE, fg=self.ui.DARK,
+                                 postcommand=self._build_list_menu)
+        self.list_button.config(menu=self.list_menu)
+        self.list_button.pack(side=tk.LEFT, padx=(10, 0), pady=10)
+        self._update_list_button()
+
         # Šodienas datums labajā pusē
         date_str = datetime.now().strftime("%B %d, %Y")
-        date_label = tk.Label(
+        self.date_label = tk.Label(
             header_frame,
             text=date_str,
             font=(self.ui.FONT_FAMILY, 12),
             fg=self.ui.GRAY,
             bg=self.ui.LIGHT
         )
-        date_label.pack(side=tk.RIGHT, pady=10)
+        self.date_label.pack(side=tk.RIGHT, pady=10)
+
+        # Paziņojumu josla atgādinājumiem - redzama tikai, kad ir neaizvērti paziņojumi
+        self.notify_frame = tk.Frame(container, bg=self.ui.PRIMARY)
+        self.notify_label = tk.Label(
+            self.notify_frame,
+            text="",
+            font=(self.ui.FONT_FAMILY, 11),
+            fg=self.ui.WHITE,
+            bg=self.ui.PRIMARY,
+            anchor="w",
+            cursor="hand2"
+        )
+        self.notify_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=6)
+        self.notify_label.bind("<Button-1>", lambda event: self.show_notified_todo())
+        tk.Button(
+            self.notify_frame,
+            text="✕",
+            command=self.dismiss_notification,
+            bg=self.ui.PRIMARY,
+            fg=self.ui.WHITE,
+            activebackground=self.ui.PRIMARY,
+            bd=0,
+            relief=tk.FLAT,
+            cursor="hand2"
+        ).pack(side=tk.RIGHT, padx=6)
+        self.header_frame = header_frame
 
         # Ievades lauks un poga uzdevumu pievienošanai
         input_container = tk.Frame(container, bg=self.ui.LIGHT)
@@ -137,7 +836,7 @@ class TodoApp:
         self.todo_entry.bind("<FocusOut>", on_entry_focus_out)
 
         # Poga uzdevumu pievienošanai
-        add_button = tk.Button(
+        add_button = self.add_button = tk.Button(
             input_container,
             text="Pievienot",
             command=self.add_todo,
@@ -165,6 +864,67 @@ class TodoApp:
         )
         self.count_label.pack(side=tk.LEFT)
 
+        # Ielādes indikators - redzams tikai, kamēr uzdevumi tiek ielādēti, importēti vai eksportēti
+        self.load_progress = ttk.Progressbar(stats_frame, mode="determinate", length=120, maximum=1.0)
+        # Importa vai eksporta atcelšana - redzama tikai to laikā
+        self.cancel_button = tk.Button(
+            stats_frame,
+            text="Atcelt",
+            font=(self.ui.FONT_FAMILY, 9),
+            bg=self.ui.LIGHT,
+            fg=self.ui.GRAY,
+            bd=0,
+            cursor="hand2",
+            command=self.cancel_transfer
+        )
+
+        # Meklēšanas lauks - filtrē sarakstu, kamēr raksta
+        search_frame = tk.Frame(
+            stats_frame,
+            bg=self.ui.WHITE,
+            highlightbackground=self.ui.GRAY,
+            highlightthickness=1,
+            bd=0
+        )
+        search_frame.pack(side=tk.RIGHT)
+
+        tk.Label(
+            search_frame,
+            text="🔍",
+            font=(self.ui.FONT_FAMILY, 10),
+            bg=self.ui.WHITE,
+            fg=self.ui.GRAY
+        ).pack(side=tk.LEFT, padx=(6, 0))
+
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            font=(self.ui.FONT_FAMILY, 10),
+            bd=0,
+            highlightthickness=0,
+            bg=self.ui.WHITE,
+            width=28
+        )
+        self.search_entry.pack(side=tk.LEFT, ipady=4, padx=6)
+        self.search_entry.insert(0, self.SEARCH_PLACEHOLDER)
+        self.search_entry.config(fg=self.ui.GRAY)
+
+        def on_search_focus_in(event):
+            if self.search_entry.get() == self.SEARCH_PLACEHOLDER:
+                self.search_entry.delete(0, tk.END)
+                self.search_entry.config(fg=self.ui.DARK)
+
+        def on_search_focus_out(event):
+            if not self.search_entry.get():
+                self.search_entry.insert(0, self.SEARCH_PLACEHOLDER)
+                self.search_entry.config(fg=self.ui.GRAY)
+
+        self.search_entry.bind("<FocusIn>", on_search_focus_in)
+        self.search_entry.bind("<FocusOut>", on_search_focus_out)
+        self.search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+        self.search_var.trace_add("write", lambda *args: self._on_search_changed())
+
         # Uzdevumu saraksta rāmis ar baltu fonu un apmali
         list_container = tk.Frame(
             container,
@@ -180,8 +940,8 @@ class TodoApp:
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         # Ritjosla un saraksts uzdevumiem
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar = ttk.Scrollbar(list_frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         # Saraksta stila iestatījumi
         style = ttk.Style()
@@ -190,7 +950,7 @@ class TodoApp:
             "Treeview",
             background=self.ui.WHITE,
             foreground=self.ui.DARK,
-            rowheight=40,
+            rowheight=self.ROW_HEIGHT,
             fieldbackground=self.ui.WHITE,
             borderwidth=0,
             font=(self.ui.FONT_FAMILY, 11)
@@ -215,29 +975,32 @@ class TodoApp:
         )
 
         # Izveido sarakstu ar kolonnām
-        columns = ("Status", "Task", "Actions")
+        columns = ("Status", "Task", "Due", "Actions")
         self.todo_tree = ttk.Treeview(
             list_frame,
             columns=columns,
             show="headings",
-            selectmode="browse",
-            yscrollcommand=scrollbar.set
+            selectmode="extended",
+            yscrollcommand=self._on_tree_view
         )
 
-        # Konfigurē kolonnas
-        self.todo_tree.heading("Status", text="")
-        self.todo_tree.heading("Task", text="Uzdevums")
-        self.todo_tree.heading("Actions", text="")
+        # Konfigurē kolonnas - klikšķis uz galvenes maina kārtojumu
+        for column in columns:
+            self.todo_tree.heading(column, command=lambda column=column: self._on_heading_click(column))
+        self._update_headings()
 
         self.todo_tree.column("Status", width=40, anchor="center")
-        self.todo_tree.column("Task", width=400)
-        self.todo_tree.column("Actions", width=60, anchor="center")
+        self.todo_tree.column("Task", width=290)
+        self.todo_tree.column("Due", width=90, anchor="center")
+        self.todo_tree.column("Actions", width=80, anchor="center")
 
         self.todo_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.todo_tree.yview)
+        self.scrollbar.config(command=self.todo_tree.yview)
 
         # Pievieno atzīmes, lai pabeigti uzdevumi būtu pelēki
         self.todo_tree.tag_configure('completed', foreground=self.ui.GRAY)
+        # Aktīvi uzdevumi, kuru termiņš ir pagājis
+        self.todo_tree.tag_configure('overdue', foreground=self.ui.DANGER)
         self.todo_tree.tag_configure('odd_row', background=self.ui.LIGHT)
 
         # Pogu rāmis darbībām ar uzdevumiem
@@ -289,17 +1052,51 @@ class TodoApp:
         )
         delete_button.pack(side=tk.LEFT)
 
+        # Poga visu pabeigto uzdevumu dzēšanai
+        clear_button = tk.Button(
+            action_frame,
+            text="Notīrīt pabeigtos",
+            command=self.clear_completed,
+            bg=self.ui.LIGHT,
+            fg=self.ui.DARK,
+            font=(self.ui.FONT_FAMILY, 10),
+            relief=self.ui.BTN_RELIEF,
+            padx=self.ui.BTN_PADDING_X,
+            pady=self.ui.BTN_PADDING_Y,
+            cursor="hand2"
+        )
+        clear_button.pack(side=tk.RIGHT)
+
         # Pievieno pogu efektus, kad peles kursors ir virs tām
-        for button in (add_button, complete_button, edit_button, delete_button):
+        for button in (add_button, complete_button, edit_button, delete_button, clear_button):
             self.setup_button_hover(button)
 
         # Dubultklikšķis, lai rediģētu - vispirms pārbauda, vai ir atlasīts elements
         def on_double_click(event):
-            if self.todo_tree.selection():  # Turpina tikai, ja ir atlasīts uzdevums
+            if self.has_selection():  # Turpina tikai, ja ir atlasīts uzdevums
                 self.edit_todo()
 
         self.todo_tree.bind("<Double-1>", on_double_click)
 
+        # Atsaukšana un atkārtošana visā logā
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Z>", lambda event: self.redo())
+
+        # Vairāku uzdevumu atlase - Ctrl/Shift+klikšķis, Ctrl+A atlasa visus, Delete dzēš atlasītos
+        self.todo_tree.bind("<Control-a>", lambda event: self.select_all() or "break")
+        self.todo_tree.bind("<Delete>", lambda event: self.delete_todo())
+
+        # Virtuālajam režīmam pašiem jāapstrādā ritināšana, taustiņi un atlase
+        self.todo_tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.todo_tree.bind("<Button-1>", self._on_tree_click)
+        self.todo_tree.bind("<Configure>", self._on_tree_configure)
+        self.todo_tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.todo_tree.bind("<Button-4>", self._on_mouse_wheel)
+        self.todo_tree.bind("<Button-5>", self._on_mouse_wheel)
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.todo_tree.bind(key, self._on_virtual_key)
+
         # Labā klikšķa izvēlne
         self.create_context_menu()
 
@@ -309,14 +1106,88 @@ class TodoApp:
         # Pareiza aizvēršana, lai saglabātu uzdevumus
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def create_debug_panel(self):
+        """Izveido ātrdarbības paneli loga apakšā"""
+        self.debug_panel = tk.Frame(self.root, bg=self.ui.DARK)
+
+        header = tk.Frame(self.debug_panel, bg=self.ui.DARK)
+        header.pack(fill=tk.X, padx=10, pady=(6, 0))
+        tk.Label(
+            header,
+            text="Ātrdarbība (F12)",
+            font=(self.ui.FONT_FAMILY, 10, "bold"),
+            fg=self.ui.WHITE,
+            bg=self.ui.DARK
+        ).pack(side=tk.LEFT)
+
+        self.debug_status = tk.Label(header, text="", font=(self.ui.FONT_FAMILY, 9), fg=self.ui.GRAY, bg=self.ui.DARK)
+        self.debug_status.pack(side=tk.LEFT, padx=10)
+
+        for text, command in (("Notīrīt", self.reset_metrics), ("Saglabāt failā", self.dump_metrics)):
+            tk.Button(
+                header,
+                text=text,
+                command=command,
+                bg=self.ui.LIGHT,
+                fg=self.ui.DARK,
+                font=(self.ui.FONT_FAMILY, 9),
+                relief=self.ui.BTN_RELIEF,
+                cursor="hand2"
+            ).pack(side=tk.RIGHT, padx=(5, 0))
+
+        self.debug_text = tk.Text(
+            self.debug_panel,
+            height=10,
+            font=("Courier", 9),
+            bg=self.ui.DARK,
+            fg=self.ui.LIGHT,
+            bd=0,
+            highlightthickness=0
+        )
+        self.debug_text.pack(fill=tk.X, padx=10, pady=6)
+
+    def toggle_debug_panel(self):
+        """Parāda vai paslēpj ātrdarbības paneli"""
+        if self.debug_panel is None:
+            self.create_debug_panel()
+        if self._debug_job is not None:
+            self.root.after_cancel(self._debug_job)
+            self._debug_job = None
+            self.debug_panel.pack_forget()
+        else:
+            self.debug_panel.pack(side=tk.BOTTOM, fill=tk.X, before=self.container)
+            self._refresh_debug_panel()
+
+    def _refresh_debug_panel(self):
+        """Atjauno paneļa tekstu - kamēr panelis ir redzams, reizi sekundē"""
+        self.debug_text.config(state=tk.NORMAL)
+        self.debug_text.delete("1.0", tk.END)
+        self.debug_text.insert("1.0", "\n".join(metrics.report_lines()))
+        self.debug_text.config(state=tk.DISABLED)
+        self._debug_job = self.root.after(self.DEBUG_REFRESH_MS, self._refresh_debug_panel)
+
+    def reset_metrics(self):
+        """Notīra visus mērījumus"""
+        metrics.reset()
+        self.debug_status.config(text="")
+
+    def dump_metrics(self):
+        """Saglabā mērījumus JSON failā blakus uzdevumu failam"""
+        path = metrics.dump_path or f"todo_metrics-{datetime.now():%Y%m%d-%H%M%S}.json"
+        try:
+            metrics.dump(path)
+        except OSError as e:
+            messagebox.showerror("Kļūda", f"Neizdevās saglabāt mērījumus: {e}")
+            return
+        self.debug_status.config(text=f"Saglabāts: {path}")
+
     def setup_button_hover(self, button):
         """Pievieno pogām efektu, kad peles kursors ir virs tām"""
         original_bg = button['background']
+        # Nedaudz tumšāka krāsa, kad kursors ir virs pogas - aprēķināta vienreiz katrai krāsai
+        darker = self.hover_color(original_bg)
 
-        # Nedaudz tumšāka krāsa, kad kursors ir virs pogas
         def on_enter(e):
-            r, g, b = button.winfo_rgb(original_bg)
-            darker = f'#{int(r/256*0.9):02x}{int(g/256*0.9):02x}{int(b/256*0.9):02x}'
             button['background'] = darker
 
         def on_leave(e):
@@ -325,6 +1196,27 @@ class TodoApp:
         button.bind("<Enter>", on_enter)
         button.bind("<Leave>", on_leave)
 
+    def hover_color(self, color):
+        """Pogas krāsa zem kursora - winfo_rgb tiek izsaukts tikai pirmo reizi katrai krāsai"""
+        darker = self._hover_colors.get(color)
+        if darker is None:
+            r, g, b = self.root.winfo_rgb(color)
+            darker = self._hover_colors[color] = f'#{int(r/256*0.9):02x}{int(g/256*0.9):02x}{int(b/256*0.9):02x}'
+        return darker
+
+    def create_menu(self):
+        """Izveido loga izvēlni ar importu un eksportu"""
+        menubar = tk.Menu(self.root)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Importēt...", command=self.import_file)
+        file_menu.add_command(label="Eksportēt...", command=self.export_file)
+        file_menu.add_separator()
+        file_menu.add_command(label="Arhīvs", command=self.show_archive)
+        file_menu.add_command(label="Sinhronizēt", command=lambda: self.sync_now(manual=True),
+                              state=tk.NORMAL if self.sync_url else tk.DISABLED)
+        menubar.add_cascade(label="Fails", menu=file_menu)
+        self.root.config(menu=menubar)
+
     def create_context_menu(self):
         """Izveido labā klikšķa izvēlni"""
         self.context_menu = tk.Menu(self.root, tearoff=0, bg=self.ui.WHITE, fg=self.ui.DARK)
@@ -332,57 +1224,971 @@ class TodoApp:
         self.context_menu.add_command(label="Rediģēt", command=self.edit_todo)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="Dzēst", command=self.delete_todo)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Atsaukt (Ctrl+Z)", command=self.undo)
+        self.context_menu.add_command(label="Atkārtot (Ctrl+Y)", command=self.redo)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Atlasīt visu", command=self.select_all)
+        self.context_menu.add_command(label="Notīrīt pabeigtos", command=self.clear_completed)
 
         def show_context_menu(event):
             # Parāda tikai, ja ir atlasīts uzdevums
-            if self.todo_tree.selection():
+            if self.has_selection():
                 self.context_menu.post(event.x_root, event.y_root)
 
         self.todo_tree.bind("<Button-3>", show_context_menu)
 
     def load_todos(self):
-        """Ielādē uzdevumus no JSON faila"""
-        if os.path.exists(self.todo_file):
-            try:
-                with open(self.todo_file, "r") as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Ielādē uzdevumus no JSON faila un tā žurnāla (sinhroni)"""
+        try:
+            return TodoStore.from_dicts(self.storage.load())
+        except:
+            return TodoStore()
+
+    def start_loading(self):
+        """Sāk ielādēt uzdevumus fona pavedienā"""
+        self.loading = True
+        self._load_buffer = deque()
+        self._load_ops = []
+        self._load_done = False
+        self.scheduler.submit(self._load_worker, on_done=self._on_load_done, on_error=self._on_load_error)
+        self._load_task = self.scheduler.run_sliced(self._loading_steps(), on_done=self._finish_loading)
+
+        # Kamēr saraksts nav pilnīgs, pievienošana un meklēšana nav pieejama
+        self.load_progress["value"] = 0
+        self.load_progress.pack(side=tk.LEFT, padx=10)
+        for widget in (self.todo_entry, self.add_button, self.search_entry):
+            widget.config(state=tk.DISABLED)
+        self.update_count_label()
+
+    def _load_worker(self):
+        """Fona pavediens - parsē failu un nodod uzdevumus porcijās Tk pavedienam"""
+        for kind, payload in self.storage.iter_load():
+            self.scheduler.call_soon(self._on_load_event, kind, payload)
+
+    def _on_load_event(self, kind, payload):
+        """Saņem ielādes pavediena nolasīto porciju"""
+        if kind == "todos":
+            self._load_buffer.extend(payload)
+        elif kind == "progress":
+            self.load_progress["value"] = payload
+        elif kind == "ops":
+            self._load_ops.extend(payload)
+
+    def _on_load_done(self, result):
+        self._load_done = True
+
+    def _on_load_error(self, error):
+        self._load_error = error
+        self._load_done = True
+
+    def _loading_steps(self):
+        """Pievieno ielādētās rindas porcijās - plānotājs tās izpilda pa kadriem"""
+        while not self._load_done or self._load_buffer:
+            if not self._load_buffer:
+                yield WAIT
+                continue
+            count = min(self.LOAD_ROWS_PER_STEP, len(self._load_buffer))
+            self._append_loaded([self._load_buffer.popleft() for _ in range(count)])
+            self.update_count_label()
+            yield
+
+    def _append_loaded(self, batch):
+        """Pievieno ielādēto porciju sarakstam un parāda jaunās rindas"""
+        start = len(self.todos)
+        self.todos.extend(Todo.from_dict(data) for data in batch)
+        self._track_deadlines(self.todos[start:])
+        if not self.virtual_mode and len(self.todos) > self.VIRTUAL_THRESHOLD:
+            self.refresh_todo_list()
+        elif self.virtual_mode:
+            self._refresh_window_if_affected(start)
+        else:
+            for index in range(start, len(self.todos)):
+                todo = self.todos[index]
+                self.todo_tree.insert("", "end", iid=todo.id, values=self._row_values(todo),
+                                      tags=self._row_tags(todo, index))
+
+    def _finish_loading(self):
+        """Pabeidz ielādi - izpilda žurnāla izmaiņas un sāk saglabāšanu un indeksēšanu"""
+        self.loading = False
+        self._arm_due()
+        for op in self._load_ops:
+            self.apply_store_op(op)
+        self._load_ops = []
+
+        self.load_progress.pack_forget()
+        for widget in (self.todo_entry, self.add_button, self.search_entry):
+            widget.config(state=tk.NORMAL)
+        self.update_count_label()
+
+        if self._load_error is not None:
+            # Nepilnu sarakstu nedrīkst saglabāt pāri esošajam failam
+            messagebox.showerror("Kļūda", f"Neizdevās ielādēt uzdevumus: {self._load_error}\n"
+                                          "Izmaiņas netiks saglabātas.")
+            return
+
+        # Sinhronizācijas žurnāls tiek pierakstīts fonā kopā ar pašām izmaiņām
+        outbox = self.core.outbox
+        self.saver = BackgroundSaver(self.storage, on_written=outbox.flush if outbox is not None else None)
+        if self.storage.needs_full_save:
+            self.storage.needs_full_save = False
+            self.saver.request_save(self.todos)
+        pending, self._pending_ops = self._pending_ops, []
+        if pending:
+            self.record_changes(pending)
+
+        # Meklēšanas indekss tiek veidots, kad saraksts ir pilnīgs
+        self._index_task = self.scheduler.run_sliced(iter(self._build_search_index_step, False))
+        # Sen pabeigtie uzdevumi tiek pārvietoti uz arhīvu tikai pēc tam, kad ielāde ir izdevusies
+        self.check_archive()
+        self.check_external()
+        self.sync_now()
+
+        if self._restore_sort is not None:
+            # Iepriekšējā saraksta kārtojums - tiek veidots tagad, kad saraksts ir pilnīgs
+            key, reverse, grouped = self._restore_sort
+            self._restore_sort = None
+            self.set_sort(key, reverse, grouped)
+
+    def _finish_loading_now(self):
+        """Pabeidz ielādi uzreiz (piemēram, aizverot logu ielādes laikā)"""
+        self.scheduler.finish(self._load_task)
+
+    def apply_store_op(self, op):
+        """Izpilda izmaiņu, kas nāk no žurnāla, un atjauno tikai skartās rindas"""
+        kind = op["op"]
+        if kind == "add":
+            if op["todo"]["id"] not in self.todos:
+                todo = Todo.from_dict(op["todo"])
+                if op.get("before") is not None:
+                    # Atjaunots dzēsts uzdevums - tas atgriežas savā vietā
+                    self.todos.insert_before(todo, op["before"])
+                    self._show_inserted_many([todo])
+                else:
+                    self.todos.append(todo)
+                    self._show_added(todo)
+            return
+
+        if "id" in op:
+            todo = self.todos.get(op["id"])
+        else:
+            # Vecie žurnāla ieraksti norāda pozīciju sarakstā
+            todo = self.todos[op["index"]] if op["index"] < len(self.todos) else None
+        if todo is None:
+            return
+
+        if kind == "update":
+            fields = op["fields"]
+            if "completed" in fields:
+                if self.todos.set_completed(todo.id, bool(fields["completed"]), fields.get("completed_at")):
+                    self._show_completed_changed([todo])
+            if "text" in fields:
+                self.todos.set_text(todo.id, fields["text"])
+                self._show_text_changed(todo)
+            if "due" in fields or "remind_at" in fields:
+                self.todos.set_due(todo.id, fields.get("due", todo.due), fields.get("remind_at", todo.remind_at))
+                self._show_due_changed(todo)
+            if "tags" in fields or "priority" in fields:
+                self.todos.set_attributes(todo.id, fields.get("tags", todo.tags), fields.get("priority", todo.priority))
+                self._show_changed(todo)
+        elif kind == "delete":
+            index, _ = self.todos.remove(todo.id)
+            self._show_removed(todo, index)
 
     def save_todos(self):
-        """Saglabā uzdevumus JSON failā"""
-        with open(self.todo_file, "w") as f:
-            json.dump(self.todos, f)
+        """Saglabā visus uzdevumus no jauna (fonā)"""
+        if self.saver is not None:
+            self.saver.request_save(self.todos)
+
+    def record_changes(self, ops):
+        """Nodod izmaiņas fona rakstītājam, nepārrakstot visu failu"""
+        if self._sort_changes is not None:
+            # Kārtojums vēl tiek veidots - šie uzdevumi tajā būs jāpārbauda
+            self._sort_changes.update(op["id"] if "id" in op else op["todo"]["id"] for op in ops)
+        if self._merge_changes is not None:
+            # Citu programmu izmaiņas, kas vēl tiek izpildītas, šos laukus nedrīkst atjaunot
+            touched_fields(ops, self._merge_changes)
+        if self.saver is None:
+            # Saraksts vēl tiek ielādēts - izmaiņas tiks nodotas pēc ielādes
+            self._pending_ops.extend(ops)
+            return
+        self.saver.submit_many(ops)
+        self.saver.maybe_compact(self.todos)
 
     def refresh_todo_list(self):
         """Atjauno uzdevumu sarakstu"""
-        # Notīra visus tagadējos ierakstus
+        # Pilna pārbūve - tiek izmantota tikai sākumā, ikdienas izmaiņām ir _insert_row/_update_row/_remove_row
+        self._rendering = True
         for item in self.todo_tree.get_children():
             self.todo_tree.delete(item)
+        self._rendering = False
 
-        # Pievieno uzdevumus sarakstam
-        completed_count = 0
-        for i, todo in enumerate(self.todos):
-            # Nosaka statusu un atzīmes
-            completed = todo.get("completed", False)
-            if completed:
-                completed_count += 1
-                status = "✓"
-                tags = ('completed',)
-            else:
-                status = "○"
-                tags = ()
+        # Visas rindas tiek veidotas no jauna ar pareizām joslām
+        self._stripes_from = None
 
-            # Pievieno mainīgo fonu katrai otrajai rindai
-            if i % 2 == 1:
-                tags = tags + ('odd_row',)
+        # Lielam sarakstam virtuālais režīms paliek arī tad, kad filtrs rāda tikai daļu
+        self._set_virtual_mode(len(self.todos) > self.VIRTUAL_THRESHOLD)
 
-            self.todo_tree.insert("", "end", iid=str(i), values=(status, todo["text"], ""), tags=tags)
+        if self.virtual_mode:
+            # Lieliem sarakstiem zīmē tikai redzamo logu
+            self._render_window()
+            self.update_count_label()
+            return
+
+        # Pievieno uzdevumus sarakstam - rindas identifikators ir uzdevuma id
+        for i, todo in enumerate(self.rows):
+            self.todo_tree.insert("", "end", iid=todo.id, values=self._row_values(todo), tags=self._row_tags(todo, i))
 
         # Atjauno skaitītāja tekstu
-        total = len(self.todos)
-        self.count_label.config(text=f"{completed_count} pabeigti, {total-completed_count} aktīvi")
+        self.update_count_label()
+
+    def update_count_label(self):
+        """Atjauno skaitītāja tekstu no uzturētajiem skaitītājiem"""
+        # Skaitītāji tiek uzturēti TodoStore pie katras izmaiņas - nekas nav jāpārskaita
+        if self.loading:
+            self.count_label.config(text=f"Ielādē uzdevumus... {len(self.todos)}")
+            return
+        text = f"{self.todos.completed_count} pabeigti, {self.todos.active_count} aktīvi"
+        # Termiņu indekss ir sakārtots, tāpēc abi skaiti ir binārās meklēšanas
+        now = time.time()
+        due_index = self.todos.due_index
+        overdue = due_index.count_until(now)
+        due_today = due_index.count_until(day_end(now)) - overdue
+        if overdue:
+            text += f" · {overdue} nokavēti"
+        if due_today:
+            text += f" · {due_today} šodien"
+        if self.view is not None:
+            text += f" · atrasti {len(self.view)}"
+        if self._sort_task is not None:
+            text += " · kārto..."
+        if self._syncing:
+            text += " · sinhronizē..."
+        elif self._sync_error is not None:
+            text += " · nav sinhronizēts"
+        if self.saver is not None and self.saver.last_error is not None:
+            text += " · nav saglabāts"
+        self.count_label.config(text=text)
+
+    def _row_values(self, todo):
+        """Rindas vērtības vienam uzdevumam"""
+        status = "✓" if todo.completed else "○"
+        completed_at = datetime.fromtimestamp(todo.completed_at).strftime("%d.%m.") if todo.completed_at else ""
+        due = format_short(todo.due) if todo.due is not None else ""
+        if todo.remind_at is not None and not todo.completed:
+            due = (due + " 🔔").strip()
+        text = todo.text
+        if todo.priority:
+            text = f"{self.PRIORITY_MARKS[todo.priority]} {text}"
+        if todo.tags:
+            text = f"{text}  {format_tags(todo.tags)}"
+        return (status, text, due, completed_at)
+
+    def _status_tags(self, todo):
+        """Statusa atzīme - pabeigts vai nokavēts"""
+        if todo.completed:
+            return ('completed',)
+        if todo.due is not None and todo.due <= time.time():
+            return ('overdue',)
+        return ()
+
+    def _row_tags(self, todo, index):
+        """Rindas atzīmes - statuss un mainīgais fons katrai otrajai rindai"""
+        tags = self._status_tags(todo)
+        if index % 2 == 1:
+            tags = tags + ('odd_row',)
+        return tags
+
+    def _insert_row(self, index):
+        """Ievieto vienu rindu sarakstā, nepārbūvējot pārējās"""
+        if not self.virtual_mode and len(self.todos) > self.VIRTUAL_THRESHOLD:
+            # Saraksts ir kļuvis pārāk liels - vienreiz pārslēdzas uz virtuālo režīmu
+            self.refresh_todo_list()
+            return
+        if self.virtual_mode:
+            self._refresh_window_if_affected(index)
+            return
+
+        todo = self.rows[index]
+        self.todo_tree.insert("", index, iid=todo.id, values=self._row_values(todo), tags=self._row_tags(todo, index))
+        # Rindām zem ievietotās mainās paritāte
+        if index < len(self.rows) - 1:
+            self._restripe_from(index + 1)
+
+    def _update_row(self, index):
+        """Atjauno rindas vērtības un atzīmes pēc tās pozīcijas sarakstā"""
+        todo = self.rows[index]
+        if self.todo_tree.exists(todo.id):
+            self.todo_tree.item(todo.id, values=self._row_values(todo), tags=self._row_tags(todo, index))
+
+    def _update_todo_row(self, todo):
+        """Atjauno uzdevuma rindu pēc id - pozīcija nav jāzina, joslas atzīme paliek esošā"""
+        iid = todo.id
+        if not self.todo_tree.exists(iid):
+            return
+        tags = self._status_tags(todo)
+        if 'odd_row' in self.todo_tree.item(iid, "tags"):
+            tags = tags + ('odd_row',)
+        self.todo_tree.item(iid, values=self._row_values(todo), tags=tags)
+
+    def _remove_row(self, index, todo):
+        """Izņem vienu rindu no saraksta"""
+        self._remove_rows(index, [todo])
+
+    def _remove_rows(self, first_index, todos):
+        """Izņem vairākas rindas vienā piegājienā - first_index ir augstākā izņemtā pozīcija"""
+        if self.virtual_mode:
+            for todo in todos:
+                self._selected_ids.discard(todo.id)
+            self._refresh_window_if_affected(first_index)
+            return
+
+        self.todo_tree.delete(*(todo.id for todo in todos))
+        # Rindām zem dzēstajām mainās paritāte
+        if first_index < len(self.rows):
+            self._restripe_from(first_index)
+
+    def _restripe_from(self, start):
+        """Atzīmē, ka no dotās rindas joslas var būt nepareizas - pārkrāso tikai redzamās rindas"""
+        # Rindas zem ekrāna tiek pārkrāsotas, kad tās tiek ieritinātas, tāpēc izmaiņa maksā O(redzamās rindas)
+        if self._stripes_from is None or start < self._stripes_from:
+            self._stripes_from = start
+        self._stripe_visible()
+
+    def _on_tree_view(self, first, last):
+        """Treeview redzamā daļa ir mainījusies - atjauno ritjoslu un pārkrāso jaunās redzamās rindas"""
+        self.scrollbar.set(first, last)
+        if self._stripes_from is not None:
+            self._stripe_visible()
+
+    def _stripe_visible(self):
+        """Salabo joslu atzīmes redzamajām rindām, kas ir zem _stripes_from"""
+        start = self._stripes_from
+        if start is None or self.virtual_mode:
+            return
+        rows = self.rows
+        total = len(rows)
+        if start >= total:
+            self._stripes_from = None
+            return
+        first, last = self.todo_tree.yview()
+        begin = max(start, int(float(first) * total))
+        end = min(total, int(float(last) * total) + 1)
+        tree = self.todo_tree
+        for i in range(begin, end):
+            iid = rows[i].id
+            if ('odd_row' in tree.item(iid, "tags")) != (i % 2 == 1):
+                tree.item(iid, tags=self._row_tags(rows[i], i))
+        if begin == start and end == total:
+            # Ekrānā ir visas atlikušās rindas - pārējās jau ir pareizas
+            self._stripes_from = None
+
+    def _set_virtual_mode(self, enabled):
+        """Pārslēdz ritjoslu starp Treeview un pašu aprēķināto virtuālo ritināšanu"""
+        self.virtual_mode = enabled
+        if enabled:
+            self.todo_tree.configure(yscrollcommand="")
+            self.scrollbar.config(command=self._on_virtual_scroll)
+            self._view_offset = 0
+        else:
+            self.todo_tree.configure(yscrollcommand=self._on_tree_view)
+            self.scrollbar.config(command=self.todo_tree.yview)
+            self._selected_ids = set()
+            self._focus_id = None
+
+    def _visible_row_count(self):
+        """Cik rindas ietilpst sarakstā pašreizējā loga augstumā"""
+        height = self.todo_tree.winfo_height()
+        if height <= 1:
+            # Logs vēl nav uzzīmēts - izmanto aptuvenu vērtību
+            return 15
+        return max(1, (height - self.HEADING_HEIGHT) // self.ROW_HEIGHT)
+
+    def _index_of_id(self, todo_id):
+        """Atrod uzdevuma pozīciju redzamajā sarakstā"""
+        return self.rows.index_of(todo_id)
+
+    def _render_window(self):
+        """Uzzīmē tikai redzamās rindas un nelielu rezervi zem tām"""
+        total = len(self.rows)
+        visible = self._visible_row_count()
+        self._view_offset = max(0, min(self._view_offset, total - visible))
+        end = min(total, self._view_offset + visible + self.VIRTUAL_OVERSCAN)
+
+        self._rendering = True
+        try:
+            for item in self.todo_tree.get_children():
+                self.todo_tree.delete(item)
+            for i in range(self._view_offset, end):
+                todo = self.rows[i]
+                self.todo_tree.insert("", "end", iid=todo.id,
+                                      values=self._row_values(todo), tags=self._row_tags(todo, i))
+            self.todo_tree.yview_moveto(0)
+
+            # Atjauno atlasi redzamajā logā - atlasītie uzdevumi ārpus tā paliek _selected_ids
+            if self._selected_ids:
+                self.todo_tree.selection_set([iid for iid in self.todo_tree.get_children()
+                                              if iid in self._selected_ids])
+            if self._focus_id is not None and self.todo_tree.exists(self._focus_id):
+                self.todo_tree.focus(self._focus_id)
+        finally:
+            self._rendering = False
+
+        self._update_virtual_scrollbar()
+
+    def _update_virtual_scrollbar(self):
+        """Iestata ritjoslas stāvokli pēc redzamā loga pozīcijas datos"""
+        total = len(self.rows)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        visible = self._visible_row_count()
+        self.scrollbar.set(self._view_offset / total, min(1.0, (self._view_offset + visible) / total))
+
+    def _refresh_window_if_affected(self, index):
+        """Pārzīmē logu tikai tad, ja izmaiņa ietekmē redzamās rindas"""
+        window_end = self._view_offset + self._visible_row_count() + self.VIRTUAL_OVERSCAN
+        if index < window_end:
+            self._render_window()
+        else:
+            self._update_virtual_scrollbar()
+
+    def _scroll_to(self, offset):
+        """Pārvieto redzamo logu uz doto uzdevuma indeksu"""
+        total = len(self.rows)
+        offset = max(0, min(int(offset), total - self._visible_row_count()))
+        if offset != self._view_offset:
+            self._view_offset = offset
+            self._render_window()
+
+    def _on_virtual_scroll(self, *args):
+        """Apstrādā ritjoslas komandas virtuālajā režīmā"""
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self._visible_row_count()
+            self._scroll_to(self._view_offset + step)
+
+    def _on_mouse_wheel(self, event):
+        """Peles ritenis virtuālajā režīmā pārvieto datu logu"""
+        if not self.virtual_mode:
+            return None
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self._scroll_to(self._view_offset + step)
+        return "break"
+
+    def _on_virtual_key(self, event):
+        """Taustiņu navigācija virtuālajā režīmā pārvietojas pa visiem datiem, ne tikai pa logu"""
+        if not self.virtual_mode or not self.rows:
+            return None
+        visible = self._visible_row_count()
+        current = self._index_of_id(self._focus_id) if self._focus_id is not None else self._view_offset
+        moves = {
+            "Up": current - 1,
+            "Down": current + 1,
+            "Prior": current - visible,
+            "Next": current + visible,
+            "Home": 0,
+            "End": len(self.rows) - 1,
+        }
+        self.select_index(max(0, min(moves[event.keysym], len(self.rows) - 1)))
+        return "break"
+
+    def _on_tree_click(self, event):
+        """Vienkāršs klikšķis virtuālajā režīmā noņem atlasi arī rindām ārpus redzamā loga"""
+        # 0x1 - Shift, 0x4 - Control
+        if self.virtual_mode and not event.state & 0x5:
+            self._selected_ids.clear()
+
+    def _on_tree_select(self, event):
+        """Atceras atlasītos uzdevumus, lai atlase saglabātos, kad rindas tiek pārzīmētas"""
+        if not self.virtual_mode or self._rendering:
+            return
+        # Redzamajā logā atlase ir tāda, kā Treeview; ārpus loga atlasītie paliek nemainīti
+        self._selected_ids.difference_update(self.todo_tree.get_children())
+        self._selected_ids.update(self.todo_tree.selection())
+        focus = self.todo_tree.focus()
+        if focus:
+            self._focus_id = focus
+
+    def _on_tree_configure(self, event):
+        """Pēc loga izmēra maiņas pārzīmē redzamo logu"""
+        if self.virtual_mode:
+            self._render_window()
+
+    def select_index(self, index):
+        """Atlasa uzdevumu pēc indeksa un parūpējas, lai tas būtu redzams"""
+        if not self.virtual_mode:
+            iid = self.rows[index].id
+            self.todo_tree.selection_set(iid)
+            self.todo_tree.focus(iid)
+            self.todo_tree.see(iid)
+            return
+
+        self._focus_id = self.rows[index].id
+        self._selected_ids = {self._focus_id}
+        visible = self._visible_row_count()
+        if index < self._view_offset:
+            self._view_offset = index
+        elif index >= self._view_offset + visible:
+            self._view_offset = index - visible + 1
+        self._render_window()
+
+    def has_selection(self):
+        """Pārbauda, vai ir atlasīts uzdevums (arī ārpus redzamā loga)"""
+        if self.virtual_mode:
+            return bool(self._selected_ids)
+        return bool(self.todo_tree.selection())
+
+    def selected_ids(self):
+        """Visu atlasīto uzdevumu id (arī ārpus redzamā loga)"""
+        if self.virtual_mode:
+            return list(self._selected_ids)
+        return list(self.todo_tree.selection())
+
+    def select_all(self):
+        """Atlasa visus sarakstā redzamos uzdevumus"""
+        if not self.rows:
+            return
+        if self.virtual_mode:
+            self._selected_ids = {todo.id for todo in self.rows}
+            self._render_window()
+        else:
+            self.todo_tree.selection_set([todo.id for todo in self.rows])
+
+    @property
+    def rows(self):
+        """Uzdevumi, kas pašlaik redzami sarakstā - meklēšanas rezultāti, izvēlētais kārtojums vai viss saraksts"""
+        if self.view is not None:
+            return self.view
+        if self._is_default_order():
+            return self.todos
+        return self._orders[self.sort_key]
+
+    def _is_default_order(self):
+        """Vai saraksts ir pievienošanas secībā bez grupēšanas - tad kārtojums nav vajadzīgs"""
+        return self.sort_key == "seq" and not self.sort_reverse and not self.group_by_status
+
+    def _on_heading_click(self, column):
+        """Statusa galvene pārslēdz grupēšanu, pārējās - augošu, dilstošu un pievienošanas secību"""
+        if column == "Status":
+            self.set_sort(grouped=not self.group_by_status)
+            return
+        key = {"Task": "text", "Due": "due"}.get(column, "completed_at")
+        if self.sort_key != key:
+            self.set_sort(key, reverse=False)
+        elif not self.sort_reverse:
+            self.set_sort(key, reverse=True)
+        else:
+            self.set_sort("seq", reverse=False)
+
+    def set_sort(self, key=None, reverse=None, grouped=None):
+        """Maina kārtojumu - jau izmantots kārtojums ir gatavs, tāpēc tiek pārzīmētas tikai rindas"""
+        if self.loading:
+            return
+        key = self.sort_key if key is None else key
+        reverse = self.sort_reverse if reverse is None else reverse
+        grouped = self.group_by_status if grouped is None else grouped
+        if self._sort_task is not None:
+            self._sort_task.cancel()
+            self._sort_task = None
+            self._sort_changes = None
+
+        if (key != "seq" or reverse or grouped) and key not in self._orders:
+            # Pirmā izvēle - kārtojums tiek veidots pa kadriem, un saraksts tiek pārkārtots, kad tas ir gatavs.
+            # Pēc tam tas tiek uzturēts pa vienam uzdevumam, tāpēc atkārtota izvēle ir tūlītēja.
+            order = TodoOrder((), SORT_KEYS[key])
+            self._sort_changes = set()
+            self._sort_task = self.scheduler.run_sliced(
+                order.build_steps(self.todos), on_done=lambda: self._install_order(key, order, reverse, grouped))
+            self.update_count_label()
+            return
+
+        self.sort_key, self.sort_reverse, self.group_by_status = key, reverse, grouped
+        self._show_sort()
+
+    def _install_order(self, key, order, reverse, grouped):
+        """Jaunais kārtojums ir gatavs - iekļauj tā veidošanas laikā mainītos uzdevumus un parāda to"""
+        for todo_id in self._sort_changes:
+            todo = self.todos.get(todo_id)
+            if todo is None:
+                if todo_id in order:
+                    order.remove(order[order.index_of(todo_id)])
+            elif todo_id in order:
+                order.reposition(todo)
+            else:
+                order.insert(todo)
+        self._sort_task = None
+        self._sort_changes = None
+        self._orders[key] = order
+        self.sort_key, self.sort_reverse, self.group_by_status = key, reverse, grouped
+        self._show_sort()
+        self.update_count_label()
+
+    def _show_sort(self):
+        """Pārzīmē sarakstu pašreizējā kārtojumā"""
+        if not self._is_default_order():
+            order = self._orders[self.sort_key]
+            order.grouped = self.group_by_status
+            order.reverse = self.sort_reverse
+        self._update_headings()
+
+        if self.search_query:
+            # Meklēšanas rezultāti tiek sakārtoti no jauna - to ir tikai daļa no saraksta
+            self.apply_filter(self.search_query)
+            return
+        if self.virtual_mode:
+            self._view_offset = 0
+        else:
+            self.todo_tree.yview_moveto(0)
+        self._reorder_rows()
+
+    def _reorder_rows(self):
+        """Sakārto esošās rindas pēc redzamā saraksta ar vienu izsaukumu - rindas netiek veidotas no jauna"""
+        if self.virtual_mode:
+            self._render_window()
+            return
+        self.todo_tree.set_children("", *(todo.id for todo in self.rows))
+        self._restripe_from(0)
+
+    def _update_headings(self):
+        """Parāda izvēlēto kārtojumu galvenēs"""
+        arrow = " ▼" if self.sort_reverse else " ▲"
+        self.todo_tree.heading("Status", text="○✓" if self.group_by_status else "")
+        self.todo_tree.heading("Task", text="Uzdevums" + (arrow if self.sort_key == "text" else ""))
+        self.todo_tree.heading("Due", text="Termiņš" + (arrow if self.sort_key == "due" else ""))
+        self.todo_tree.heading("Actions", text="Pabeigts" + (arrow if self.sort_key == "completed_at" else ""))
+
+    def _new_view(self, matches):
+        """Meklēšanas skats pašreizējā kārtojumā - matches ir pievienošanas secībā"""
+        if self._is_default_order():
+            return TodoView(matches)
+        return TodoOrder(matches, SORT_KEYS[self.sort_key], self.group_by_status, self.sort_reverse)
+
+    def _reposition(self, todo):
+        """Pārkārto uzdevumu visos kārtojumos pēc teksta vai statusa maiņas - atgriež pārvietojumu redzamajā sarakstā"""
+        rows = self.rows
+        moved = None
+        for order in self._orders.values():
+            result = order.reposition(todo)
+            if order is rows:
+                moved = result
+        if self.view is not None and todo.id in self.view:
+            moved = self.view.reposition(todo)
+        return moved
+
+    def _move_row(self, todo, old_index, new_index):
+        """Pārvieto rindu uz jauno vietu - pārējās rindas paliek, joslas mainās tikai starp abām vietām"""
+        if self.virtual_mode:
+            self._refresh_window_if_affected(min(old_index, new_index))
+            return
+        iid = todo.id
+        if not self.todo_tree.exists(iid):
+            return
+        if old_index == new_index:
+            self._update_row(new_index)
+            return
+
+        selected = iid in self.todo_tree.selection()
+        focused = self.todo_tree.focus() == iid
+        # Atvienojot rindu, jaunā pozīcija ir skaitāma bez tās
+        self.todo_tree.detach(iid)
+        self.todo_tree.move(iid, "", new_index)
+        if selected:
+            self.todo_tree.selection_add(iid)
+        if focused:
+            self.todo_tree.focus(iid)
+
+        low, high = sorted((old_index, new_index))
+        if high - low < self.RESTRIPE_CHUNK:
+            for index in range(low, high + 1):
+                self._update_row(index)
+        else:
+            self._update_row(new_index)
+            self._restripe_from(low)
+
+    def _build_search_index_step(self):
+        """Indeksē nākamo uzdevumu porciju - atgriež False, kad viss ir indeksēts"""
+        start = bisect_seq(self.todos, self._index_next_seq)
+        chunk = self.todos[start:start + self.SEARCH_INDEX_CHUNK]
+        for todo in chunk:
+            self.search_index.add(todo.id, todo.text)
+        if chunk:
+            self._index_next_seq = chunk[-1].seq + 1
+            return True
+        self._index_complete = True
+        self._index_task = None
+        return False
+
+    def _finish_search_index(self):
+        """Pabeidz indeksu uzreiz, ja vaicājums pienāk pirms fona indeksēšanas beigām"""
+        if self._index_task is not None:
+            self._index_task.cancel()
+            self._index_task = None
+        start = bisect_seq(self.todos, self._index_next_seq)
+        for todo in self.todos[start:]:
+            self.search_index.add(todo.id, todo.text)
+        self._index_next_seq = self.todos.next_seq
+        self._index_complete = True
+        return self.search_index
+
+    def _is_indexed(self, todo):
+        """Vai uzdevums jau ir iekļauts meklēšanas indeksā"""
+        return todo.seq < self._index_next_seq
+
+    def _on_search_changed(self):
+        """Filtrē sarakstu pēc katra nospiestā taustiņa"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+
+        query = self.search_var.get().strip()
+        if query == self.SEARCH_PLACEHOLDER:
+            query = ""
+        if query == self.search_query:
+            return
+        if 0 < len(query) < 3:
+            self._search_job = self.root.after(self.SEARCH_DEBOUNCE_MS, lambda: self.apply_filter(query))
+        else:
+            self.apply_filter(query)
+
+    def apply_filter(self, query):
+        """Parāda tikai uzdevumus, kuru tekstā ir vaicājums vai kas atbilst strukturētam vaicājumam"""
+        self._search_job = None
+        self.search_query = query
+        self.search_filter = parse_query(query) if query else None
+        if not query:
+            self.view = None
+        elif self.search_filter is not None:
+            # Birkas, prioritāte un statuss ir bitkaršu operācijas - meklēšanas indekss vajadzīgs tikai tekstam
+            bits = self.search_filter.evaluate(self.todos, self._finish_search_index, time.time())
+            self.view = self._new_view(self.todos.bitmaps.todos(bits))
+        else:
+            ids = self._finish_search_index().search(query)
+            if len(ids) > len(self.todos) // 8:
+                # Daudz rezultātu - lētāk iziet cauri sarakstam, tas jau ir pareizajā secībā
+                matches = [todo for todo in self.todos if todo.id in ids]
+            else:
+                matches = sorted((self.todos.get(todo_id) for todo_id in ids), key=lambda todo: todo.seq)
+            self.view = self._new_view(matches)
+
+        rows = self.rows
+        self._selected_ids = {todo_id for todo_id in self._selected_ids if todo_id in rows}
+        if self._focus_id is not None and self._focus_id not in rows:
+            self._focus_id = None
+        self.refresh_todo_list()
+
+    def _matches_filter(self, todo):
+        """Vai uzdevums atbilst pašreizējam filtram"""
+        if self.search_filter is not None:
+            return self.search_filter.matches(todo, self._finish_search_index, time.time())
+        return self.search_index.matches(todo.id, self.search_query)
+
+    def _show_added(self, todo):
+        """Parāda jaunu uzdevumu, ja tas atbilst filtram"""
+        if self._index_complete:
+            # Indekss ir pabeigts - jaunais uzdevums jāpievieno pašiem
+            self.search_index.add(todo.id, todo.text)
+            self._index_next_seq = todo.seq + 1
+        for order in self._orders.values():
+            order.insert(todo)
+        self._track_deadlines([todo])
+        if self.view is None:
+            self._insert_row(self.rows.index_of(todo.id))
+        elif self._matches_filter(todo):
+            self._insert_row(self.view.insert(todo))
+
+    def _show_added_many(self, todos):
+        """Parāda vairākus jaunus uzdevumus (importu) ar vienu saraksta atjaunošanu"""
+        if self._index_complete:
+            for todo in todos:
+                self.search_index.add(todo.id, todo.text)
+            self._index_next_seq = todos[-1].seq + 1
+        self._show_rows_inserted(todos)
+
+    def _show_inserted_many(self, todos):
+        """Parāda atjaunotus uzdevumus to vietās ar vienu saraksta atjaunošanu - todos sakārtoti pēc seq"""
+        for todo in todos:
+            if self._is_indexed(todo):
+                self.search_index.add(todo.id, todo.text)
+        self._show_rows_inserted(todos)
+
+    def _show_rows_inserted(self, todos):
+        """Ievieto jau sarakstā esošos uzdevumus kārtojumos, filtrā un rindās"""
+        for order in self._orders.values():
+            for todo in todos:
+                order.insert(todo)
+        self._track_deadlines(todos)
+        if self.view is not None:
+            todos = [todo for todo in todos if self._matches_filter(todo)]
+            for todo in todos:
+                self.view.insert(todo)
+        if not todos:
+            return
+
+        rows = self.rows
+        # Augošā secībā - katra rinda nonāk savā galīgajā pozīcijā arī tad, ja kārtojums nav pēc seq
+        placed = sorted(((rows.index_of(todo.id), todo) for todo in todos), key=lambda item: item[0])
+        first = placed[0][0]
+        if not self.virtual_mode and len(self.todos) > self.VIRTUAL_THRESHOLD:
+            self.refresh_todo_list()
+        elif self.virtual_mode:
+            self._refresh_window_if_affected(first)
+        else:
+            for index, todo in placed:
+                self.todo_tree.insert("", index, iid=todo.id, values=self._row_values(todo),
+                                      tags=self._row_tags(todo, index))
+            if first + 1 < len(rows):
+                self._restripe_from(first + 1)
+
+    def _show_text_changed(self, todo):
+        """Atjauno rindu pēc teksta maiņas - ar filtru rinda var parādīties vai pazust"""
+        if self._is_indexed(todo):
+            self.search_index.update(todo.id, todo.text)
+        self._show_changed(todo)
+
+    def _show_changed(self, todo):
+        """Pārvieto uzdevuma rindu pēc izmaiņas - ar filtru rinda var parādīties vai pazust"""
+        if self.view is None:
+            moved = self._reposition(todo)
+            if moved is None:
+                self._update_todo_row(todo)
+            else:
+                self._move_row(todo, *moved)
+            return
+
+        in_view = todo.id in self.view
+        matches = self._matches_filter(todo)
+        if in_view and not matches:
+            # Vispirms no skata - tā pozīcija ir skaitīta pēc vecās vērtības
+            index = self.view.remove(todo)
+            self._reposition(todo)
+            self._remove_row(index, todo)
+        elif matches and not in_view:
+            self._reposition(todo)
+            self._insert_row(self.view.insert(todo))
+        elif in_view:
+            self._move_row(todo, *self._reposition(todo))
+        else:
+            self._reposition(todo)
+
+    def _show_completed_changed(self, todos):
+        """Atjauno rindas pēc statusa maiņas - virtuālajā režīmā pārzīmē logu vienreiz"""
+        if self.search_filter is not None and self.view is not None:
+            # Statuss var būt vaicājuma daļa - uzdevumi var parādīties skatā vai pazust no tā
+            self._refilter(todos)
+            self._track_deadlines(todos)
+            return
+        # Ar daudzām pārvietotām rindām lētāk vienreiz pārkārtot visas
+        many = len(todos) > self.RESTRIPE_CHUNK and not self._is_default_order()
+        for todo in todos:
+            # Katrs pārvietojums tiek parādīts uzreiz, jo nākamās pozīcijas ir skaitītas pēc tā
+            moved = self._reposition(todo)
+            if self.virtual_mode or many:
+                continue
+            if moved is None:
+                self._update_todo_row(todo)
+            else:
+                self._move_row(todo, *moved)
+        if self.virtual_mode:
+            self._render_window()
+        elif many:
+            for todo in todos:
+                self._update_todo_row(todo)
+            self._reorder_rows()
+        # Atsāktiem uzdevumiem atgādinājumi atkal ir spēkā, un termiņu indekss ir mainījies
+        self._track_deadlines(todos)
+
+    def _show_due_changed(self, todo):
+        """Atjauno rindu pēc termiņa vai atgādinājuma maiņas un pārplāno taimeri"""
+        if todo.remind_at is None:
+            self.deadlines.cancel(("remind", todo.id))
+        self._track_deadlines([todo])
+        self._show_changed(todo)
+
+    def _refilter(self, todos):
+        """Pārbauda vairāku mainītu uzdevumu atbilstību strukturētam vaicājumam"""
+        if len(todos) <= self.RESTRIPE_CHUNK:
+            for todo in todos:
+                self._show_changed(todo)
+            return
+        # Daudz uzdevumu - skats tiek salabots bez rindām, un saraksts tiek uzzīmēts vienreiz
+        for todo in todos:
+            if todo.id in self.view:
+                self.view.remove(todo)
+            self._reposition(todo)
+            if self._matches_filter(todo):
+                self.view.insert(todo)
+        self.refresh_todo_list()
+
+    def _show_removed_many(self, first_index, todos):
+        """Izņem vairāku dzēstu uzdevumu rindas ar vienu saraksta atjaunošanu"""
+        for todo in todos:
+            if self._is_indexed(todo):
+                self.search_index.remove(todo.id)
+        rows = self.rows
+        for order in self._orders.values():
+            first = order.remove_many(todos)
+            if order is rows:
+                first_index = first
+        if self.view is not None:
+            todos = [todo for todo in todos if todo.id in self.view]
+            first_index = self.view.remove_many(todos)
+        if todos:
+            self._remove_rows(first_index, todos)
+
+    def _show_removed(self, todo, index):
+        """Izņem dzēsta uzdevuma rindu - index ir pozīcija visā sarakstā"""
+        if self._is_indexed(todo):
+            self.search_index.remove(todo.id)
+        rows = self.rows
+        for order in self._orders.values():
+            position = order.remove(todo)
+            if order is rows:
+                index = position
+        if self.view is None:
+            self._remove_row(index, todo)
+        elif todo.id in self.view:
+            self._remove_row(self.view.remove(todo), todo)
+
+    def undo(self):
+        """Atsauc pēdējo darbību (Ctrl+Z)"""
+        self._show_change(self.core.undo())
+
+    def redo(self):
+        """Atkārto atsaukto darbību (Ctrl+Y)"""
+        self._show_change(self.core.redo())
+
+    def _show_change(self, change):
+        """Atjauno tikai tās rindas, ko skāra atsaukšana vai atkārtošana"""
+        if change is None:
+            return
+        kind = change[0]
+        if kind == "inserted":
+            self._show_inserted_many(change[1])
+        elif kind == "removed":
+            self._show_removed_many(change[1], change[2])
+        elif kind == "toggled":
+            self._show_completed_changed(change[1])
+        elif kind == "updated":
+            self._show_fields_changed(change[1], change[2])
+        self.update_count_label()
+
+    def _show_fields_changed(self, todo, fields):
+        """Atjauno uzdevuma rindu pēc mainītajiem laukiem"""
+        if "text" in fields:
+            self._show_text_changed(todo)
+        if "due" in fields or "remind_at" in fields:
+            self._show_due_changed(todo)
+        if "tags" in fields or "priority" in fields:
+            self._show_changed(todo)
 
     def add_todo(self):
         """Pievieno jaunu uzdevumu"""
@@ -393,9 +2199,9 @@ class TodoApp:
             return
 
         if todo_text:
-            self.todos.append({"text": todo_text, "completed": False})
-            self.save_todos()
-            self.refresh_todo_list()
+            todo = self.core.add(todo_text)
+            self._show_added(todo)
+            self.update_count_label()
             self.todo_entry.delete(0, tk.END)
 
             # Atjauno fokusu uz ievades lauku, lai varētu ātri pievienot vairākus
@@ -403,247 +2209,670 @@ class TodoApp:
         else:
             messagebox.showwarning("Brīdinājums", "Uzdevums nevar būt tukšs!")
 
-    def get_selected_todo_index(self):
-        """Iegūst atlasītā uzdevuma indeksu"""
-        selection = self.todo_tree.selection()
+    def get_selected_todo(self):
+        """Iegūst atlasīto uzdevumu no id indeksa - ja atlasīti vairāki, to, kuram ir fokuss"""
+        if self.virtual_mode:
+            selection = self._selected_ids
+            focus = self._focus_id
+        else:
+            selection = self.todo_tree.selection()
+            focus = self.todo_tree.focus()
+
         if not selection:
             messagebox.showwarning("Brīdinājums", "Lūdzu, atlasiet uzdevumu!")
             return None
-        return int(selection[0])
+        return self.todos.get(focus if focus in selection else next(iter(selection)))
 
     def toggle_complete(self):
-        """Pārslēdz uzdevuma pabeigšanas statusu"""
-        index = self.get_selected_todo_index()
-        if index is not None:
-            self.todos[index]["completed"] = not self.todos[index].get("completed", False)
-            self.save_todos()
-            self.refresh_todo_list()
+        """Pārslēdz atlasīto uzdevumu statusu - ja kāds nav pabeigts, pabeidz visus, citādi atsāk visus"""
+        todo_ids = self.selected_ids()
+        if not todo_ids:
+            messagebox.showwarning("Brīdinājums", "Lūdzu, atlasiet uzdevumu!")
+            return
+        completed = not all(self.todos.get(todo_id).completed for todo_id in todo_ids)
+        changed = self.core.set_completed_many(todo_ids, completed)
+        self._show_completed_changed(changed)
+        self.update_count_label()
 
     def edit_todo(self):
         """Rediģē atlasīto uzdevumu"""
-        index = self.get_selected_todo_index()
-        if index is not None:
-            # Izveido dialoglogu rediģēšanai
-            edit_window = tk.Toplevel(self.root)
-            edit_window.title("Rediģēt uzdevumu")
-            edit_window.geometry("450x150")
-            edit_window.configure(bg=self.ui.LIGHT)
-            edit_window.resizable(False, False)
-
-            # Pievieno aizpildījuma konteineru
-            edit_container = tk.Frame(edit_window, bg=self.ui.LIGHT, padx=20, pady=20)
-            edit_container.pack(fill=tk.BOTH, expand=True)
-
-            # Pievieno rediģēšanas logrīkus
-            tk.Label(
-                edit_container,
-                text="Rediģēt uzdevumu",
-                bg=self.ui.LIGHT,
-                fg=self.ui.DARK,
-                font=(self.ui.FONT_FAMILY, 14, "bold")
-            ).pack(anchor="w", pady=(0, 10))
-
-            # Izveido stilizētu ievades lauku ar apmali
-            input_frame = tk.Frame(
-                edit_container,
-                bg=self.ui.WHITE,
-                highlightbackground=self.ui.GRAY,
-                highlightthickness=1,
-                bd=0
-            )
-            input_frame.pack(fill=tk.X, pady=(0, 15))
-
-            edit_entry = tk.Entry(
-                input_frame,
-                font=(self.ui.FONT_FAMILY, 12),
-                bd=0,
-                highlightthickness=0,
-                bg=self.ui.WHITE
-            )
-            edit_entry.pack(fill=tk.X, ipady=10, padx=10)
-            edit_entry.insert(0, self.todos[index]["text"])
-            edit_entry.select_range(0, tk.END)
-
-            # Pogu konteiners
-            button_frame = tk.Frame(edit_container, bg=self.ui.LIGHT)
-            button_frame.pack(fill=tk.X)
-
-            def save_edit():
-                new_text = edit_entry.get().strip()
-                if new_text:
-                    self.todos[index]["text"] = new_text
-                    self.save_todos()
-                    self.refresh_todo_list()
-                    edit_window.destroy()
-                else:
-                    messagebox.showwarning("Brīdinājums", "Uzdevums nevar būt tukšs!")
-
-            # Atcelšanas poga
-            cancel_button = tk.Button(
-                button_frame,
-                text="Atcelt",
-                command=edit_window.destroy,
-                bg=self.ui.LIGHT,
-                fg=self.ui.DARK,
-                font=(self.ui.FONT_FAMILY, 10),
-                relief=self.ui.BTN_RELIEF,
-                padx=self.ui.BTN_PADDING_X,
-                pady=self.ui.BTN_PADDING_Y,
-                cursor="hand2"
-            )
-            cancel_button.pack(side=tk.LEFT, padx=(0, 10))
-
-            # Saglabāšanas poga
-            save_button = tk.Button(
-                button_frame,
-                text="Saglabāt",
-                command=save_edit,
-                bg=self.ui.PRIMARY,
-                fg=self.ui.WHITE,
-                font=(self.ui.FONT_FAMILY, 10, "bold"),
-                relief=self.ui.BTN_RELIEF,
-                padx=self.ui.BTN_PADDING_X,
-                pady=self.ui.BTN_PADDING_Y,
-                cursor="hand2"
-            )
-            save_button.pack(side=tk.LEFT)
-
-            # Pievieno pogu efektus
-            self.setup_button_hover(cancel_button)
-            self.setup_button_hover(save_button)
-
-            # Enter taustiņš, lai saglabātu
-            edit_entry.bind("<Return>", lambda event: save_edit())
+        todo = self.get_selected_todo()
+        if todo is not None:
+            self.dialog(EditDialog).show(todo)
 
-            # Padara dialoglogu modālu PĒC tā izveidošanas
-            edit_window.update()  # Atjauno logu
+    def dialog(self, kind):
+        """Vienreiz izveidots dialogs - pēc tam tas tiek tikai parādīts un paslēpts"""
+        dialog = self.dialogs.get(kind)
+        if dialog is None:
+            dialog = self.dialogs[kind] = kind(self)
+        return dialog
 
-            # Padara logu atkarīgu no galvenā loga
-            edit_window.transient(self.root)
+    def make_modal(self, window):
+        """Padara dialogu modālu - saķere tiek iestatīta katru reizi, kad logs parādās uz ekrāna"""
+        # Logu atkarīgu no galvenā loga
+        window.transient(self.root)
 
-            # Iestata saķeršanu tikai pēc loga atjaunošanas
-            edit_window.focus_set()  # Iestata fokusu uz logu
-            edit_window.grab_set()   # Padara to modālu
+        # grab_set() izdodas tikai redzamam logam, tāpēc gaida <Map> notikumu, nevis izsauc update()
+        def on_map(event):
+            if event.widget is window:
+                window.grab_set()
 
-            # Centrē dialoglogu
-            edit_window.update_idletasks()
-            width = edit_window.winfo_width()
-            height = edit_window.winfo_height()
-            x = (self.root.winfo_width() // 2) - (width // 2) + self.root.winfo_x()
-            y = (self.root.winfo_height() // 2) - (height // 2) + self.root.winfo_y()
-            edit_window.geometry(f"{width}x{height}+{x}+{y}")
-
-            # Iestata fokusu uz ievades lauku
-            edit_entry.focus_set()
+        window.bind("<Map>", on_map)
 
     def delete_todo(self):
-        """Dzēš atlasīto uzdevumu"""
-        index = self.get_selected_todo_index()
-        if index is not None:
-            # Izveido apstiprinājuma dialoglogu
-            confirm_window = tk.Toplevel(self.root)
-            confirm_window.title("Apstiprināt dzēšanu")
-            confirm_window.geometry("400x150")
-            confirm_window.configure(bg=self.ui.LIGHT)
-            confirm_window.resizable(False, False)
-
-            # Pievieno aizpildījuma konteineru
-            confirm_container = tk.Frame(confirm_window, bg=self.ui.LIGHT, padx=20, pady=20)
-            confirm_container.pack(fill=tk.BOTH, expand=True)
-
-            # Brīdinājuma ikona un ziņojums
-            message_frame = tk.Frame(confirm_container, bg=self.ui.LIGHT)
-            message_frame.pack(fill=tk.X, pady=(0, 15))
-
-            warning_icon = tk.Label(
-                message_frame,
-                text="⚠️",
-                font=(self.ui.FONT_FAMILY, 24),
-                bg=self.ui.LIGHT,
-                fg=self.ui.DANGER
-            )
-            warning_icon.pack(side=tk.LEFT, padx=(0, 15))
-
-            message_text = tk.Label(
-                message_frame,
-                text="Vai tiešām vēlaties dzēst šo uzdevumu?",
-                font=(self.ui.FONT_FAMILY, 12),
-                bg=self.ui.LIGHT,
-                fg=self.ui.DARK,
-                wraplength=280,
-                justify=tk.LEFT
-            )
-            message_text.pack(side=tk.LEFT, fill=tk.BOTH)
-
-            # Pogu konteiners
-            button_frame = tk.Frame(confirm_container, bg=self.ui.LIGHT)
-            button_frame.pack(fill=tk.X)
+        """Dzēš atlasītos uzdevumus"""
+        todo_ids = self.selected_ids()
+        if not todo_ids:
+            messagebox.showwarning("Brīdinājums", "Lūdzu, atlasiet uzdevumu!")
+            return
+        if len(todo_ids) == 1:
+            message = "Vai tiešām vēlaties dzēst šo uzdevumu?"
+        else:
+            message = f"Vai tiešām vēlaties dzēst {len(todo_ids)} atlasītos uzdevumus?"
+        self.confirm_delete(message, todo_ids)
 
-            # Atcelšanas poga
-            cancel_button = tk.Button(
-                button_frame,
-                text="Atcelt",
-                command=confirm_window.destroy,
-                bg=self.ui.LIGHT,
-                fg=self.ui.DARK,
-                font=(self.ui.FONT_FAMILY, 10),
-                relief=self.ui.BTN_RELIEF,
-                padx=self.ui.BTN_PADDING_X,
-                pady=self.ui.BTN_PADDING_Y,
-                cursor="hand2"
-            )
-            cancel_button.pack(side=tk.RIGHT, padx=(10, 0))
-
-            # Dzēšanas poga
-            def confirm_delete():
-                del self.todos[index]
-                self.save_todos()
-                self.refresh_todo_list()
-                confirm_window.destroy()
-
-            delete_button = tk.Button(
-                button_frame,
-                text="Dzēst",
-                command=confirm_delete,
-                bg=self.ui.DANGER,
-                fg=self.ui.WHITE,
-                font=(self.ui.FONT_FAMILY, 10, "bold"),
-                relief=self.ui.BTN_RELIEF,
-                padx=self.ui.BTN_PADDING_X,
-                pady=self.ui.BTN_PADDING_Y,
-                cursor="hand2"
-            )
-            delete_button.pack(side=tk.RIGHT)
+    def clear_completed(self):
+        """Dzēš visus pabeigtos uzdevumus"""
+        if not self.todos.completed_count:
+            messagebox.showinfo("Informācija", "Nav pabeigtu uzdevumu.")
+            return
+        todo_ids = [todo.id for todo in self.todos if todo.completed]
+        self.confirm_delete(f"Vai tiešām vēlaties dzēst visus {len(todo_ids)} pabeigtos uzdevumus?", todo_ids)
+
+    def delete_todos(self, todo_ids):
+        """Dzēš uzdevumus ar vienu saglabāšanu un vienu saraksta atjaunošanu"""
+        first_index, removed = self.core.delete_many(todo_ids)
+        self._show_removed_many(first_index, removed)
+        self.update_count_label()
+
+    def prepare_dialogs(self):
+        """Izveido rediģēšanas un dzēšanas dialogus paslēptus"""
+        for kind in (EditDialog, ConfirmDialog):
+            self.dialog(kind)
+
+    def confirm_delete(self, message, todo_ids):
+        """Parāda dzēšanas apstiprinājuma dialogu"""
+        self.dialog(ConfirmDialog).show(message, todo_ids)
+
+    def import_file(self):
+        """Izvēlas failu un importē no tā uzdevumus"""
+        if self._transfer_busy():
+            return
+        path = filedialog.askopenfilename(
+            parent=self.root, title="Importēt uzdevumus",
+            filetypes=[("Visi atbalstītie", " ".join(pattern for _, pattern in todo_io.FILE_TYPES)),
+                       *todo_io.FILE_TYPES])
+        if path:
+            self.start_import(path)
+
+    def export_file(self):
+        """Izvēlas failu un saglabā tajā visu sarakstu"""
+        if self._transfer_busy():
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="Eksportēt uzdevumus", defaultextension=".csv",
+            filetypes=list(todo_io.FILE_TYPES))
+        if path:
+            self.start_export(path)
+
+    def _transfer_busy(self):
+        """Vai imports vai eksports vēl nav iespējams - paziņo lietotājam"""
+        if self.loading or self._cancel_transfer is not None:
+            messagebox.showinfo("Uzgaidiet", "Saraksts vēl tiek ielādēts, importēts vai eksportēts.")
+            return True
+        return False
+
+    def start_import(self, path):
+        """Importē failu pa porcijām Tk pavedienā - katra porcija tiek saglabāta un parādīta uzreiz"""
+        try:
+            source = todo_io.TaskSource(path)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Kļūda", f"Neizdevās atvērt failu: {error}")
+            return
+        steps = self._import_steps(source)
+        task = self.scheduler.run_sliced(steps, on_done=lambda: self._finish_transfer(cancel))
+
+        def cancel():
+            task.cancel()
+            # Aizverot ģeneratoru, jau importētais kļūst par vienu atsaucamu soli
+            steps.close()
+        self._begin_transfer(cancel)
+
+    def _import_steps(self, source):
+        """Importa soļi - katrā viena porcija no faila"""
+        steps = self.core.import_steps(source, self.IMPORT_ROWS_PER_STEP)
+        count = 0
+        try:
+            for todos in steps:
+                self._show_added_many(todos)
+                count += len(todos)
+                if source.fraction is not None:
+                    self.load_progress["value"] = source.fraction
+                self.update_count_label()
+                yield
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Kļūda", f"Imports pārtraukts: {error}\nImportēti {count} uzdevumi.")
+        finally:
+            steps.close()
+            source.close()
+
+    def start_export(self, path):
+        """Eksportē sarakstu fona pavedienā - tas raksta saraksta kopiju, tāpēc var turpināt strādāt"""
+        todos = list(self.todos)
+        cancelled = threading.Event()
+
+        def work():
+            steps = todo_io.export_steps(path, todos)
+            try:
+                for count in steps:
+                    if cancelled.is_set():
+                        return None
+                    self.scheduler.call_soon(self._on_export_progress, count / max(1, len(todos)))
+            finally:
+                steps.close()
+            return len(todos)
+
+        def on_error(error):
+            self._finish_transfer(cancel)
+            messagebox.showerror("Kļūda", f"Neizdevās eksportēt: {error}")
+
+        cancel = cancelled.set
+        self.scheduler.submit(work, on_done=lambda count: self._finish_transfer(cancel), on_error=on_error)
+        self._begin_transfer(cancel)
+
+    def _on_export_progress(self, fraction):
+        if self._cancel_transfer is not None:
+            self.load_progress["value"] = fraction
+
+    def _begin_transfer(self, cancel):
+        """Parāda progresu un atcelšanas pogu"""
+        self._cancel_transfer = cancel
+        self.load_progress["value"] = 0
+        self.load_progress.pack(side=tk.LEFT, padx=10)
+        self.cancel_button.pack(side=tk.LEFT)
+
+    def _finish_transfer(self, cancel):
+        """Paslēpj progresu pēc importa vai eksporta beigām - ja tas jau nav atcelts"""
+        if self._cancel_transfer is not cancel:
+            return
+        self._cancel_transfer = None
+        self.load_progress.pack_forget()
+        self.cancel_button.pack_forget()
+        self.update_count_label()
+
+    def cancel_transfer(self):
+        """Pārtrauc importu (jau importētais paliek) vai eksportu (fails netiek izveidots)"""
+        cancel = self._cancel_transfer
+        if cancel is not None:
+            cancel()
+            self._finish_transfer(cancel)
+
+    def check_archive(self):
+        """Fona pavedienā izvēlas arhivējamos uzdevumus - pārvietošana notiek Tk pavedienā"""
+        if self._archive_job is not None:
+            self.root.after_cancel(self._archive_job)
+        self._archive_job = self.root.after(self.ARCHIVE_CHECK_MS, self.check_archive)
+        if self.archive_days <= 0 and self.archive_keep <= 0:
+            return
+        self.scheduler.submit(select_for_archive, list(self.todos), time.time(), self.archive_days,
+                              self.archive_keep, on_done=self._archive_selected)
+
+    def _archive_selected(self, todo_ids):
+        """Pārvieto izvēlētos uzdevumus uz arhīvu (kopš izvēles atsākti vai dzēsti tiek izlaisti)"""
+        first_index, removed = self.core.archive_completed(todo_ids)
+        if removed:
+            self._show_removed_many(first_index, removed)
+            self.update_count_label()
+            if self.archive_window is not None:
+                self.archive_window.add(removed)
+
+    def show_archive(self):
+        """Atver arhīva logu"""
+        if self.archive_window is not None:
+            self.archive_window.window.lift()
+            return
+        self.archive_window = ArchiveWindow(self)
+
+    def restore_archived(self, dicts):
+        """Atgriež uzdevumus no arhīva saraksta beigās"""
+        self._show_added_many(self.core.restore_archived(dicts))
+        self.update_count_label()
+
+    def check_external(self):
+        """Pārbauda, vai sarakstu nav mainījusi cita programma - ja nav, tas ir tikai os.stat"""
+        if self._watch_job is not None:
+            self.root.after_cancel(self._watch_job)
+            self._watch_job = None
+        self.check_saved()
+        if self.watch_ms <= 0:
+            return
+        self._watch_job = self.root.after(self.watch_ms, self.check_external)
+        if self.saver is None or self._merge_changes is not None or not self.storage.changed():
+            return
+        # Izmaiņas, ko šī programma veiks, kamēr svešās tiek nolasītas un izpildītas
+        self._merge_changes = {}
+        storage = self.storage
+        self.scheduler.submit(self._read_external, self.saver, storage,
+                              on_done=lambda result: self._on_external(storage, result),
+                              on_error=lambda error: self._finish_external(storage, None))
+
+    def check_saved(self):
+        """Brīdina, ja fona rakstīšana neizdodas - fona rakstītājs to atkārto, līdz izdodas"""
+        error = self.saver.last_error if self.saver is not None else None
+        if (error is None) == (self._save_error is None):
+            return
+        self._save_error = error
+        self.update_count_label()
+        if error is not None:
+            messagebox.showerror("Kļūda", f"Neizdevās saglabāt izmaiņas: {error}\n"
+                                          "Saglabāšana tiks mēģināta vēlreiz, līdz tā izdodas.")
+
+    @staticmethod
+    def _read_external(saver, storage):
+        """Fona pavediens - vispirms uzraksta savas izmaiņas, tad nolasa citu programmu izmaiņas"""
+        saver.flush()
+        return storage.read_changes()
+
+    def _on_external(self, storage, result):
+        """Izpilda citu programmu izmaiņas pa daļām, atjaunojot tikai skartās rindas"""
+        if storage is not self.storage:
+            # Saraksts pa to laiku tika nomainīts
+            return
+        kind, payload, received = result
+        steps = self._merge_ops(payload) if kind == "ops" else self._merge_todos(payload)
+        self._merge_task = self.scheduler.run_sliced(steps, on_done=lambda: self._finish_external(storage, received))
+
+    def _merge_ops(self, ops):
+        """Izpilda citas programmas izmaiņu ierakstus"""
+        for start in range(0, len(ops), self.MERGE_ROWS_PER_STEP):
+            for op in supersede(ops[start:start + self.MERGE_ROWS_PER_STEP], self._merge_changes):
+                self._apply_external(op)
+            self.update_count_label()
+            yield
+
+    def _merge_todos(self, dicts):
+        """Salīdzina visu no faila nolasīto sarakstu ar atmiņā esošo un izpilda tikai atšķirības"""
+        changes = self._merge_changes
+        keep = set()
+        # No beigām - jauns uzdevums tiek ievietots pirms nākamā jau esošā, tāpat kā atjaunojot dzēstu
+        next_id = None
+        for count, data in enumerate(reversed(dicts), 1):
+            todo_id = data["id"]
+            keep.add(todo_id)
+            if todo_id not in changes:
+                todo = self.todos.get(todo_id)
+                if todo is None:
+                    self._apply_external({"op": "add", "todo": data, "before": next_id})
+                else:
+                    op = diff_op(todo.to_dict(), data)
+                    if op is not None:
+                        for op in supersede([op], changes):
+                            self._apply_external(op)
+            if todo_id in self.todos:
+                next_id = todo_id
+            if count % self.MERGE_ROWS_PER_STEP == 0:
+                yield
+
+        removed = [todo.id for todo in self.todos if todo.id not in keep and todo.id not in changes]
+        for count, todo_id in enumerate(removed, 1):
+            self._apply_external({"op": "delete", "id": todo_id})
+            if count % self.MERGE_ROWS_PER_STEP == 0:
+                yield
+        self.update_count_label()
+
+    def _apply_external(self, op):
+        """Izpilda vienu citas programmas izmaiņu"""
+        if self._sort_changes is not None:
+            # Kārtojums vēl tiek veidots - šis uzdevums tajā būs jāpārbauda
+            self._sort_changes.add(op["id"] if "id" in op else op["todo"]["id"])
+        self.apply_store_op(op)
+
+    def _finish_external(self, storage, received):
+        """Citu programmu izmaiņas ir izpildītas - nākamā pārbaude var sākties"""
+        if storage is not self.storage:
+            return
+        if received is not None:
+            storage.merged = received
+        self._merge_changes = None
+        self._merge_task = None
+
+    def sync_now(self, manual=False):
+        """Sinhronizē atvērto sarakstu ar serveri - tīkls un disks fonā, saraksts tiek mainīts pa daļām"""
+        if self._sync_job is not None:
+            self.root.after_cancel(self._sync_job)
+            self._sync_job = None
+        if self.sync is None:
+            return
+        if self.sync_ms > 0:
+            self._sync_job = self.root.after(self.sync_ms, self.sync_now)
+        if self.saver is None or self._syncing:
+            return
+        self._syncing = True
+        self.update_count_label()
+        sync = self.sync
+        self.scheduler.submit(sync.take, on_done=lambda taken: self._sync_collect(sync, taken, manual),
+                              on_error=lambda error: self._sync_failed(sync, error, manual))
+
+    def _sync_collect(self, sync, taken, manual):
+        """Sagatavo mainīto uzdevumu ierakstus pa daļām un nosūta tos fonā"""
+        if sync is not self.sync:
+            return
+        items = sync.outgoing(self.todos, taken)
+        records = []
 
-            # Pievieno pogu efektus
-            self.setup_button_hover(cancel_button)
-            self.setup_button_hover(delete_button)
+        def steps():
+            for start in range(0, len(items), self.SYNC_ROWS_PER_STEP):
+                records.extend(sync.records(self.todos, items[start:start + self.SYNC_ROWS_PER_STEP]))
+                yield
 
-            # Padara dialoglogu modālu PĒC tā izveidošanas
-            confirm_window.update()  # Atjauno logu
+        def send():
+            self._sync_task = None
+            self.scheduler.submit(sync.exchange, records, taken,
+                                  on_done=lambda result: self._on_synced(sync, result),
+                                  on_error=lambda error: self._sync_failed(sync, error, manual))
 
-            # Padara logu atkarīgu no galvenā loga
-            confirm_window.transient(self.root)
+        self._sync_task = self.scheduler.run_sliced(steps(), on_done=send)
 
-            # Iestata saķeršanu tikai pēc loga atjaunošanas
-            confirm_window.focus_set()  # Iestata fokusu uz logu
-            confirm_window.grab_set()   # Padara to modālu
+    def _on_synced(self, sync, result):
+        """Izpilda no servera saņemtās izmaiņas pa daļām, atjaunojot tikai skartās rindas"""
+        if sync is not self.sync:
+            return
+        received, cursor, pending = result
+
+        def steps():
+            for start in range(0, len(received), self.SYNC_ROWS_PER_STEP):
+                # Uzdevumi, kas mainīti pa to laiku, tiek izlaisti katrā solī no jauna
+                ops = sync.remote_ops(self.todos, received[start:start + self.SYNC_ROWS_PER_STEP], pending)
+                for op in ops:
+                    self._apply_external(op)
+                if ops:
+                    self.record_changes(ops)
+                    self.update_count_label()
+                yield
+
+        def commit():
+            self._sync_task = None
+            # Kursors tiek saglabāts tikai pēc tam, kad saņemtās izmaiņas ir uzrakstītas
+            self.scheduler.submit(self._commit_sync, self.saver, sync, cursor,
+                                  on_done=lambda result: self._finish_sync(sync, None),
+                                  on_error=lambda error: self._sync_failed(sync, error, False))
+
+        self._sync_task = self.scheduler.run_sliced(steps(), on_done=commit)
+
+    @staticmethod
+    def _commit_sync(saver, sync, cursor):
+        """Fona pavediens - sagaida saņemto izmaiņu rakstīšanu un saglabā kursoru"""
+        saver.flush()
+        sync.commit(cursor)
+
+    def _sync_failed(self, sync, error, manual):
+        """Sinhronizācija neizdevās - nākamais mēģinājums pēc sync_ms, nenosūtītais paliek žurnālā"""
+        if sync is not self.sync:
+            return
+        self._finish_sync(sync, error)
+        if manual:
+            messagebox.showerror("Kļūda", f"Neizdevās sinhronizēt: {error}")
 
-            # Centrē dialoglogu
-            confirm_window.update_idletasks()
-            width = confirm_window.winfo_width()
-            height = confirm_window.winfo_height()
-            x = (self.root.winfo_width() // 2) - (width // 2) + self.root.winfo_x()
-            y = (self.root.winfo_height() // 2) - (height // 2) + self.root.winfo_y()
-            confirm_window.geometry(f"{width}x{height}+{x}+{y}")
+    def _finish_sync(self, sync, error):
+        if sync is not self.sync:
+            return
+        self._syncing = False
+        self._sync_error = error
+        self.update_count_label()
+
+    def _track_deadlines(self, todos):
+        """Ieplāno uzdevumu atgādinājumus un pārbīda termiņa taimeri, ja tuvākais termiņš ir mainījies"""
+        self.deadlines.schedule_many(
+            (("remind", todo.id), todo.remind_at) for todo in todos if todo.remind_at is not None and not todo.completed)
+        # Ielādes laikā termiņu indekss netiek kārtots pēc katras porcijas - taimeris tiek uzstādīts ielādes beigās
+        if not self.loading:
+            self._arm_due()
+
+    def _arm_due(self):
+        """Taimeris uz tuvāko termiņu, kas vēl nav pienācis - tad uzdevums kļūst nokavēts"""
+        when = self.todos.due_index.next_after(self._due_checked)
+        if when is None:
+            self.deadlines.cancel(self.DUE_KEY)
+        elif self.deadlines.scheduled(self.DUE_KEY) != when:
+            self.deadlines.schedule(self.DUE_KEY, when)
+
+    def _on_deadlines(self, keys):
+        """Taimeris ir nostrādājis - parāda atgādinājumus un pārkrāso uzdevumus, kuru termiņš ir pagājis"""
+        now = time.time()
+        reminded = []
+        for kind, todo_id in keys:
+            if kind == "remind":
+                todo = self.todos.get(todo_id)
+                # Kopš ieplānošanas uzdevums var būt pabeigts, dzēsts vai atgādinājums pārcelts
+                if todo is not None and not todo.completed and todo.remind_at is not None and todo.remind_at <= now:
+                    reminded.append(todo)
+            elif kind == "day":
+                self.deadlines.schedule(self.DAY_KEY, day_end(now))
+                self.date_label.config(text=datetime.now().strftime("%B %d, %Y"))
+
+        # Tikai uzdevumi, kuru termiņš pagājis kopš pēdējās reizes - pārējās rindas nemainās
+        passed = self.todos.due_index.between(self._due_checked, now)
+        self._due_checked = now
+        if self.view is not None and self.search_filter is not None and self.search_filter.uses_time:
+            # Vaicājumā ir "nokavēti" - šie uzdevumi tagad tam atbilst
+            self._refilter(passed)
+        else:
+            for todo in passed:
+                self._update_todo_row(todo)
+        self._arm_due()
+
+        for todo in reminded:
+            # Parādīts atgādinājums tiek noņemts, lai tas neatkārtotos pēc nākamās ielādes
+            self.core.clear_reminder(todo.id)
+            self._update_todo_row(todo)
+        if reminded:
+            self.notify(reminded)
+        self.update_count_label()
+
+    def notify(self, todos):
+        """Parāda atgādinājumus paziņojumu joslā"""
+        self.notifications.extend(todo.id for todo in todos)
+        self.root.bell()
+        self._show_notification()
+
+    def _show_notification(self):
+        """Parāda pirmo neaizvērto paziņojumu vai paslēpj joslu"""
+        while self.notifications and self.notifications[0] not in self.todos:
+            self.notifications.popleft()
+        if not self.notifications:
+            self.notify_frame.pack_forget()
+            return
+        todo = self.todos.get(self.notifications[0])
+        text = f"🔔 {todo.text}"
+        if todo.due is not None:
+            text += f"  (termiņš {format_short(todo.due)})"
+        if len(self.notifications) > 1:
+            text += f"  +{len(self.notifications) - 1}"
+        self.notify_label.config(text=text)
+        self.notify_frame.pack(fill=tk.X, pady=(0, 15), after=self.header_frame)
+
+    def dismiss_notification(self):
+        """Aizver redzamo paziņojumu un parāda nākamo"""
+        if self.notifications:
+            self.notifications.popleft()
+        self._show_notification()
+
+    def show_notified_todo(self):
+        """Atlasa paziņojuma uzdevumu sarakstā un aizver paziņojumu"""
+        if not self.notifications:
+            return
+        todo_id = self.notifications[0]
+        if todo_id in self.rows:
+            self.select_index(self.rows.index_of(todo_id))
+        self.dismiss_notification()
+
+    def _update_list_button(self):
+        """Parāda atvērtā saraksta nosaukumu"""
+        name = self.lists.current.name
+        self.list_button.config(text=f"{name} ▾")
+        self.list_var.set(self.lists.current_id)
+        self.root.title(f"Todo App - {name}")
+
+    def _record_counts(self):
+        """Ieraksta atvērtā saraksta skaitus manifestā (atmiņā)"""
+        if not self.loading and self._load_error is None:
+            self.lists.set_counts(self.lists.current_id, self.todos.completed_count, self.todos.active_count)
+
+    def _build_list_menu(self):
+        """Sarakstu izvēlne - katram sarakstam pēdējie zināmie skaiti"""
+        self._record_counts()
+        self.list_menu.delete(0, tk.END)
+        for entry in self.lists.entries:
+            counts = f"{entry.active} aktīvi, {entry.total} kopā" if entry.total is not None else "vēl nav atvērts"
+            self.list_menu.add_radiobutton(label=f"{entry.name}  ({counts})", variable=self.list_var, value=entry.id,
+                                           command=lambda list_id=entry.id: self.switch_list(list_id))
+        self.list_menu.add_separator()
+        self.list_menu.add_command(label="Jauns saraksts...", command=self.new_list)
+        self.list_menu.add_command(label="Pārdēvēt...", command=self.rename_list)
+        self.list_menu.add_command(label="Dzēst sarakstu...", command=self.delete_list)
+
+    def _ask_list_name(self, title, initial=""):
+        """Prasa saraksta nosaukumu - None, ja atcelts vai nosaukums jau ir aizņemts"""
+        name = simpledialog.askstring(title, "Saraksta nosaukums:", initialvalue=initial, parent=self.root)
+        name = (name or "").strip()
+        if not name or name == initial:
+            return None
+        if self.lists.find(name) is not None:
+            messagebox.showwarning("Brīdinājums", f"Saraksts \"{name}\" jau ir.")
+            return None
+        return name
+
+    def new_list(self):
+        """Izveido jaunu tukšu sarakstu un atver to"""
+        name = self._ask_list_name("Jauns saraksts")
+        if name is not None:
+            entry = self.lists.create(name)
+            self.switch_list(entry.id)
+
+    def rename_list(self):
+        """Pārdēvē atvērto sarakstu"""
+        name = self._ask_list_name("Pārdēvēt sarakstu", self.lists.current.name)
+        if name is not None:
+            self.lists.current.name = name
+            self.lists.save()
+            self._update_list_button()
+
+    def delete_list(self):
+        """Izdzēš atvērto sarakstu ar visiem tā failiem un atver pirmo atlikušo"""
+        if len(self.lists.entries) == 1:
+            messagebox.showinfo("Dzēst sarakstu", "Pēdējo sarakstu nevar izdzēst.")
+            return
+        entry = self.lists.current
+        if not messagebox.askyesno("Dzēst sarakstu",
+                                   f"Izdzēst sarakstu \"{entry.name}\" ar {len(self.todos)} uzdevumiem un tā arhīvu?"):
+            return
+        self._close_list()
+        self.lists.remove(entry.id)
+        self._show_current_list()
+
+    def switch_list(self, list_id):
+        """Aizver atvērto sarakstu un ielādē citu"""
+        if list_id == self.lists.current_id or self.lists.get(list_id) is None:
+            self.list_var.set(self.lists.current_id)
+            return
+        self._close_list()
+        self.lists.current_id = list_id
+        self._show_current_list()
+
+    def _close_list(self):
+        """Pabeidz darbu ar atvērto sarakstu - viss tiek uzrakstīts, skaiti paliek manifestā"""
+        self.cancel_transfer()
+        if self.loading:
+            self._finish_loading_now()
+        for task in (self._index_task, self._sort_task, self._merge_task, self._sync_task):
+            if task is not None:
+                task.cancel()
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        if self.archive_window is not None:
+            self.archive_window.close()
+        self._record_counts()
+        # Sinhroni uzraksta visu, kas vēl ir rindā
+        if self.saver is not None:
+            self.saver.close(self.todos)
+        else:
+            self.storage.release()
+        self.core.archive.close()
+        if self.core.outbox is not None:
+            self.core.outbox.close()
+
+    def _show_current_list(self):
+        """Atver manifesta pašreizējo sarakstu tukšā logā un sāk tā ielādi"""
+        self.lists.save()
+        self._open_current_list()
+        # Paziņojumi attiecas uz iepriekšējā saraksta uzdevumiem
+        self.notifications.clear()
+        self._show_notification()
+        # Kārtojums tiek atjaunots pēc ielādes, līdz tam rindas nāk pievienošanas secībā
+        if not self._is_default_order():
+            self._restore_sort = (self.sort_key, self.sort_reverse, self.group_by_status)
+            self.sort_key, self.sort_reverse, self.group_by_status = "seq", False, False
+            self._update_headings()
+        # Meklēšana sākas no jauna - laukā atkal ir paraugteksts
+        self.search_var.set(self.SEARCH_PLACEHOLDER)
+        self.search_entry.config(fg=self.ui.GRAY)
+        self._set_virtual_mode(False)
+        self.refresh_todo_list()
+        self._update_list_button()
+        self.start_loading()
 
     def on_closing(self):
         """Apstrādā loga aizvēršanas notikumu"""
-        self.save_todos()
+        for job in (self._archive_job, self._watch_job, self._sync_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self._archive_job = self._watch_job = self._sync_job = None
+        self.deadlines.clear()
+        self._close_list()
+        self.lists.save()
+        self.scheduler.shutdown()
+        if metrics.enabled and metrics.dump_path:
+            metrics.dump(metrics.dump_path)
         self.root.destroy()
 
+
+def enable_instrumentation(trace_alloc=False, dump_path=None):
+    """Ieslēdz galveno darbību ilguma mērīšanu"""
+    metrics.enable(trace_alloc, dump_path)
+    metrics.instrument(TodoApp, TodoApp.INSTRUMENTED_METHODS)
+    metrics.instrument(BackgroundSaver, ("_write",))
+
+
+def env_flag(name):
+    """Vai vides mainīgais ir ieslēgts (1, true, yes)"""
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
 # Programmas palaišana
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Todo App")
+    parser.add_argument("--instrument", action="store_true",
+                        help="mērīt darbību ilgumu (F12 parāda paneli), arī TODO_INSTRUMENT=1")
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="mērīt arī atmiņas izmaiņas ar tracemalloc (lēnāk), arī TODO_TRACE_ALLOC=1")
+    parser.add_argument("--metrics-file", default=os.environ.get("TODO_METRICS_FILE"),
+                        help="saglabāt mērījumus šajā failā, aizverot logu")
+    parser.add_argument("--cprofile", metavar="FILE", default=os.environ.get("TODO_CPROFILE"),
+                        help="saglabāt visas sesijas cProfile datus (skatīt ar python3 -m pstats FILE)")
+    args = parser.parse_args()
+
+    trace_alloc = args.trace_alloc or env_flag("TODO_TRACE_ALLOC")
+    if args.instrument or trace_alloc or args.metrics_file or env_flag("TODO_INSTRUMENT"):
+        enable_instrumentation(trace_alloc, args.metrics_file)
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+
     root = tk.Tk()
     app = TodoApp(root)
     root.mainloop()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
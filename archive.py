@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+# Pabeigto uzdevumu arhīvs.
+#
+# Sen pabeigti uzdevumi tiek pārvietoti no galvenā saraksta atsevišķā failā
+# (todos.archive.jsonl), lai ielāde, saglabāšana un zīmēšana maksātu tikai
+# par aktuālajiem uzdevumiem. Arhīva fails ir tikai pievienošanas žurnāls ar
+# tiem pašiem ierakstiem kā galvenajam sarakstam ({"op": "add", "todo": ...}
+# un {"op": "delete", "id": ...}), tāpēc arhivēšanai to nav jānolasa.
+# Fails tiek nolasīts tikai tad, kad lietotājs atver arhīvu. Arhīvu var
+# koplietot vairākas programmas, tāpēc to raksta un saspiež tikai ar saraksta
+# slēdzeni - cita programma nevar pievienot ierakstus starp nolasīšanu un
+# pārrakstīšanu.
+
+import json
+import os
+
+from storage import FileLock
+
+# Noklusētie arhivēšanas noteikumi - 0 izslēdz attiecīgo noteikumu
+ARCHIVE_AFTER_DAYS = 30
+KEEP_COMPLETED = 1000
+
+DAY = 24 * 60 * 60
+
+
+def archive_path(path):
+    """Arhīva fails blakus uzdevumu failam (todos.json -> todos.archive.jsonl)"""
+    return os.path.splitext(path)[0] + ".archive.jsonl"
+
+
+def select_for_archive(todos, now, max_age_days=ARCHIVE_AFTER_DAYS, keep=KEEP_COMPLETED):
+    """Pabeigto uzdevumu id, kas jāarhivē: pabeigti senāk par max_age_days vai vecākie virs keep.
+    Uzdevumi bez pabeigšanas laika ir pabeigti pirms laiku glabāšanas, tāpēc tiek uzskatīti par veciem."""
+    completed = [(todo.completed_at or 0.0, todo.seq, todo.id) for todo in todos if todo.completed]
+    if max_age_days > 0:
+        cutoff = now - max_age_days * DAY
+        selected = [todo_id for completed_at, _, todo_id in completed if completed_at < cutoff]
+        completed = [item for item in completed if item[0] >= cutoff]
+    else:
+        selected = []
+    if keep > 0 and len(completed) > keep:
+        completed.sort()
+        selected.extend(todo_id for _, _, todo_id in completed[:len(completed) - keep])
+    return selected
+
+
+class Archive:
+    """Arhivēto uzdevumu fails - pievienošanai to nav jānolasa"""
+
+    # Pēc ielādes fails tiek pārrakstīts, ja vairāk nekā puse rindu ir atjaunoti uzdevumi
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, path, lock=None):
+        self.path = path
+        # Saraksta slēdzene (JournalStorage.lock) vai arhīva paša slēdzene, ja krātuvei tādas nav.
+        # Rakstīšana notiek Tk pavedienā, lasīšana - fona pavedienā
+        self._own_lock = lock is None
+        self.lock = FileLock(path + ".lock") if lock is None else lock
+
+    def append(self, todos):
+        """Pievieno uzdevumu ierakstus arhīvam"""
+        self._write([{"op": "add", "todo": data} for data in todos])
+
+    def remove(self, todo_ids):
+        """Izņem uzdevumus no arhīva (tie ir atjaunoti sarakstā)"""
+        self._write([{"op": "delete", "id": todo_id} for todo_id in todo_ids])
+
+    def _write(self, ops):
+        if not ops:
+            return
+        data = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self):
+        """Nolasa arhivētos uzdevumus (vecākie vispirms) - ja failā ir daudz lieku rindu, to saspiež"""
+        with self.lock:
+            if not os.path.exists(self.path):
+                return []
+            todos = {}
+            lines = 0
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        # Pēdējā rinda var būt pusrakstīta, ja programma avarēja rakstīšanas laikā
+                        break
+                    lines += 1
+                    if op["op"] == "add":
+                        # Pēc avārijas uzdevums var būt arhivēts divreiz - paliek viens
+                        todos[op["todo"]["id"]] = op["todo"]
+                    elif op["op"] == "delete":
+                        todos.pop(op["id"], None)
+            if lines and len(todos) < lines * self.COMPACT_RATIO:
+                self._rewrite(todos.values())
+            return list(todos.values())
+
+    def _rewrite(self, todos):
+        """Pārraksta arhīvu tikai ar esošajiem uzdevumiem"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"op": "add", "todo": data}, ensure_ascii=False) + "\n" for data in todos))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """Aizver arhīva paša slēdzeni - saraksta slēdzeni aizver krātuve"""
+        if self._own_lock:
+            self.lock.close()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Ātrdarbības mērījumi uzdevumu sarakstam.
+#
+# Katrs mērījums (komplekts, krātuve, izmērs) tiek palaists atsevišķā procesā,
+# lai atmiņas maksimums un kešatmiņas neietekmētu nākamos. Rezultāti tiek
+# izvadīti JSON formātā, lai tos varētu salīdzināt starp versijām:
+#
+#   python3 benchmark.py --sizes 1000 10000 100000 --output before.json
+#   python3 benchmark.py --sizes 1000 10000 100000 --compare before.json
+#
+# "store" komplekts strādā bez grafiskās saskarnes un neimportē tkinter.
+# "gui" komplekts darbina TodoApp - ja nav DISPLAY, tiek palaists Xvfb.
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Windows - procesa atmiņas maksimums netiks mērīts
+    resource = None
+
+from filters import parse_query
+from storage import open_storage
+from todo_core import TodoList
+from todo_store import TodoStore
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+WORDS = ("nopirkt", "pienu", "maizi", "izmazgāt", "traukus", "uzrakstīt", "vēstuli", "piezvanīt",
+         "mammai", "samaksāt", "rēķinu", "sagatavot", "prezentāciju", "iznest", "atkritumus",
+         "salabot", "velosipēdu", "izlasīt", "grāmatu", "aplaistīt", "puķes", "darbs", "mājas")
+TAGS = ("darbs", "mājas", "dārzs", "iepirkumi", "steidzami")
+# Strukturētie filtri, kuru latentums tiek mērīts - atbildes nāk no bitkartēm
+FILTER_QUERIES = ("#darbs AND priority>=high AND active", "(#mājas OR #dārzs) AND NOT completed",
+                  "NOT #darbs AND priority<=low")
+
+
+def make_todos(count, seed=0):
+    """Ģenerē vienmēr vienādu uzdevumu sarakstu dotajam izmēram"""
+    rng = random.Random(seed)
+    # Birkas un prioritāte no atsevišķa ģeneratora, lai teksti paliktu tādi paši kā iepriekšējos mērījumos
+    attributes = random.Random(seed + 1)
+    return [
+        {
+            "id": f"{rng.getrandbits(128):032x}",
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))) + f" {i}",
+            "completed": rng.random() < 0.3,
+            "tags": attributes.sample(TAGS, attributes.randint(0, 2)),
+            "priority": attributes.randint(0, 3),
+        }
+        for i in range(count)
+    ]
+
+
+def latency_stats(samples):
+    """Mediāna, 95. procentile un maksimums milisekundēs"""
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000, 4),
+        "max_ms": round(samples[-1] * 1000, 4),
+    }
+
+
+def timed(func, *args):
+    """Izpilda funkciju un atgriež (rezultāts, ilgums sekundēs)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def peak_rss_mb():
+    """Procesa atmiņas maksimums megabaitos (ja to var noteikt)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux to dod kilobaitos, macOS - baitos
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure_ops(size, ops, actions, pick, settle=None):
+    """Mēra darbību latentumu - actions ir [(nosaukums, darbība(todo, i))], pick izvēlas uzdevumu (netiek mērīts)"""
+    rng = random.Random(size)
+    results = {}
+    for name, action in actions:
+        samples = []
+        for i in range(ops):
+            todo = pick(rng) if name != "add" else None
+            start = time.perf_counter()
+            action(todo, i)
+            if settle is not None:
+                settle()
+            samples.append(time.perf_counter() - start)
+        results[name] = latency_stats(samples)
+    return results
+
+
+def run_store_case(kind, size, ops, workdir):
+    """Krātuves un TodoList mērījumi bez grafiskās saskarnes"""
+    path = os.path.join(workdir, "todos.json")
+    store = TodoStore.from_dicts(make_todos(size))
+
+    storage = open_storage(kind, path)
+    _, save_s = timed(storage.save, store)
+    storage.release()
+
+    storage = open_storage(kind, path)
+    loaded, load_s = timed(lambda: TodoStore.from_dicts(storage.load()))
+    assert len(loaded) == size
+
+    # Atmiņa tiek mērīta atsevišķā ielādē, jo tracemalloc palēnina darbu
+    del loaded, store
+    tracemalloc.start()
+    probe = open_storage(kind, path)
+    loaded = TodoStore.from_dicts(probe.load())
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    probe.release()
+
+    todo_list = TodoList(storage, loaded)
+    queries = [parse_query(text) for text in FILTER_QUERIES]
+
+    def run_filter(todo, i):
+        query = queries[i % len(queries)]
+        return loaded.bitmaps.todos(query.evaluate(loaded, None, time.time()))
+
+    latencies = measure_ops(size, ops, [
+        ("filter", run_filter),
+        ("add", lambda todo, i: todo_list.add(f"jauns uzdevums {i}")),
+        ("toggle", lambda todo, i: todo_list.toggle(todo.id)),
+        ("edit", lambda todo, i: todo_list.edit(todo.id, f"rediģēts uzdevums {i}")),
+        ("delete", lambda todo, i: todo_list.delete(todo.id)),
+    ], pick=lambda rng: todo_list.todos[rng.randrange(len(todo_list))])
+    todo_list.close()
+
+    return {
+        "load_s": round(load_s, 4),
+        "save_s": round(save_s, 4),
+        "peak_python_mb": round(peak / (1024 * 1024), 1),
+        "retained_python_mb": round(current / (1024 * 1024), 1),
+        "ops": latencies,
+    }
+
+
+def run_gui_case(kind, size, ops, workdir):
+    """TodoApp mērījumi - ielāde, pārzīmēšana, saglabāšana un darbības ar saskarni"""
+    import tkinter as tk
+    from app import TodoApp
+
+    os.environ["TODO_STORAGE"] = kind
+    storage = open_storage(kind, os.path.join(workdir, "todos.json"))
+    storage.save(TodoStore.from_dicts(make_todos(size)))
+    storage.release()
+
+    root = tk.Tk()
+    start = time.perf_counter()
+    app = TodoApp(root)
+    root.update()
+    first_paint_s = time.perf_counter() - start
+    while app.loading:
+        root.update()
+    load_s = time.perf_counter() - start
+
+    _, refresh_s = timed(lambda: (app.refresh_todo_list(), root.update_idletasks()))
+    _, save_s = timed(lambda: (app.save_todos(), app.saver.flush()))
+
+    def pick(rng):
+        app.select_index(rng.randrange(len(app.rows)))
+        root.update_idletasks()
+        return app.get_selected_todo()
+
+    def add(todo, i):
+        app.todo_entry.delete(0, tk.END)
+        app.todo_entry.insert(0, f"jauns uzdevums {i}")
+        app.add_todo()
+
+    def edit(todo, i):
+        # Tas pats, ko dara rediģēšanas dialoga poga "Saglabāt"
+        app.core.edit(todo.id, f"rediģēts uzdevums {i}")
+        app._show_text_changed(todo)
+
+    latencies = measure_ops(size, ops, [
+        ("add", add),
+        ("toggle", lambda todo, i: app.toggle_complete()),
+        ("edit", edit),
+        ("delete", lambda todo, i: app.delete_todos([todo.id])),
+    ], pick=pick, settle=root.update_idletasks)
+    app.on_closing()
+
+    return {
+        "first_paint_s": round(first_paint_s, 4),
+        "load_s": round(load_s, 4),
+        "refresh_s": round(refresh_s, 4),
+        "save_s": round(save_s, 4),
+        "virtual_mode": app.virtual_mode,
+        "ops": latencies,
+    }
+
+
+CASES = {"store": run_store_case, "gui": run_gui_case}
+
+
+def run_case(suite, kind, size, ops):
+    """Izpilda vienu mērījumu tukšā pagaidu mapē (šajā procesā)"""
+    workdir = tempfile.mkdtemp(prefix="todo-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        result = CASES[suite](kind, size, ops, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    result.update(suite=suite, storage=kind, size=size, peak_rss_mb=peak_rss_mb())
+    return result
+
+
+def start_xvfb():
+    """Palaiž virtuālo X serveri, ja nav displeja - atgriež procesu vai None"""
+    if os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return None
+    display = ":99"
+    process = subprocess.Popen([xvfb, display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Gaida, kamēr serveris ir gatavs
+    for _ in range(50):
+        if os.path.exists(f"/tmp/.X11-unix/X{display[1:]}"):
+            break
+        time.sleep(0.1)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def git_commit():
+    """Pašreizējā git versija, ja tāda ir"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_all(args):
+    """Palaiž visus mērījumus, katru savā procesā"""
+    xvfb = start_xvfb() if "gui" in args.suites else None
+    results = []
+    try:
+        for suite in args.suites:
+            for kind in args.storages:
+                for size in args.sizes:
+                    if suite == "gui" and not os.environ.get("DISPLAY"):
+                        results.append({"suite": suite, "storage": kind, "size": size,
+                                        "skipped": "nav displeja un Xvfb nav atrasts"})
+                        continue
+                    print(f"{suite} {kind} {size}...", file=sys.stderr)
+                    command = [sys.executable, os.path.abspath(__file__), "--case", suite, kind, str(size),
+                               "--ops", str(args.ops)]
+                    proc = subprocess.run(command, capture_output=True, text=True)
+                    if proc.returncode != 0:
+                        results.append({"suite": suite, "storage": kind, "size": size,
+                                        "error": proc.stderr.strip().splitlines()[-1:]})
+                        continue
+                    results.append(json.loads(proc.stdout))
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ops": args.ops,
+        },
+        "results": results,
+    }
+
+
+def flatten(report):
+    """Pārvērš rezultātus par {(komplekts, krātuve, izmērs, metrika): vērtība}"""
+    metrics = {}
+    for result in report["results"]:
+        key = (result["suite"], result["storage"], result["size"])
+        for name, value in result.items():
+            if name.endswith("_s") or name.endswith("_mb"):
+                metrics[key + (name,)] = value
+        for op, stats in result.get("ops", {}).items():
+            metrics[key + (f"{op}.median_ms",)] = stats["median_ms"]
+            metrics[key + (f"{op}.p95_ms",)] = stats["p95_ms"]
+    return metrics
+
+
+def compare(old_report, new_report, threshold):
+    """Izdrukā metrikas, kas mainījušās vairāk par slieksni"""
+    old, new = flatten(old_report), flatten(new_report)
+    print(f"{old_report['meta'].get('commit')} -> {new_report['meta'].get('commit')}")
+    for key in sorted(old.keys() & new.keys(), key=str):
+        before, after = old[key], new[key]
+        if before is None or after is None or not before:
+            continue
+        change = (after - before) / before
+        if abs(change) >= threshold:
+            marker = "lēnāk" if change > 0 else "ātrāk"
+            print(f"  {' '.join(map(str, key)):<45} {before:>10} -> {after:<10} {change:+.0%} {marker}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uzdevumu saraksta ātrdarbības mērījumi")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="saraksta izmēri (piemēram, 1000 10000 100000 1000000)")
+    parser.add_argument("--suites", nargs="+", choices=sorted(CASES), default=["store", "gui"])
+    parser.add_argument("--storages", nargs="+", choices=("journal", "binary", "sqlite"),
+                        default=["journal", "binary", "sqlite"])
+    parser.add_argument("--ops", type=int, default=200, help="cik reizes mērīt katru darbību")
+    parser.add_argument("--output", help="JSON fails rezultātiem (noklusējums: standarta izvade)")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="salīdzināt ar iepriekšējiem rezultātiem")
+    parser.add_argument("--threshold", type=float, default=0.1, help="salīdzināšanas slieksnis (0.1 = 10%%)")
+    parser.add_argument("--case", nargs=3, metavar=("SUITE", "STORAGE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        suite, kind, size = args.case
+        print(json.dumps(run_case(suite, kind, int(size), args.ops)))
+        return 0
+
+    report = run_all(args)
+    data = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+# Binārs momentuzņēmums lieliem sarakstiem.
+#
+# JSON parsēšana miljonam uzdevumu aizņem sekundes un katram uzdevumam
+# izveido vārdnīcu. Šajā formātā katram uzdevumam ir fiksēta izmēra ieraksts,
+# bet teksti glabājas kopējā virkņu kaudzē faila beigās:
+#
+#   galvene   HEADER    maģija, versija, skaits, pabeigto skaits, seq, kaudzes sākums
+#   ieraksti  RECORD    id (16 baiti), teksta nobīde kaudzē, teksta garums, karodziņi,
+#                       pabeigšanas laiks, termiņš, atgādinājuma laiks,
+#                       birku nobīde kaudzē, birku garums, prioritāte
+#   kaudze              UTF-8 teksti, birkas (atdalītas ar atstarpi) un id, kas nav
+#                       32 heksadecimāli simboli
+#
+# SnapshotReader atver failu ar mmap - atvēršana nolasa tikai galveni, un
+# ieraksts tiek dekodēts tikai tad, kad kāds to pieprasa.
+
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from itertools import islice
+
+MAGIC = b"TODOSNAP"
+# 2. versijā ierakstam pievienots pabeigšanas laiks (0 - nav zināms),
+# 3. versijā - termiņš un atgādinājuma laiks (0 - nav), 4. versijā - birkas un prioritāte
+VERSION = 4
+HEADER = struct.Struct("<8sHHIQQQQ")
+RECORD = struct.Struct("<16sQIB3xdddQIB3x")
+# Vecāku versiju faili joprojām tiek nolasīti
+RECORD_V2 = struct.Struct("<16sQIB3xd")
+RECORD_V3 = struct.Struct("<16sQIB3xddd")
+RECORDS = {2: RECORD_V2, 3: RECORD_V3, VERSION: RECORD}
+# Id, kas glabājas kaudzē - ieraksta id laukā ir tā nobīde un garums
+HEAP_ID = struct.Struct("<QI4x")
+
+FLAG_COMPLETED = 1
+FLAG_HEAP_ID = 2
+
+# Cik ierakstu sagatavot atmiņā pirms rakstīšanas failā
+WRITE_CHUNK = 20000
+
+
+def _pack_id(todo_id, heap, heap_start=0):
+    """Uzdevuma id ieraksta laukam - parastais uuid hex aizņem 16 baitus, citi tiek ielikti kaudzē
+    (heap ir kaudzes daļa, kas sākas nobīdē heap_start)"""
+    if len(todo_id) == 32:
+        try:
+            raw = bytes.fromhex(todo_id)
+        except ValueError:
+            raw = None
+        if raw is not None and raw.hex() == todo_id:
+            return raw, 0
+    data = todo_id.encode("utf-8")
+    field = HEAP_ID.pack(heap_start + len(heap), len(data))
+    heap += data
+    return field, FLAG_HEAP_ID
+
+
+def write_snapshot(path, todos, seq=0):
+    """Uzraksta uzdevumu vārdnīcu sarakstu bināri caur pagaidu failu"""
+    for _ in write_steps(path, todos, seq):
+        pass
+
+
+def write_steps(path, todos, seq=0, chunk_size=WRITE_CHUNK):
+    """Raksta momentuzņēmumu pa porcijām - dod uzrakstīto skaitu pēc katras porcijas.
+    Ieraksti iet uzreiz failā, teksti - pagaidu kaudzes failā, kas beigās tiek pievienots;
+    galvene tiek uzrakstīta pēdējā, kad skaits ir zināms. Pārtraukta rakstīšana failu neatstāj."""
+    tmp_path = path + ".tmp"
+    finished = False
+    try:
+        with open(tmp_path, "wb") as f, tempfile.TemporaryFile() as heap_file:
+            f.write(bytes(HEADER.size))
+            count = completed_count = heap_size = 0
+            todos = iter(todos)
+            while True:
+                records = bytearray()
+                heap = bytearray()
+                for todo in islice(todos, chunk_size):
+                    id_field, flags = _pack_id(todo["id"], heap, heap_size)
+                    text = todo["text"].encode("utf-8")
+                    tags = " ".join(todo.get("tags") or ()).encode("utf-8")
+                    if todo.get("completed"):
+                        flags |= FLAG_COMPLETED
+                        completed_count += 1
+                    text_offset = heap_size + len(heap)
+                    records += RECORD.pack(id_field, text_offset, len(text), flags,
+                                           todo.get("completed_at") or 0.0, todo.get("due") or 0.0,
+                                           todo.get("remind_at") or 0.0, text_offset + len(text), len(tags),
+                                           todo.get("priority") or 0)
+                    heap += text
+                    heap += tags
+                if not records:
+                    break
+                f.write(records)
+                heap_file.write(heap)
+                heap_size += len(heap)
+                count += len(records) // RECORD.size
+                yield count
+
+            heap_file.seek(0)
+            shutil.copyfileobj(heap_file, f)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, 0, count, completed_count, seq, HEADER.size + count * RECORD.size))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        finished = True
+    finally:
+        if not finished and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_snapshot(path):
+    """Vai fails ir binārs momentuzņēmums"""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class SnapshotReader:
+    """Binārā momentuzņēmuma lasītājs - ieraksti tiek dekodēti tikai pēc pieprasījuma"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"Bojāts momentuzņēmums: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, _, count, completed, seq, heap_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in RECORDS:
+            self._map.close()
+            raise ValueError(f"Nav atbalstīts momentuzņēmuma formāts: {path}")
+        self._record = RECORDS[version]
+        self.count = count
+        self.completed_count = completed
+        self.seq = seq
+        self._heap = heap_offset
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _unpack(self, begin, end):
+        """Ierakstu lauki no begin līdz end - vecākām versijām trūkstošie lauki ir 0"""
+        records = self._record.iter_unpack(self._map[begin:end])
+        if self._record is RECORD_V2:
+            return (fields + (0.0, 0.0, 0, 0, 0) for fields in records)
+        if self._record is RECORD_V3:
+            return (fields + (0, 0, 0) for fields in records)
+        return records
+
+    def _tags(self, tags_offset, tags_length):
+        if not tags_length:
+            return ()
+        start = self._heap + tags_offset
+        return tuple(self._map[start:start + tags_length].decode("utf-8").split())
+
+    def _decode(self, id_field, text_offset, text_length, flags, completed_at, due, remind_at,
+                tags_offset, tags_length, priority):
+        """Viens ieraksts -> (id, teksts, pabeigts, pabeigšanas laiks, termiņš, atgādinājums, birkas, prioritāte)"""
+        heap = self._heap
+        if flags & FLAG_HEAP_ID:
+            id_offset, id_length = HEAP_ID.unpack(id_field)
+            todo_id = self._map[heap + id_offset:heap + id_offset + id_length].decode("utf-8")
+        else:
+            todo_id = id_field.hex()
+        text = self._map[heap + text_offset:heap + text_offset + text_length].decode("utf-8")
+        return (todo_id, text, bool(flags & FLAG_COMPLETED), completed_at or None, due or None, remind_at or None,
+                self._tags(tags_offset, tags_length), priority)
+
+    def record(self, index):
+        """Dekodē vienu ierakstu - (id, teksts, pabeigts, pabeigšanas laiks, termiņš, atgādinājums, birkas, prioritāte)"""
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        begin = HEADER.size + index * self._record.size
+        return self._decode(*next(self._unpack(begin, begin + self._record.size)))
+
+    def iter_records(self, start=0, stop=None):
+        """Dekodē ierakstus pēc kārtas no start līdz stop"""
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return
+        size = self._record.size
+        data = self._map
+        heap = self._heap
+        records = self._unpack(HEADER.size + start * size, HEADER.size + stop * size)
+        for fields in records:
+            id_field, text_offset, text_length, flags, completed_at, due, remind_at, _, tags_length, priority = fields
+            if flags & FLAG_HEAP_ID or tags_length:
+                yield self._decode(*fields)
+                continue
+            # Parastais gadījums bez papildu izsaukuma - ielādē tas notiek miljoniem reižu
+            text_offset += heap
+            yield (id_field.hex(), data[text_offset:text_offset + text_length].decode("utf-8"),
+                   flags & FLAG_COMPLETED == 1, completed_at or None, due or None, remind_at or None, (), priority)
+
+    def iter_batches(self, batch_size):
+        """Uzdevumu vārdnīcas porcijās - ielādei pa daļām"""
+        for start in range(0, self.count, batch_size):
+            batch = []
+            for todo_id, text, completed, completed_at, due, remind_at, tags, priority in \
+                    self.iter_records(start, start + batch_size):
+                todo = {"id": todo_id, "text": text, "completed": completed}
+                if completed_at is not None:
+                    todo["completed_at"] = completed_at
+                if due is not None:
+                    todo["due"] = due
+                if remind_at is not None:
+                    todo["remind_at"] = remind_at
+                if tags:
+                    todo["tags"] = list(tags)
+                if priority:
+                    todo["priority"] = priority
+                batch.append(todo)
+            yield batch
+
+    def query(self, completed):
+        """Dekodē tikai ierakstus ar doto statusu - pārējiem nolasa tikai karodziņus"""
+        decode = self._decode
+        for fields in self._unpack(HEADER.size, HEADER.size + self.count * self._record.size):
+            if bool(fields[3] & FLAG_COMPLETED) == completed:
+                yield decode(*fields)
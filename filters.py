@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+# Strukturēti filtri: birkas, prioritāte un statuss.
+#
+# Meklēšanas laukā var rakstīt vaicājumus, piemēram:
+#
+#   #darbs AND priority>=high AND active
+#   #mājas OR #dārzs
+#   NOT #darbs pabeigti
+#   (#a OR #b) piens
+#
+# Vaicājums tiek izpildīts ar TodoStore bitkartēm (skatīt BitmapIndex): katrai
+# birkai, prioritātei un statusam ir bitu masīvs, un AND/OR/NOT ir operācijas
+# ar veseliem skaitļiem, nevis saraksta pārlūkošana. Vārdi bez īpašas nozīmes
+# ir teksta meklēšana ar trigrammu indeksu. Vaicājums bez birkām, prioritātes
+# un operatoriem ir parasta teksta meklēšana kā līdz šim.
+#
+# Rakstot vaicājums bieži ir nepabeigts ("#darbs AND"), tāpēc parsētājs
+# kļūdas neizraisa - lieki operatori un iekavas tiek ignorētas.
+
+import math
+import re
+
+from todo_store import ALL_KEY, COMPLETED_KEY, priority_key, tag_key
+
+# Prioritāšu nosaukumi pēc līmeņa - 0 nozīmē, ka prioritātes nav
+PRIORITY_NAMES = ("nav", "zema", "vidēja", "augsta")
+PRIORITY_ALIASES = {
+    "none": 0, "nav": 0,
+    "low": 1, "zema": 1,
+    "medium": 2, "vidēja": 2, "videja": 2,
+    "high": 3, "augsta": 3,
+}
+
+OPERATORS = {"AND": "and", "UN": "and", "OR": "or", "VAI": "or", "NOT": "not", "NE": "not"}
+ATTRIBUTES = {
+    "active": "active", "aktīvi": "active", "aktīvs": "active",
+    "completed": "completed", "done": "completed", "pabeigti": "completed", "pabeigts": "completed",
+    "overdue": "overdue", "nokavēti": "overdue", "nokavēts": "overdue",
+}
+
+TOKEN = re.compile(r"[()]|[^\s()]+")
+PRIORITY_TERM = re.compile(r"(?:priority|prio|prioritāte|p)(>=|<=|=|>|<|:)(\S+)$", re.IGNORECASE)
+TAG_SEPARATORS = re.compile(r"[\s,;]+")
+
+COMPARISONS = {
+    "=": lambda level, value: level == value,
+    ":": lambda level, value: level == value,
+    ">=": lambda level, value: level >= value,
+    "<=": lambda level, value: level <= value,
+    ">": lambda level, value: level > value,
+    "<": lambda level, value: level < value,
+}
+
+
+def parse_priority(value):
+    """Prioritātes līmenis no nosaukuma vai skaitļa (0-3) - nesaprotams izraisa ValueError"""
+    if isinstance(value, int):
+        level = value
+    else:
+        value = str(value).strip().lower()
+        level = PRIORITY_ALIASES.get(value)
+        if level is None:
+            if not value.isdigit():
+                raise ValueError(f"Nesaprotama prioritāte: {value}")
+            level = int(value)
+    if not 0 <= level < len(PRIORITY_NAMES):
+        raise ValueError(f"Nesaprotama prioritāte: {value}")
+    return level
+
+
+def parse_tags(text):
+    """Birkas no teksta ("#darbs #mājas" vai "darbs, mājas") - mazie burti, bez atkārtojumiem"""
+    if not isinstance(text, str):
+        text = " ".join(text)
+    tags = []
+    for tag in TAG_SEPARATORS.split(text):
+        tag = tag.lstrip("#").lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tuple(tags)
+
+
+def format_tags(tags):
+    """Birkas rādīšanai - "#darbs #mājas" """
+    return " ".join("#" + tag for tag in tags)
+
+
+def parse_query(text):
+    """Strukturēts vaicājums no meklēšanas lauka teksta - None, ja tā ir parasta teksta meklēšana"""
+    tokens = TOKEN.findall(text)
+    if not any(token.startswith("#") and len(token) > 1 or token in OPERATORS or PRIORITY_TERM.match(token)
+               for token in tokens):
+        return None
+    return Query(text, _Parser(tokens).parse())
+
+
+class _Parser:
+    """Rekursīvs parsētājs: OR < AND (arī bez vārda) < NOT < iekavas un termini"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def parse(self):
+        node = self.parse_or()
+        # Lieka aizverošā iekava - pārējais vaicājums tiek turpināts
+        while self.peek() is not None:
+            self.pos += 1
+            rest = self.parse_or()
+            if rest is not None:
+                node = rest if node is None else ("and", node, rest)
+        return node if node is not None else ("key", ALL_KEY)
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() in OPERATORS and OPERATORS[self.peek()] == "or":
+            self.pos += 1
+            right = self.parse_and()
+            if right is not None:
+                node = right if node is None else ("or", node, right)
+        return node
+
+    def parse_and(self):
+        node = None
+        while True:
+            token = self.peek()
+            if token is None or token == ")" or OPERATORS.get(token) == "or":
+                return node
+            if OPERATORS.get(token) == "and":
+                self.pos += 1
+                continue
+            right = self.parse_not()
+            if right is not None:
+                node = right if node is None else ("and", node, right)
+
+    def parse_not(self):
+        if OPERATORS.get(self.peek()) == "not":
+            self.pos += 1
+            operand = self.parse_not()
+            return ("not", operand) if operand is not None else None
+        return self.parse_term()
+
+    def parse_term(self):
+        token = self.peek()
+        if token is None or token == ")" or token in OPERATORS:
+            # NOT vaicājuma beigās vai pirms operatora - lieks operators tiek ignorēts
+            return None
+        if token == "(":
+            self.pos += 1
+            node = self.parse_or()
+            if self.peek() == ")":
+                self.pos += 1
+            return node
+        words = []
+        # Blakus esoši parasti vārdi ir viena teksta frāze, tāpat kā parastajā meklēšanā
+        while token is not None and token not in "()" and token not in OPERATORS and self._is_word(token):
+            words.append(token)
+            self.pos += 1
+            token = self.peek()
+        if words:
+            return ("text", " ".join(words).lower())
+        self.pos += 1
+        if token.startswith("#"):
+            return ("key", tag_key(token[1:].lower()))
+        attribute = ATTRIBUTES.get(token.lower())
+        if attribute is not None:
+            return (attribute,)
+        match = PRIORITY_TERM.match(token)
+        if match is None:
+            return ("nothing",)
+        try:
+            level = parse_priority(match.group(2))
+        except ValueError:
+            # Nepabeigts vai nepareizs līmenis neatbilst nekam
+            return ("nothing",)
+        return ("priority", match.group(1), level)
+
+    @staticmethod
+    def _is_word(token):
+        return not (token.startswith("#") and len(token) > 1 or token.lower() in ATTRIBUTES
+                    or PRIORITY_TERM.match(token))
+
+
+class Query:
+    """Parsēts vaicājums - evaluate izmanto bitkartes, matches pārbauda vienu uzdevumu"""
+
+    def __init__(self, text, tree):
+        self.text = text
+        self.tree = tree
+        # Nokavētie mainās līdz ar laiku - tādu filtru jāizpilda no jauna, kad pienāk termiņš
+        self.uses_time = self._uses(tree, "overdue")
+
+    def _uses(self, node, kind):
+        if node[0] == kind:
+            return True
+        return node[0] in ("and", "or", "not") and any(self._uses(child, kind) for child in node[1:])
+
+    def evaluate(self, store, search, now):
+        """Atbilstošo uzdevumu bitkarte - search ir funkcija, kas atgriež pabeigtu SearchIndex"""
+        return self._bits(self.tree, store, search, now)
+
+    def _bits(self, node, store, search, now):
+        bitmaps = store.bitmaps
+        kind = node[0]
+        if kind == "key":
+            return bitmaps.bitmap(node[1])
+        if kind == "and":
+            left = self._bits(node[1], store, search, now)
+            return left & self._bits(node[2], store, search, now) if left else 0
+        if kind == "or":
+            return self._bits(node[1], store, search, now) | self._bits(node[2], store, search, now)
+        if kind == "not":
+            return bitmaps.bitmap(ALL_KEY) & ~self._bits(node[1], store, search, now)
+        if kind == "active":
+            return bitmaps.bitmap(ALL_KEY) & ~bitmaps.bitmap(COMPLETED_KEY)
+        if kind == "completed":
+            return bitmaps.bitmap(COMPLETED_KEY)
+        if kind == "priority":
+            compare = COMPARISONS[node[1]]
+            levels = [level for level in range(len(PRIORITY_NAMES)) if compare(level, node[2])]
+            bits = 0
+            for level in levels:
+                if level:
+                    bits |= bitmaps.bitmap(priority_key(level))
+            if 0 in levels:
+                # Bez prioritātes ir visi, kuriem nav neviena līmeņa bita
+                without = bitmaps.bitmap(ALL_KEY)
+                for level in range(1, len(PRIORITY_NAMES)):
+                    without &= ~bitmaps.bitmap(priority_key(level))
+                bits |= without
+            return bits
+        if kind == "overdue":
+            return bitmaps.bitmap_of(store.due_index.between(-math.inf, now))
+        if kind == "text":
+            return bitmaps.bitmap_of(store.get(todo_id) for todo_id in search().search(node[1]))
+        return 0
+
+    def matches(self, todo, search, now):
+        """Vai viens uzdevums atbilst vaicājumam - izmaiņām, kad skats jau ir izveidots"""
+        return self._matches(self.tree, todo, search, now)
+
+    def _matches(self, node, todo, search, now):
+        kind = node[0]
+        if kind == "key":
+            key = node[1]
+            if key == ALL_KEY:
+                return True
+            if key == COMPLETED_KEY:
+                return todo.completed
+            return key[1] in todo.tags
+        if kind == "and":
+            return self._matches(node[1], todo, search, now) and self._matches(node[2], todo, search, now)
+        if kind == "or":
+            return self._matches(node[1], todo, search, now) or self._matches(node[2], todo, search, now)
+        if kind == "not":
+            return not self._matches(node[1], todo, search, now)
+        if kind == "active":
+            return not todo.completed
+        if kind == "completed":
+            return todo.completed
+        if kind == "priority":
+            return COMPARISONS[node[1]](todo.priority, node[2])
+        if kind == "overdue":
+            return not todo.completed and todo.due is not None and todo.due <= now
+        if kind == "text":
+            return search().matches(todo.id, node[1])
+        return False
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Ātrdarbības mērīšana lietotnes darbības laikā.
+#
+# Ieslēdzot mērīšanu, izvēlētās klases metodes tiek aizstātas ar apvalkiem,
+# kas pieraksta katra izsaukuma ilgumu histogrammā (un pēc izvēles - arī
+# atmiņas izmaiņas ar tracemalloc). Kad mērīšana nav ieslēgta, nekas netiek
+# aizstāts, tāpēc parastajā darbā tā neko nemaksā.
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+# Histogrammas robežas milisekundēs - katrs nākamais grozs ir divreiz platāks
+BUCKET_BOUNDS_MS = tuple(0.05 * 2 ** i for i in range(18))
+
+
+class Histogram:
+    """Izsaukumu ilgumu sadalījums logaritmiskos grozos"""
+
+    __slots__ = ("counts", "count", "total", "max", "alloc_bytes", "alloc_peak")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.alloc_bytes = 0
+        self.alloc_peak = 0
+
+    def add(self, seconds):
+        """Pievieno vienu mērījumu"""
+        ms = seconds * 1000
+        bucket = 0
+        while bucket < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction):
+        """Aptuvena procentile - tā groza augšējā robeža, kurā tā iekrīt"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS_MS[bucket] if bucket < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        """Histogramma JSON formātā"""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 3),
+            "buckets_ms": {f"<={bound:g}": count for bound, count in zip(BUCKET_BOUNDS_MS, self.counts) if count},
+            "over_ms": self.counts[-1],
+            "alloc_bytes": self.alloc_bytes,
+            "alloc_peak_bytes": self.alloc_peak,
+        }
+
+
+class Metrics:
+    """Visu mērīto darbību histogrammas"""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_alloc = False
+        # Fails, kurā saglabāt mērījumus, aizverot lietotni
+        self.dump_path = None
+        self.histograms = {}
+        self.started = time.time()
+        # Daži mērījumi nāk no fona pavedieniem (ielāde, saglabāšana)
+        self._lock = threading.Lock()
+
+    def enable(self, trace_alloc=False, dump_path=None):
+        """Ieslēdz mērīšanu (un pēc izvēles atmiņas izsekošanu)"""
+        self.enabled = True
+        self.trace_alloc = trace_alloc
+        self.dump_path = dump_path
+        if trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def record(self, name, seconds, alloc_bytes=0, alloc_peak=0):
+        """Pieraksta viena izsaukuma ilgumu"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            histogram.alloc_bytes += alloc_bytes
+            histogram.alloc_peak = max(histogram.alloc_peak, alloc_peak)
+
+    def reset(self):
+        """Notīra visus mērījumus"""
+        with self._lock:
+            self.histograms = {}
+            self.started = time.time()
+
+    def wrap(self, name, func):
+        """Apvalks, kas mēra funkcijas izsaukumus"""
+        @functools.wraps(func)
+        def measured(*args, **kwargs):
+            if self.trace_alloc:
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if self.trace_alloc:
+                    after, peak = tracemalloc.get_traced_memory()
+                    self.record(name, elapsed, after - before, peak - before)
+                else:
+                    self.record(name, elapsed)
+        return measured
+
+    def instrument(self, cls, method_names, prefix=None):
+        """Aizstāj klases metodes ar mērošiem apvalkiem"""
+        prefix = prefix or cls.__name__
+        for method_name in method_names:
+            setattr(cls, method_name, self.wrap(f"{prefix}.{method_name}", getattr(cls, method_name)))
+
+    def snapshot(self):
+        """Visi mērījumi JSON formātā"""
+        with self._lock:
+            histograms = {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}
+        data = {"started": self.started, "duration_s": round(time.time() - self.started, 1),
+                "histograms": histograms}
+        if self.trace_alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            data["traced_memory"] = {"current_bytes": current, "peak_bytes": peak}
+        return data
+
+    def report_lines(self):
+        """Īss teksta pārskats atkļūdošanas panelim"""
+        header = f"{'darbība':<34}{'reizes':>7}{'vid. ms':>9}{'p95 ms':>9}{'max ms':>9}"
+        if self.trace_alloc:
+            header += f"{'atmiņa':>14}"
+        lines = [header]
+        with self._lock:
+            items = sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True)
+            for name, histogram in items:
+                mean = histogram.total / histogram.count
+                line = (f"{name[-34:]:<34}{histogram.count:>7}{mean:>9.2f}"
+                        f"{histogram.percentile(0.95):>9.2f}{histogram.max:>9.2f}")
+                if self.trace_alloc:
+                    line += f"{histogram.alloc_bytes / 1024:>10.0f} KiB"
+                lines.append(line)
+        return lines
+
+    def dump(self, path):
+        """Saglabā mērījumus JSON failā"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+# Viens kopīgs mērījumu krājums visai lietotnei
+metrics = Metrics()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+# Vairāki uzdevumu saraksti (projekti).
+#
+# Katrs saraksts glabājas savā failā (todos.json, todos.<id>.json, ...) ar
+# savu žurnālu un arhīvu, un vienlaikus tiek ielādēts tikai atvērtais
+# saraksts. Sarakstu nosaukumi un uzdevumu skaiti glabājas mazā manifestā
+# (todos.lists.json), tāpēc sarakstu izvēlne var parādīt skaitus, neatverot
+# pārējo sarakstu failus. Skaiti tiek atjaunoti, kad saraksts tiek aizvērts.
+
+import json
+import os
+import uuid
+
+from archive import archive_path
+from storage import write_atomic
+
+MANIFEST_FORMAT = "todo-lists"
+DEFAULT_LIST_ID = "default"
+DEFAULT_LIST_NAME = "Mani uzdevumi"
+
+
+def manifest_path(path):
+    """Manifests blakus noklusētajam sarakstam (todos.json -> todos.lists.json)"""
+    return os.path.splitext(path)[0] + ".lists.json"
+
+
+def shard_files(path):
+    """Visi faili, kas var piederēt sarakstam - visu krātuvju veidu momentuzņēmumi, žurnāli, slēdzenes,
+    arhīvs un sinhronizācija"""
+    stem = os.path.splitext(path)[0]
+    snapshots = (path, stem + ".todobin", stem + ".db")
+    files = [name + suffix for name in snapshots for suffix in ("", ".journal", ".journal.old", ".tmp", ".lock")]
+    files += [stem + ".db-wal", stem + ".db-shm", stem + ".db-journal"]
+    archive = archive_path(path)
+    files += [archive, archive + ".tmp", archive + ".lock"]
+    files += [stem + ".sync.json", stem + ".sync.json.tmp"]
+    files += [stem + ".sync.jsonl", stem + ".sync.jsonl.tmp", stem + ".sync.jsonl.lock"]
+    return files
+
+
+class ListEntry:
+    """Viens saraksts manifestā - fails un pēdējie zināmie skaiti (None, ja nav zināmi)"""
+
+    __slots__ = ("id", "name", "file", "completed", "active")
+
+    def __init__(self, list_id, name, file, completed=None, active=None):
+        self.id = list_id
+        self.name = name
+        self.file = file
+        self.completed = completed
+        self.active = active
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["name"], data["file"], data.get("completed"), data.get("active"))
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "file": self.file,
+                "completed": self.completed, "active": self.active}
+
+    @property
+    def total(self):
+        if self.completed is None or self.active is None:
+            return None
+        return self.completed + self.active
+
+
+class ListManifest:
+    """Sarakstu manifests - noklusētais saraksts ir esošais todos.json"""
+
+    def __init__(self, path, base_file, entries, current_id):
+        self.path = path
+        self.base_file = base_file
+        self.entries = entries
+        self.current_id = current_id if any(entry.id == current_id for entry in entries) else entries[0].id
+
+    @classmethod
+    def open(cls, base_file="todos.json"):
+        """Nolasa manifestu - ja tāda nav, ir viens saraksts ar esošo failu"""
+        path = manifest_path(base_file)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = [ListEntry.from_dict(item) for item in data["lists"]]
+            if entries:
+                return cls(path, base_file, entries, data.get("current"))
+        return cls(path, base_file, [ListEntry(DEFAULT_LIST_ID, DEFAULT_LIST_NAME, base_file)], DEFAULT_LIST_ID)
+
+    def save(self):
+        """Saglabā manifestu"""
+        data = {"format": MANIFEST_FORMAT, "current": self.current_id,
+                "lists": [entry.to_dict() for entry in self.entries]}
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    @property
+    def current(self):
+        return self.get(self.current_id)
+
+    def get(self, list_id):
+        """Atrod sarakstu pēc id"""
+        return next((entry for entry in self.entries if entry.id == list_id), None)
+
+    def find(self, ref):
+        """Atrod sarakstu pēc nosaukuma (bez reģistra) vai id"""
+        ref_lower = ref.lower()
+        return next((entry for entry in self.entries if entry.name.lower() == ref_lower or entry.id == ref), None)
+
+    def for_file(self, file):
+        """Atrod sarakstu pēc tā faila"""
+        return next((entry for entry in self.entries if os.path.abspath(entry.file) == os.path.abspath(file)), None)
+
+    def create(self, name):
+        """Pievieno jaunu tukšu sarakstu ar savu failu"""
+        list_id = uuid.uuid4().hex[:8]
+        file = f"{os.path.splitext(self.base_file)[0]}.{list_id}.json"
+        entry = ListEntry(list_id, name, file, 0, 0)
+        self.entries.append(entry)
+        return entry
+
+    def remove(self, list_id):
+        """Izņem sarakstu no manifesta un izdzēš tā failus - pēdējo sarakstu izņemt nevar"""
+        entry = self.get(list_id)
+        if entry is None or len(self.entries) == 1:
+            return None
+        self.entries.remove(entry)
+        if self.current_id == list_id:
+            self.current_id = self.entries[0].id
+        for path in shard_files(entry.file):
+            if os.path.exists(path):
+                os.remove(path)
+        return entry
+
+    def set_counts(self, list_id, completed, active):
+        """Atceras saraksta skaitus - atgriež True, ja tie mainījās"""
+        entry = self.get(list_id)
+        if entry is None or (entry.completed, entry.active) == (completed, active):
+            return False
+        entry.completed, entry.active = completed, active
+        return True
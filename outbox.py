@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# Sinhronizācijas izmaiņu žurnāls (skatīt sync.py).
+#
+# Katra šī datora izmaiņa atzīmē skarto uzdevumu ar izmaiņas laiku failā
+# todos.sync.jsonl, ko sinhronizācija pēc tam nosūta serverim. Modulis ir
+# atsevišķi no sync.py un neimportē tīkla moduļus, jo to izmanto katra
+# komanda, kas maina sarakstu - ne tikai sinhronizācija.
+
+import json
+import os
+import threading
+import time
+
+from storage import FileLock, write_atomic
+
+
+def sync_state_path(path):
+    """Sinhronizācijas stāvoklis blakus sarakstam (todos.json -> todos.sync.json)"""
+    return os.path.splitext(path)[0] + ".sync.json"
+
+
+def outbox_path(path):
+    """Nenosūtīto izmaiņu žurnāls blakus sarakstam (todos.json -> todos.sync.jsonl)"""
+    return os.path.splitext(path)[0] + ".sync.jsonl"
+
+
+def sync_enabled(path):
+    """Vai saraksts jau ir sinhronizēts - tad izmaiņas jāatzīmē arī bez TODO_SYNC_URL"""
+    return os.path.exists(sync_state_path(path))
+
+
+def op_id(op):
+    """Uzdevuma id, ko izmaiņas ieraksts skar"""
+    return op["id"] if "id" in op else op["todo"]["id"]
+
+
+class SyncOutbox:
+    """Šeit mainīto uzdevumu id ar izmaiņas laiku - fails ar rindām {"id", "t"}, kopīgs visām programmām"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(path + ".lock")
+        # Lielākais zināmais izmaiņas laiks - nākamās izmaiņas laiks būs lielāks
+        self.clock = 0.0
+        # Šajā programmā mainītie id kopš pēdējās izmaiņu savākšanas
+        self.recent = set()
+        # Rindas, kas vēl nav uzrakstītas failā - record tiek izsaukts Tk pavedienā, flush fonā
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+
+    def stamp(self):
+        """Jaunas izmaiņas laiks - pulksteņa laiks, bet ne mazāks par jau redzētajiem"""
+        self.clock = max(time.time(), self.clock + 0.001)
+        return self.clock
+
+    def record(self, ops):
+        """Atzīmē izmaiņu ierakstu skartos uzdevumus - tikai atmiņā, failā tos ieraksta flush"""
+        stamp = self.stamp()
+        lines = []
+        for op in ops:
+            todo_id = op_id(op)
+            self.recent.add(todo_id)
+            lines.append(json.dumps({"id": todo_id, "t": stamp}) + "\n")
+        with self._buffer_lock:
+            self._buffer.extend(lines)
+
+    def flush(self):
+        """Pieraksta atzīmētās izmaiņas failā"""
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        try:
+            with self.lock, open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError:
+            # Neuzrakstītās rindas tiks rakstītas nākamreiz - atkārtota rinda failā neko nemaina
+            with self._buffer_lock:
+                self._buffer[:0] = lines
+            raise
+
+    def take(self):
+        """Visas nenosūtītās izmaiņas - {id: pēdējās izmaiņas laiks}"""
+        self.flush()
+        with self.lock:
+            return self._read()
+
+    def discard(self, taken):
+        """Izmet nosūtītās izmaiņas - atgriež id, kas kopš take ir mainīti vēlreiz (arī citās programmās)"""
+        self.flush()
+        with self.lock:
+            entries = self._read()
+            pending = {todo_id: stamp for todo_id, stamp in entries.items() if stamp > taken.get(todo_id, -1)}
+            if len(pending) != len(entries):
+                data = "".join(json.dumps({"id": todo_id, "t": stamp}) + "\n" for todo_id, stamp in pending.items())
+                write_atomic(self.path, data)
+        return set(pending)
+
+    def _read(self):
+        entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Pusrakstīta rinda no pārtrauktas programmas
+                        continue
+                    entries[entry["id"]] = max(entry["t"], entries.get(entry["id"], entry["t"]))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def close(self):
+        """Pieraksta atlikušās izmaiņas un aizver slēdzeni"""
+        self.flush()
+        self.lock.close()
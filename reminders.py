@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+# Termiņi un atgādinājumi.
+#
+# DeadlineTimer glabā visus gaidāmos brīžus (atgādinājumus, tuvāko termiņu,
+# pusnakti) prioritāšu rindā un uztur tikai vienu root.after() taimeri - uz
+# tuvāko no tiem. Taimeris nostrādā tikai tad, kad kaut kas tiešām jādara,
+# tāpēc desmitiem tūkstošu uzdevumu ar termiņiem nav jāpārbauda periodiski.
+# Atcelts vai pārplānots brīdis rindā paliek, līdz tiek izņemts vai rinda
+# tiek pārbūvēta - spēkā esošais laiks katrai atslēgai ir vārdnīcā.
+#
+# Datumi tiek rakstīti latviešu formātā: 24.12.2024 18:00, 24.12., 18:00.
+# Modulis neimportē tkinter - taimerim der jebkas ar after/after_cancel.
+
+import heapq
+import math
+import time
+from datetime import datetime, timedelta
+from itertools import count
+
+# Laiks, ja datumam nav norādīts laiks - termiņš ir dienas beigās, atgādinājums no rīta
+END_OF_DAY = (23, 59)
+MORNING = (9, 0)
+
+DATE_FORMATS = ("%d.%m.%Y", "%Y-%m-%d")
+TIME_FORMAT = "%H:%M"
+
+
+def day_end(now):
+    """Nākamās pusnakts laiks (time.time() vienībās)"""
+    today = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (today + timedelta(days=1)).timestamp()
+
+
+def parse_when(text, default_time=END_OF_DAY, now=None):
+    """Laiks no teksta - "24.12.2024 18:00", "24.12.2024", "24.12.", "18:00" (šodien) vai tukšs (None).
+    Nesaprotams teksts izraisa ValueError."""
+    text = " ".join(text.split())
+    if not text:
+        return None
+    today = datetime.fromtimestamp(time.time() if now is None else now)
+    date_part, _, time_part = text.partition(" ")
+    if not time_part and ":" in date_part:
+        date_part, time_part = "", date_part
+
+    if not date_part:
+        day = today
+    elif date_part.count(".") == 2 and date_part.endswith(".") or date_part.count(".") == 1:
+        # Datums bez gada - šis gads
+        day = _parse(date_part.rstrip(".") + f".{today.year}", ("%d.%m.%Y",), text)
+    else:
+        day = _parse(date_part, DATE_FORMATS, text)
+
+    if time_part:
+        clock = _parse(time_part, (TIME_FORMAT,), text)
+        hour, minute = clock.hour, clock.minute
+    else:
+        hour, minute = default_time
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+
+
+def _parse(value, formats, text):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Nesaprotams datums: {text}")
+
+
+def format_when(timestamp, default_time=END_OF_DAY):
+    """Laiks rediģēšanai - laiks tiek izlaists, ja tas ir noklusētais"""
+    if timestamp is None:
+        return ""
+    moment = datetime.fromtimestamp(timestamp)
+    if (moment.hour, moment.minute) == default_time:
+        return moment.strftime(DATE_FORMATS[0])
+    return moment.strftime(f"{DATE_FORMATS[0]} {TIME_FORMAT}")
+
+
+def format_short(timestamp):
+    """Īss laiks saraksta kolonnai - "24.12." vai "24.12. 18:00" (cita gada datumam ar gadu)"""
+    moment = datetime.fromtimestamp(timestamp)
+    day = "%d.%m." if moment.year == datetime.now().year else "%d.%m.%Y"
+    if (moment.hour, moment.minute) == END_OF_DAY:
+        return moment.strftime(day)
+    return moment.strftime(f"{day} {TIME_FORMAT}")
+
+
+class DeadlineTimer:
+    """Gaidāmie brīži prioritāšu rindā ar vienu after() taimeri tuvākajam
+
+    on_fire saņem visu atslēgu sarakstu, kuru laiks ir pienācis, vienā izsaukumā.
+    """
+
+    # Garākā gaidīšana vienā after() - pēc datora miega vai pulksteņa maiņas rinda tiek pārbaudīta vismaz tik bieži
+    MAX_DELAY_MS = 60 * 60 * 1000
+    # Rinda tiek pārbūvēta, ja tajā ir vairāk nekā divreiz tik ierakstu, cik spēkā esošu atslēgu
+    COMPACT_MIN = 1024
+
+    def __init__(self, root, on_fire):
+        self.root = root
+        self.on_fire = on_fire
+        # (laiks, kārtas numurs, atslēga) - kārtas numurs, lai atslēgas nekad nebūtu jāsalīdzina
+        self._heap = []
+        # Spēkā esošais laiks katrai atslēgai - rindas ieraksti ar citu laiku ir novecojuši
+        self._when = {}
+        self._counter = count()
+        self._job = None
+        self._armed_at = None
+
+    def __len__(self):
+        return len(self._when)
+
+    def __contains__(self, key):
+        return key in self._when
+
+    def schedule(self, key, when):
+        """Ieplāno (vai pārplāno) atslēgu uz laiku when"""
+        self._when[key] = when
+        heapq.heappush(self._heap, (when, next(self._counter), key))
+        self._maybe_compact()
+        if self._armed_at is None or when < self._armed_at:
+            self._arm()
+
+    def schedule_many(self, items):
+        """Ieplāno vairākas (atslēga, laiks) vienā piegājienā"""
+        entries = [(when, next(self._counter), key) for key, when in items]
+        if not entries:
+            return
+        for when, _, key in entries:
+            self._when[key] = when
+        if len(entries) * 8 > len(self._heap):
+            # Salīdzinot ar rindu daudz jaunu ierakstu - pārbūve ir lētāka nekā ievietošana pa vienam
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        self._maybe_compact()
+        if self._armed_at is None or min(entries)[0] < self._armed_at:
+            self._arm()
+
+    def scheduled(self, key):
+        """Atslēgas ieplānotais laiks vai None"""
+        return self._when.get(key)
+
+    def cancel(self, key):
+        """Atceļ atslēgu - rindas ieraksts tiek izmests, kad tas nonāk rindas sākumā"""
+        if self._when.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def clear(self):
+        """Atceļ visu un taimeri"""
+        self._heap = []
+        self._when = {}
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._job = None
+        self._armed_at = None
+
+    def _maybe_compact(self):
+        if len(self._heap) > self.COMPACT_MIN and len(self._heap) > 2 * len(self._when):
+            self._heap = [(when, next(self._counter), key) for key, when in self._when.items()]
+            heapq.heapify(self._heap)
+
+    def _arm(self):
+        """Uzstāda taimeri uz tuvāko spēkā esošo brīdi"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+            self._armed_at = None
+        heap = self._heap
+        while heap and self._when.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            return
+        now = time.time()
+        delay = min(max(0, math.ceil((heap[0][0] - now) * 1000)), self.MAX_DELAY_MS)
+        self._armed_at = now + delay / 1000
+        self._job = self.root.after(delay, self._fire)
+
+    def _fire(self):
+        """Izņem visus pienākušos brīžus, paziņo par tiem un uzstāda taimeri uz nākamo"""
+        self._job = None
+        self._armed_at = None
+        now = time.time()
+        heap = self._heap
+        fired = []
+        while heap and heap[0][0] <= now:
+            when, _, key = heapq.heappop(heap)
+            if self._when.get(key) == when:
+                del self._when[key]
+                fired.append(key)
+        if fired:
+            self.on_fire(fired)
+        if self._job is None:
+            self._arm()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Ilgu darbu plānotājs, kas sadarbojas ar Tk galveno ciklu.
+#
+# Tk logrīkus drīkst aiztikt tikai galvenais pavediens, tāpēc:
+#  - I/O un CPU darbi tiek izpildīti fona pavedienu kopā (submit), un to
+#    rezultāti tiek nodoti atpakaļ Tk pavedienam caur after();
+#  - garš darbs pašā Tk pavedienā tiek sadalīts mazos soļos (run_sliced) un
+#    izpildīts pa daļām - vienā kadrā ne ilgāk par FRAME_BUDGET, lai starp
+#    kadriem Tk paspētu apstrādāt lietotāja ievadi.
+#
+# Modulis neimportē tkinter - tam vajag tikai objektu ar after()/after_cancel().
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Solis var atgriezt WAIT, ja tam pagaidām nav ko darīt (piemēram, gaida fona darba rezultātus)
+WAIT = object()
+
+
+class SlicedTask:
+    """Pa soļiem izpildāms darbs Tk pavedienā"""
+
+    __slots__ = ("steps", "on_done", "cancelled", "done")
+
+    def __init__(self, steps, on_done=None):
+        self.steps = steps
+        self.on_done = on_done
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        """Aptur darbu - atlikušie soļi netiks izpildīti"""
+        self.cancelled = True
+
+
+class TkScheduler:
+    """Savieno Tk galveno ciklu ar fona pavedieniem un sadala garus darbus pa kadriem"""
+
+    # Cik ilgi vienā kadrā drīkst strādāt, pirms atdot vadību Tk (ievades aizture paliek < 50 ms)
+    FRAME_BUDGET = 0.012
+    # Cik bieži pārbaudīt fona darbu rezultātus, kad citu darbu nav
+    POLL_MS = 10
+
+    def __init__(self, root, workers=2):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="todo-worker")
+        # Funkcijas, kas jāizsauc Tk pavedienā - tajās raksta fona pavedieni
+        self._inbox = queue.Queue()
+        self._tasks = []
+        self._pending = 0
+        self._job = None
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """Izpilda funkciju fona pavedienā - on_done(rezultāts) vai on_error(kļūda) tiek izsaukts Tk pavedienā"""
+        self._pending += 1
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(lambda f: self._inbox.put((self._deliver, (f, on_done, on_error))))
+        self._wake(self.POLL_MS)
+        return future
+
+    def call_soon(self, callback, *args):
+        """Izsauc funkciju Tk pavedienā - drīkst lietot no submit() palaista fona darba"""
+        self._inbox.put((callback, args))
+
+    def run_sliced(self, steps, on_done=None):
+        """Izpilda iteratora soļus Tk pavedienā pa daļām, katrā kadrā FRAME_BUDGET ietvaros"""
+        task = SlicedTask(iter(steps), on_done)
+        self._tasks.append(task)
+        self._wake(0)
+        return task
+
+    def finish(self, task):
+        """Pabeidz darbu uzreiz, neievērojot laika budžetu (piemēram, aizverot logu)"""
+        while not task.done and not task.cancelled:
+            self._drain_inbox()
+            result = self._step(task)
+            if result is WAIT:
+                # Gaida nākamo fona darba rezultātu
+                try:
+                    callback, args = self._inbox.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                callback(*args)
+
+    def shutdown(self):
+        """Aptur plānotāju - nepabeigtie fona darbi tiek atcelti"""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wake(self, delay):
+        """Ieplāno nākamo kadru, ja tas vēl nav ieplānots"""
+        if self._job is None:
+            self._job = self.root.after(delay, self._tick)
+
+    def _deliver(self, future, on_done, on_error):
+        """Nodod fona darba rezultātu Tk pavedienā"""
+        self._pending -= 1
+        error = future.exception()
+        if error is not None:
+            if on_error is None:
+                raise error
+            on_error(error)
+        elif on_done is not None:
+            on_done(future.result())
+
+    def _drain_inbox(self, deadline=None):
+        """Izsauc fona pavedienu nodotās funkcijas"""
+        while deadline is None or time.perf_counter() < deadline:
+            try:
+                callback, args = self._inbox.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def _step(self, task):
+        """Izpilda vienu darba soli - atgriež soļa rezultātu"""
+        try:
+            return next(task.steps)
+        except StopIteration:
+            task.done = True
+            self._tasks.remove(task)
+            if task.on_done is not None:
+                task.on_done()
+            return WAIT
+        except BaseException:
+            self._tasks.remove(task)
+            task.cancel()
+            raise
+
+    def _tick(self):
+        """Viens kadrs - fona rezultāti un darbu soļi, kamēr nav iztērēts laika budžets"""
+        self._job = None
+        busy = False
+        try:
+            deadline = time.perf_counter() + self.FRAME_BUDGET
+            self._drain_inbox(deadline)
+
+            # Darbi pārmaiņus pa vienam solim, lai neviens neaizņemtu visu kadru
+            runnable = [task for task in self._tasks if not task.cancelled]
+            self._tasks = runnable[:]
+            while runnable and time.perf_counter() < deadline:
+                for task in runnable[:]:
+                    if task.cancelled or self._step(task) is WAIT:
+                        runnable.remove(task)
+            busy = bool(runnable) or not self._inbox.empty()
+        finally:
+            if busy:
+                # Ir vēl darbs - nākamais kadrs pēc tam, kad Tk apstrādā notikumus
+                self._wake(1)
+            elif self._tasks or self._pending:
+                self._wake(self.POLL_MS)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# Teksta meklēšana uzdevumos.
+#
+# Trigrammu indekss: katram trīs burtu fragmentam tiek glabāta kopa ar
+# uzdevumiem, kuru tekstā tas ir. Vaicājumam tiek šķēlētas tā trigrammu kopas
+# (sākot ar mazāko), un tikai atlikušajiem kandidātiem tiek pārbaudīts pilns
+# teksts. Indekss tiek atjaunots pa vienam uzdevumam pie katras izmaiņas.
+
+from collections import defaultdict
+
+
+def trigrams(text):
+    """Visi trīs burtu fragmenti tekstā"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigrammu indekss uzdevumu tekstiem"""
+
+    def __init__(self, todos=()):
+        self._grams = defaultdict(set)
+        self._texts = {}
+
+        # Pēdējais vaicājums un rezultāts - rakstot nākamo burtu, meklē tikai iepriekšējos rezultātos
+        self._last_query = None
+        self._last_result = None
+
+        for todo in todos:
+            self.add(todo.id, todo.text)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, todo_id, text):
+        """Pievieno uzdevuma tekstu indeksam"""
+        text = text.lower()
+        self._texts[todo_id] = text
+        for gram in trigrams(text):
+            self._grams[gram].add(todo_id)
+        self._last_query = None
+
+    def remove(self, todo_id):
+        """Izņem uzdevumu no indeksa"""
+        text = self._texts.pop(todo_id)
+        for gram in trigrams(text):
+            ids = self._grams[gram]
+            ids.discard(todo_id)
+            if not ids:
+                del self._grams[gram]
+        self._last_query = None
+
+    def update(self, todo_id, text):
+        """Atjauno uzdevuma tekstu - maina tikai tās trigrammas, kas tiešām mainījās"""
+        old_text = self._texts[todo_id]
+        text = text.lower()
+        if old_text == text:
+            return
+        old_grams = trigrams(old_text)
+        new_grams = trigrams(text)
+        for gram in old_grams - new_grams:
+            ids = self._grams[gram]
+            ids.discard(todo_id)
+            if not ids:
+                del self._grams[gram]
+        for gram in new_grams - old_grams:
+            self._grams[gram].add(todo_id)
+        self._texts[todo_id] = text
+        self._last_query = None
+
+    def matches(self, todo_id, query):
+        """Vai uzdevums atbilst vaicājumam"""
+        return query.lower() in self._texts.get(todo_id, "")
+
+    def search(self, query):
+        """Atgriež kopu ar uzdevumu id, kuru tekstā ir vaicājums"""
+        query = query.lower()
+
+        # Ja vaicājums ir iepriekšējā paplašinājums, rezultāts ir iepriekšējā apakškopa
+        if self._last_query is not None and self._last_query in query:
+            candidates = self._last_result
+        elif len(query) < 3:
+            # Īsiem vaicājumiem trigrammu nav - pārbauda visus tekstus
+            candidates = self._texts.keys()
+        else:
+            gram_sets = sorted((self._grams.get(gram, ()) for gram in trigrams(query)), key=len)
+            candidates = set(gram_sets[0])
+            for ids in gram_sets[1:]:
+                if not candidates:
+                    break
+                candidates &= ids
+
+        texts = self._texts
+        result = {todo_id for todo_id in candidates if query in texts[todo_id]}
+        self._last_query = query
+        self._last_result = result
+        return result
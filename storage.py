@@ -0,0 +1,1152 @@
+# -*- coding: utf-8 -*-
+
+# Uzdevumu glabāšana diskā.
+#
+# Pilna todos.json pārrakstīšana pie katras izmaiņas maksā O(N), tāpēc katra
+# izmaiņa (pievienošana, pārslēgšana, rediģēšana, dzēšana) tiek pierakstīta
+# žurnālā kā viens mazs ieraksts. Ielādējot tiek nolasīts momentuzņēmums
+# (todos.json) un pēc tam atkārtoti izpildīti žurnāla ieraksti. Kad žurnāls
+# kļūst pārāk liels, fonā tiek uzrakstīts jauns momentuzņēmums.
+#
+# Lieliem sarakstiem ir pieejama arī SQLite krātuve, kur katra izmaiņa ir
+# viens INSERT/UPDATE/DELETE pēc uzdevuma id, un binārā krātuve - tas pats
+# žurnāls, bet momentuzņēmums ir binsnap formātā un tiek atvērts ar mmap.
+#
+# Katram uzdevumam ir pastāvīgs id, kas tiek glabāts failā. Izmaiņu ieraksti
+# norāda id, nevis pozīciju sarakstā, tāpēc dzēšana neietekmē citus ierakstus.
+#
+# Lai disks nekad neaizturētu lietotāja saskarni, BackgroundSaver raksta
+# izmaiņas atsevišķā pavedienā un apvieno vairākas secīgas izmaiņas vienā
+# rakstīšanas reizē.
+#
+# Vienu sarakstu drīkst vienlaikus atvērt vairākas programmas (divi logi,
+# logs un komandrinda). Žurnāls tiek rakstīts, lasīts un saspiests tikai ar
+# slēdzeni (blakus fails .lock), un pirms savu izmaiņu pierakstīšanas krātuve
+# nolasa žurnāla galu, ko kopš pēdējās reizes pierakstījušas citas
+# programmas - tā seq paliek augošs un neviena izmaiņa netiek pārrakstīta.
+# changed() tikai salīdzina failu os.stat ar iepriekšējo, un read_changes()
+# nodod svešās izmaiņas kā tos pašus izmaiņu ierakstus, lai lietotne varētu
+# atjaunot tikai skartās rindas.
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    # Windows - slēdzene ar msvcrt
+    fcntl = None
+    import msvcrt
+
+import binsnap
+
+# Momentuzņēmuma formāta nosaukums - vecie faili ir vienkāršs saraksts
+SNAPSHOT_FORMAT = "todo-snapshot"
+
+# Momentuzņēmuma sākums, ko raksta _write_snapshot - ļauj lasīt uzdevumus pa vienam
+SNAPSHOT_HEADER = re.compile(
+    r'\s*\{\s*"format"\s*:\s*"' + SNAPSHOT_FORMAT + r'"\s*,\s*"seq"\s*:\s*(\d+)\s*,\s*"todos"\s*:\s*\['
+)
+
+# Cik uzdevumus nodot vienā porcijā, ielādējot pa daļām
+LOAD_BATCH_SIZE = 2000
+
+
+def write_atomic(path, data):
+    """Ieraksta failu caur pagaidu failu un pārdēvēšanu, lai nekad nepaliktu pusrakstīts fails"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def file_signature(path):
+    """Faila (ierīce, inode, izmērs, mainīšanas laiks) vai None - lēti pārbaudīt, vai fails ir mainīts"""
+    try:
+        return stat_signature(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+def stat_signature(st):
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class FileLock:
+    """Slēdzene starp programmām ar blakus failu - vienas programmas pavedieniem tā darbojas kā RLock"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                # Fails paliek atvērts līdz close() - katra slēgšana ir tikai viens sistēmas izsaukums
+                if self._file is None:
+                    self._file = open(self.path, "a+b")
+                _lock_file(self._file)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                _unlock_file(self._file)
+        finally:
+            self._thread_lock.release()
+
+    def close(self):
+        """Aizver slēdzenes failu"""
+        with self._thread_lock:
+            if self._file is not None and self._depth == 0:
+                self._file.close()
+                self._file = None
+
+
+def _lock_file(f):
+    """Gaida, kamēr slēdzenes failu atlaiž citas programmas"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gaida tikai 10 sekundes - gaida tālāk
+            pass
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def new_todo_id():
+    """Izveido jaunu, unikālu uzdevuma id"""
+    return uuid.uuid4().hex
+
+
+def ensure_ids(todos):
+    """Piešķir id uzdevumiem no vecajiem failiem - atgriež True, ja kaut kas tika mainīts"""
+    upgraded = False
+    for todo in todos:
+        if "id" not in todo:
+            todo["id"] = new_todo_id()
+            upgraded = True
+    return upgraded
+
+
+def iter_json_array(f, buf, pos, chunk_size=1 << 16):
+    """Nolasa JSON masīva elementus pa vienam - buf[pos] ir uzreiz aiz atverošās iekavas"""
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        # Izlaiž atstarpes un komatus starp elementiem
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+        if pos >= len(buf):
+            raise ValueError("Negaidītas faila beigas")
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            # Elements vēl nav pilnībā nolasīts
+            more = f.read(chunk_size)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+
+# Kolonnas, ko nolasa SQLite krātuve - secība atbilst row_to_dict
+SQLITE_COLUMNS = "uid, text, completed, completed_at, due, remind_at, tags, priority"
+
+
+def tags_column(tags):
+    """Birkas SQLite kolonnai - atdalītas ar atstarpi (birkās atstarpju nav), bez birkām NULL"""
+    return " ".join(tags) if tags else None
+
+
+def row_to_dict(row):
+    """SQLite rinda (uid, text, completed, completed_at, due, remind_at, tags, priority) -> uzdevuma ieraksts"""
+    uid, text, completed, completed_at, due, remind_at, tags, priority = row
+    data = {"id": uid, "text": text, "completed": bool(completed)}
+    if completed_at is not None:
+        data["completed_at"] = completed_at
+    if due is not None:
+        data["due"] = due
+    if remind_at is not None:
+        data["remind_at"] = remind_at
+    if tags:
+        data["tags"] = tags.split()
+    if priority:
+        data["priority"] = priority
+    return data
+
+
+def snapshot_of(todos):
+    """Neatkarīga saraksta kopija rakstīšanai - pieņem gan TodoStore, gan vārdnīcu sarakstu"""
+    if hasattr(todos, "to_dicts"):
+        return todos.to_dicts()
+    return [dict(todo) for todo in todos]
+
+
+def replay_ops(todos, ops):
+    """Izpilda izmaiņu ierakstus uz uzdevumu sarakstu"""
+    by_id = {todo["id"]: todo for todo in todos if "id" in todo}
+    # Dzēstos uzdevumus izņem no saraksta vienā piegājienā beigās
+    removed = set()
+
+    def drop_removed():
+        todos[:] = [todo for todo in todos if id(todo) not in removed]
+        removed.clear()
+
+    for op in ops:
+        # Vecie ieraksti norāda pozīciju, nevis id - tiem saraksts jāsakārto uzreiz
+        if "index" in op and removed:
+            drop_removed()
+
+        # Ieraksti par uzdevumiem, kuru vairs nav, tiek izlaisti
+        kind = op["op"]
+        if kind == "add":
+            if op["todo"].get("id") in by_id:
+                # Izmaiņa, kas jau ir sarakstā (pielikta kopijai vēlreiz), uzdevumu nedublē
+                continue
+            todo = dict(op["todo"])
+            before = by_id.get(op.get("before"))
+            if before is not None:
+                # Atjaunots uzdevums - tas atgriežas savā iepriekšējā vietā
+                todos.insert(next(i for i, item in enumerate(todos) if item is before), todo)
+            else:
+                todos.append(todo)
+            if "id" in todo:
+                by_id[todo["id"]] = todo
+        elif kind == "update":
+            target = by_id.get(op["id"]) if "id" in op else todos[op["index"]]
+            if target is not None:
+                target.update(op["fields"])
+        elif kind == "delete":
+            if "id" in op:
+                if op["id"] in by_id:
+                    removed.add(id(by_id.pop(op["id"])))
+            else:
+                by_id.pop(todos.pop(op["index"]).get("id"), None)
+        else:
+            raise ValueError(f"Nezināms izmaiņas veids: {kind}")
+
+    if removed:
+        drop_removed()
+
+
+# Uzdevuma ieraksta lauki un to vērtības, ja lauka ierakstā nav
+FIELD_DEFAULTS = {
+    "text": "", "completed": False, "completed_at": None, "due": None, "remind_at": None, "tags": [], "priority": 0,
+}
+
+
+def diff_op(old, new):
+    """Izmaiņa, kas uzdevuma ierakstu old pārvērš par new - None, ja tie ir vienādi"""
+    fields = {}
+    for key, default in FIELD_DEFAULTS.items():
+        value = new.get(key, default)
+        if key == "tags":
+            value = list(value or ())
+            changed = value != list(old.get(key) or ())
+        else:
+            changed = value != old.get(key, default)
+        if changed:
+            fields[key] = value
+    if not fields:
+        return None
+    if "completed" in fields or "completed_at" in fields:
+        # Pabeigšana vienmēr tiek rakstīta kopā ar tās laiku
+        fields["completed"] = new.get("completed", False)
+        fields["completed_at"] = new.get("completed_at")
+    return {"op": "update", "id": new["id"], "fields": fields}
+
+
+def touched_fields(ops, into=None):
+    """Kurus laukus izmaiņas maina katram uzdevumam - {id: lauku kopa}, pievienošanai un dzēšanai tukša"""
+    touched = {} if into is None else into
+    for op in ops:
+        if op["op"] == "update":
+            touched.setdefault(op["id"], set()).update(op["fields"])
+        else:
+            touched.setdefault(op["id"] if "id" in op else op["todo"]["id"], set())
+    return touched
+
+
+def supersede(ops, touched):
+    """Izmet no citas programmas izmaiņām laukus, kurus vēlāk ir mainījusi šī programma (touched_fields)"""
+    if not touched:
+        return ops
+    result = []
+    for op in ops:
+        fields = touched.get(op.get("id")) if op["op"] == "update" else None
+        if fields:
+            kept = {key: value for key, value in op["fields"].items()
+                    if key not in fields and not (key == "completed_at" and "completed" in fields)}
+            if not kept:
+                continue
+            op = dict(op, fields=kept)
+        result.append(op)
+    return result
+
+
+class TodoStorage:
+    """Krātuves saskarne - visas krātuves implementē šīs metodes"""
+
+    # Vai pēc ielādes ir jāsaglabā viss saraksts (piemēram, vecam failam tika piešķirti id)
+    needs_full_save = False
+    # Pēdējā read_changes marķieris, kura izmaiņas lietotne jau ir izpildījusi atmiņā
+    merged = 0
+    # Slēdzene starp programmām (FileLock) - None, ja krātuve tādu neizmanto
+    lock = None
+
+    def load(self):
+        """Ielādē visus uzdevumus"""
+        raise NotImplementedError
+
+    def iter_load(self):
+        """Ielādē pa daļām - dod ("todos", porcija), ("progress", daļa) un beigās ("ops", izmaiņas)"""
+        yield "todos", self.load()
+        yield "progress", 1.0
+
+    def append(self, op):
+        """Saglabā vienu izmaiņu"""
+        raise NotImplementedError
+
+    def append_many(self, ops):
+        """Saglabā vairākas izmaiņas vienā rakstīšanas reizē"""
+        for op in ops:
+            self.append(op)
+
+    def save(self, todos, merged=None):
+        """Saglabā visu sarakstu no jauna - merged ir self.merged brīdī, kad tika izveidota kopija"""
+        raise NotImplementedError
+
+    def needs_compaction(self):
+        """Vai krātuvei ir nepieciešama apkope"""
+        return False
+
+    def start_compaction(self, snapshot, merged=None):
+        """Sāk apkopi no dotās saraksta kopijas"""
+        pass
+
+    def maybe_compact(self, todos):
+        """Veic apkopi, ja tā ir nepieciešama"""
+        if self.needs_compaction():
+            self.start_compaction(snapshot_of(todos), self.merged)
+
+    def changed(self):
+        """Vai cita programma ir mainījusi sarakstu - tiek saukts periodiski, tāpēc jābūt gandrīz bez maksas"""
+        return False
+
+    def read_changes(self):
+        """Citu programmu izmaiņas - ("ops", izmaiņas, marķieris) vai ("todos", viss saraksts, marķieris),
+        ja tās nevar nolasīt pa vienai. Kad tās ir izpildītas, lietotne iestata merged = marķieris"""
+        return "ops", [], self.merged
+
+    def counts(self, todos):
+        """Atgriež (pabeigti, aktīvi) skaitu"""
+        completed = sum(1 for todo in todos if todo.get("completed", False))
+        return completed, len(todos) - completed
+
+    def close(self, todos):
+        """Saglabā visu un atbrīvo resursus"""
+        self.save(todos)
+
+    def release(self):
+        """Atbrīvo resursus bez pilnas saglabāšanas - visas izmaiņas jau ir pierakstītas"""
+        pass
+
+
+class JournalStorage(TodoStorage):
+    """Momentuzņēmums + tikai-pievienošanas žurnāls, ko var koplietot vairākas programmas"""
+
+    # Pēc cik baitiem žurnālā sākt saspiešanu
+    COMPACT_THRESHOLD = 1024 * 1024
+
+    def __init__(self, path, compact_threshold=None):
+        self.path = path
+        self.journal_path = path + ".journal"
+        # Žurnāls, kas tiek iekļauts momentuzņēmumā, kamēr notiek saspiešana - paliek tikai pēc avārijas
+        self.rotated_path = path + ".journal.old"
+        if compact_threshold is not None:
+            self.COMPACT_THRESHOLD = compact_threshold
+        # Failus raksta un lasa tikai ar šo slēdzeni, lai citas programmas tos nemainītu pa vidu
+        self.lock = FileLock(path + ".lock")
+
+        self._seq = 0
+        # Cik baitu no žurnāla jau ir nolasīti vai uzrakstīti - citu programmu izmaiņas ir aiz tiem
+        self._journal_size = 0
+        # Žurnāla un momentuzņēmuma file_signature pēc pēdējās lasīšanas vai rakstīšanas
+        self._journal_sig = None
+        self._snapshot_sig = None
+        # Citu programmu izmaiņas, kas ir nolasītas, bet vēl nav nodotas lietotnei
+        self._incoming = []
+        # Cik read_changes porciju ar izmaiņām ir nodotas lietotnei - salīdzina ar merged
+        self._delivered = 0
+        # Cita programma saspieda žurnālu, kurā bija šeit neredzētas izmaiņas - jānolasa viss saraksts
+        self._stale = False
+
+    def load(self):
+        """Ielādē momentuzņēmumu un atkārto žurnāla ierakstus"""
+        todos = []
+        ops = []
+        for kind, payload in self.iter_load():
+            if kind == "todos":
+                todos.extend(payload)
+            elif kind == "ops":
+                ops.extend(payload)
+        replay_ops(todos, ops)
+
+        # Iepriekšējā saspiešana tika pārtraukta vai fails ir vecs un bez id - saglabā uzreiz
+        if self.needs_full_save:
+            self.compact(todos)
+            self.needs_full_save = False
+
+        return todos
+
+    def iter_load(self, batch_size=LOAD_BATCH_SIZE):
+        """Nolasa momentuzņēmumu pa porcijām, nesagaidot visa faila parsēšanu"""
+        # Kamēr saraksts tiek lasīts, citas programmas to nemaina
+        with self.lock:
+            self.needs_full_save = False
+            snapshot_seq = yield from self._iter_snapshot(batch_size)
+            yield "progress", 1.0
+
+            ops = self._read_journal(self.rotated_path, snapshot_seq)[0]
+            journal_ops, self._journal_size = self._read_journal(self.journal_path, snapshot_seq)
+            ops.extend(journal_ops)
+            self._seq = max([snapshot_seq] + [op["seq"] for op in ops])
+            # Vecos žurnālos pievienotajiem uzdevumiem var nebūt id
+            self._upgrade_batch([op["todo"] for op in ops if op["op"] == "add"])
+            if ops:
+                yield "ops", ops
+
+            self._journal_sig = self._drop_torn_line(file_signature(self.journal_path), self._journal_size)
+            self._snapshot_sig = file_signature(self.path)
+            self._incoming = []
+            self._stale = False
+            self.merged = self._delivered
+            if os.path.exists(self.rotated_path):
+                self.needs_full_save = True
+
+    def _iter_snapshot(self, batch_size):
+        """Dod momentuzņēmuma uzdevumus porcijās - atgriež momentuzņēmuma seq"""
+        if not os.path.exists(self.path):
+            return 0
+        size = max(1, os.path.getsize(self.path))
+        with open(self.path, "r", encoding="utf-8") as f:
+            snapshot_seq, items = self._open_snapshot(f)
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield "todos", self._upgrade_batch(batch)
+                    yield "progress", min(1.0, f.tell() / size)
+                    batch = []
+            if batch:
+                yield "todos", self._upgrade_batch(batch)
+        return snapshot_seq
+
+    def _snapshot_seq(self):
+        """Momentuzņēmuma seq - no JSON faila tiek nolasīta tikai galvene"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return self._open_snapshot(f)[0]
+        except FileNotFoundError:
+            return 0
+
+    def _upgrade_batch(self, todos):
+        """Piešķir trūkstošos id un atceras, ka fails pēc ielādes jāsaglabā"""
+        if ensure_ids(todos):
+            self.needs_full_save = True
+        return todos
+
+    def _open_snapshot(self, f):
+        """Atrod momentuzņēmuma uzdevumu masīvu - atgriež (seq, uzdevumu iterators)"""
+        buf = f.read(1 << 16)
+        stripped = buf.lstrip()
+        if stripped.startswith("["):
+            # Vecais formāts - vienkāršs saraksts
+            return 0, iter_json_array(f, buf, buf.index("[") + 1)
+
+        match = SNAPSHOT_HEADER.match(buf)
+        if match:
+            return int(match.group(1)), iter_json_array(f, buf, match.end())
+
+        # Nezināms atslēgu izkārtojums - nolasa visu failu vienā reizē
+        data = json.loads(buf + f.read())
+        if isinstance(data, list):
+            return 0, iter(data)
+        return data.get("seq", 0), iter(data["todos"])
+
+    def _read_journal(self, journal_path, snapshot_seq, offset=0):
+        """Nolasa žurnāla pilnās rindas no offset - atgriež (ieraksti pēc momentuzņēmuma, nolasītā beigu pozīcija)"""
+        ops = []
+        try:
+            f = open(journal_path, "rb")
+        except FileNotFoundError:
+            return ops, 0
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Pusrakstīta rinda, ja programma avarēja rakstīšanas laikā
+                    break
+                offset += len(line)
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    # Vecas avārijas pēdas - rinda, kurai pierakstīts klāt nākamais ieraksts
+                    continue
+                if op["seq"] > snapshot_seq:
+                    ops.append(op)
+        return ops, offset
+
+    def _read_all(self):
+        """Nolasa visu sarakstu no failiem, nemainot lasīšanas stāvokli - slēdzenei jābūt paņemtai"""
+        todos = []
+        items = self._iter_snapshot(LOAD_BATCH_SIZE)
+        try:
+            while True:
+                kind, payload = next(items)
+                if kind == "todos":
+                    todos.extend(payload)
+        except StopIteration as done:
+            snapshot_seq = done.value
+        ops = []
+        for journal_path in (self.rotated_path, self.journal_path):
+            ops.extend(self._read_journal(journal_path, snapshot_seq)[0])
+        replay_ops(todos, ops)
+        return todos
+
+    def _catch_up(self):
+        """Nolasa, ko citas programmas uzrakstījušas kopš pēdējās reizes - slēdzenei jābūt paņemtai"""
+        snapshot_sig = file_signature(self.path)
+        if snapshot_sig != self._snapshot_sig:
+            # Cita programma saspieda žurnālu - izmaiņas, kuras šeit vēl nav redzētas, tagad ir tikai momentuzņēmumā
+            self._snapshot_sig = snapshot_sig
+            snapshot_seq = self._snapshot_seq()
+            if snapshot_seq > self._seq:
+                self._seq = snapshot_seq
+                self._stale = True
+
+        journal_sig = file_signature(self.journal_path)
+        if journal_sig == self._journal_sig:
+            return
+        if (journal_sig is None or self._journal_sig is None or journal_sig[:2] != self._journal_sig[:2]
+                or journal_sig[2] < self._journal_size):
+            # Jauns žurnāla fails - jau redzētos ierakstus izlaiž pēc seq
+            self._journal_size = 0
+        ops, end = self._read_journal(self.journal_path, self._seq, self._journal_size)
+        self._journal_size = end
+        self._journal_sig = self._drop_torn_line(journal_sig, end)
+        if ops:
+            self._seq = max(self._seq, max(op["seq"] for op in ops))
+            self._incoming.extend(ops)
+
+    def _drop_torn_line(self, journal_sig, end):
+        """Nogriež žurnālu līdz end - atgriež jauno file_signature. Slēdzenei jābūt paņemtai"""
+        if journal_sig is None or end >= journal_sig[2]:
+            return journal_sig
+        # Slēdzeni tur šī programma, tātad pusrakstītā rinda ir no avārijas - tā jānoņem pirms rakstīšanas,
+        # citādi nākamais ieraksts pielīp tai klāt un nolasot tiek izlaists
+        with open(self.journal_path, "r+b") as f:
+            f.truncate(end)
+        return file_signature(self.journal_path)
+
+    def changed(self):
+        """Vai cita programma kopš pēdējās reizes ir rakstījusi - divi os.stat, ja nekas nav mainīts"""
+        return (bool(self._incoming) or self._stale or file_signature(self.journal_path) != self._journal_sig
+                or file_signature(self.path) != self._snapshot_sig)
+
+    def read_changes(self):
+        """Citu programmu izmaiņas - pa vienai, ja žurnāls kopš pēdējās reizes nav saspiests"""
+        with self.lock:
+            self._catch_up()
+            if self._stale:
+                self._stale = False
+                self._incoming = []
+                self._delivered += 1
+                return "todos", self._read_all(), self._delivered
+            if not self._incoming:
+                return "ops", [], self._delivered
+            ops, self._incoming = self._incoming, []
+            self._delivered += 1
+            return "ops", ops, self._delivered
+
+    def append(self, op):
+        """Pievieno vienu izmaiņu žurnālam - izmaksas nav atkarīgas no saraksta garuma"""
+        self.append_many([op])
+
+    def append_many(self, ops):
+        """Pievieno vairākas izmaiņas ar vienu rakstīšanu aiz visām citu programmu izmaiņām"""
+        with self.lock:
+            self._catch_up()
+            if self._incoming:
+                # Nenodotās svešās izmaiņas žurnālā ir pirms šīm - laukus, ko šīs pārraksta, atmiņā atjaunot nedrīkst
+                self._incoming = supersede(self._incoming, touched_fields(ops))
+            lines = []
+            for seq, op in enumerate(ops, self._seq + 1):
+                lines.append(json.dumps(dict(op, seq=seq), ensure_ascii=False) + "\n")
+            data = "".join(lines).encode("utf-8")
+            # Fails netiek turēts atvērts - citādi cita programma to nevarētu pārdēvēt saspiešanai (Windows)
+            with open(self.journal_path, "ab", buffering=0) as f:
+                start = f.seek(0, os.SEEK_END)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[f.write(view):]
+                except OSError:
+                    # Daļa rindu varēja tikt uzrakstīta - tās tiek noņemtas, lai atkārtots mēģinājums tās nedublētu
+                    f.truncate(start)
+                    raise
+                self._journal_sig = stat_signature(os.fstat(f.fileno()))
+            self._seq += len(ops)
+            self._journal_size += len(data)
+
+    def needs_compaction(self):
+        """Vai žurnāls ir pietiekami liels, lai to saspiestu"""
+        return self._journal_size >= self.COMPACT_THRESHOLD
+
+    def start_compaction(self, snapshot, merged=None):
+        """Saspiež žurnālu - snapshot ir saraksts pēc visām jau pierakstītajām izmaiņām.
+        Fona rakstītājs to sauc savā pavedienā, tāpēc jaunās izmaiņas pa to laiku gaida rindā"""
+        with self.lock:
+            self._catch_up()
+            if not self.needs_compaction() and not os.path.exists(self.rotated_path):
+                # Cita programma jau saspieda žurnālu
+                return
+            self._compact(snapshot, merged)
+
+    def compact(self, todos, merged=None):
+        """Uzreiz uzraksta momentuzņēmumu un iztukšo žurnālu"""
+        with self.lock:
+            self._catch_up()
+            self._compact(snapshot_of(todos), merged)
+
+    def save(self, todos, merged=None):
+        """Pilna saglabāšana ir tas pats, kas saspiešana"""
+        self.compact(todos, merged)
+
+    def _compact(self, snapshot, merged):
+        """Uzraksta momentuzņēmumu ar visām žurnāla izmaiņām - slēdzenei jābūt paņemtai"""
+        snapshot = self._complete(snapshot, merged)
+        # Žurnāls tiek pārdēvēts, lai pēc avārijas tā ieraksti tiktu nolasīti vēlreiz
+        self._rotate_journal()
+        self._write_snapshot(snapshot, self._seq)
+        self._snapshot_sig = file_signature(self.path)
+
+    def _complete(self, snapshot, merged):
+        """Papildina kopiju ar citu programmu izmaiņām, kuru tajā vēl nav"""
+        if merged is None:
+            return snapshot
+        if self._stale or merged != self._delivered:
+            # Daļa izmaiņu kopijā nav un pa vienai vairs nav pieejama - saraksts tiek nolasīts no failiem
+            return self._read_all()
+        replay_ops(snapshot, self._incoming)
+        return snapshot
+
+    def _rotate_journal(self):
+        """Pārdēvē žurnālu par saspiežamo - nākamās izmaiņas rakstīsies jaunā failā"""
+        if os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.rotated_path)
+        self._journal_size = 0
+        self._journal_sig = None
+
+    def _write_snapshot(self, todos, seq):
+        """Uzraksta momentuzņēmumu un izdzēš tajā iekļauto žurnālu"""
+        data = json.dumps({"format": SNAPSHOT_FORMAT, "seq": seq, "todos": todos}, ensure_ascii=False)
+        write_atomic(self.path, data)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def release(self):
+        """Aizver slēdzenes failu - visas izmaiņas jau ir uzrakstītas"""
+        self.lock.close()
+
+    def close(self, todos):
+        """Saspiež žurnālu un aizver slēdzenes failu"""
+        with self.lock:
+            self._catch_up()
+            if self._journal_size or not os.path.exists(self.path):
+                self._compact(snapshot_of(todos), self.merged)
+        self.lock.close()
+
+
+class BinaryStorage(JournalStorage):
+    """Binārs momentuzņēmums (binsnap) + tas pats žurnāls - lieliem sarakstiem"""
+
+    def __init__(self, path, migrate_from=None, compact_threshold=None):
+        super().__init__(path, compact_threshold)
+        self.migrate_from = migrate_from
+
+    def _iter_snapshot(self, batch_size):
+        """Nolasa momentuzņēmumu caur mmap - porcijas dekodē tikai tad, kad tās tiek prasītas"""
+        self._migrate()
+        if not os.path.exists(self.path):
+            return 0
+        with binsnap.SnapshotReader(self.path) as reader:
+            total = max(1, len(reader))
+            done = 0
+            for batch in reader.iter_batches(batch_size):
+                done += len(batch)
+                yield "todos", batch
+                yield "progress", done / total
+            return reader.seq
+
+    def _snapshot_seq(self):
+        """Momentuzņēmuma seq no binārās galvenes"""
+        try:
+            with binsnap.SnapshotReader(self.path) as reader:
+                return reader.seq
+        except FileNotFoundError:
+            return 0
+
+    def _migrate(self):
+        """Vienreizēja pārnešana no todos.json - vecais fails paliek neskarts"""
+        if os.path.exists(self.path) or not self.migrate_from:
+            return
+        # Komandrinda momentuzņēmumu neraksta, tāpēc sarakstam var būt tikai žurnāls
+        if not any(os.path.exists(path) for path in (self.migrate_from, self.migrate_from + ".journal")):
+            return
+        source = JournalStorage(self.migrate_from)
+        todos = source.load()
+        source.release()
+        binsnap.write_snapshot(self.path, todos)
+
+    def _write_snapshot(self, todos, seq):
+        """Uzraksta bināro momentuzņēmumu un izdzēš tajā iekļauto žurnālu"""
+        binsnap.write_snapshot(self.path, todos, seq)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+
+class SqliteStorage(TodoStorage):
+    """SQLite krātuve - katra izmaiņa ir viena rinda, nevis viss fails"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY,
+            uid TEXT,
+            position INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            completed_at REAL,
+            due REAL,
+            remind_at REAL,
+            tags TEXT,
+            priority INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    INDEXES = """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_todos_uid ON todos (uid);
+        CREATE INDEX IF NOT EXISTS idx_todos_position ON todos (position);
+        CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos (completed, position);
+    """
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        self.migrate_from = migrate_from
+        # Savienojumu izmanto arī fona rakstītājs un izmaiņu pārbaude - nekad vienlaicīgi (skatīt _lock)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._upgrade_schema()
+        self.conn.executescript(self.INDEXES)
+        self._next_position = 0
+        # Savienojumu lieto vairāki pavedieni - pārbaude no Tk pavediena negaida, ja tas ir aizņemts
+        self._lock = threading.Lock()
+        # PRAGMA data_version pēc pēdējās lasīšanas - tas mainās tikai no citu savienojumu rakstīšanas
+        self._data_version = None
+        self._delivered = 0
+
+    def _upgrade_schema(self):
+        """Vecām datubāzēm pievieno uid kolonnu un piešķir id katram uzdevumam"""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(todos)")]
+        with self.conn:
+            if "uid" not in columns:
+                self.conn.execute("ALTER TABLE todos ADD COLUMN uid TEXT")
+            for column in ("completed_at", "due", "remind_at"):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE todos ADD COLUMN {column} REAL")
+            for column, kind in (("tags", "TEXT"), ("priority", "INTEGER")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE todos ADD COLUMN {column} {kind}")
+            rows = self.conn.execute("SELECT id FROM todos WHERE uid IS NULL").fetchall()
+            self.conn.executemany("UPDATE todos SET uid = ? WHERE id = ?",
+                                  ((new_todo_id(), row_id) for (row_id,) in rows))
+
+    def load(self):
+        """Ielādē uzdevumus ievietošanas secībā"""
+        todos = []
+        for kind, payload in self.iter_load():
+            if kind == "todos":
+                todos.extend(payload)
+        return todos
+
+    def iter_load(self, batch_size=LOAD_BATCH_SIZE):
+        """Nolasa uzdevumus porcijās ievietošanas secībā"""
+        self._migrate()
+        last = self.conn.execute("SELECT MAX(position) FROM todos").fetchone()[0]
+        self._next_position = 0 if last is None else last + 1
+        total = max(1, self.conn.execute("SELECT COUNT(*) FROM todos").fetchone()[0])
+
+        cursor = self.conn.execute(f"SELECT {SQLITE_COLUMNS} FROM todos ORDER BY position")
+        done = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            done += len(rows)
+            yield "todos", [row_to_dict(row) for row in rows]
+            yield "progress", done / total
+        yield "progress", 1.0
+        self._data_version = self._version()
+        self.merged = self._delivered
+
+    def _version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self):
+        """Vai cits savienojums (cita programma) ir mainījis datubāzi"""
+        if self._data_version is None or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            return self._version() != self._data_version
+        finally:
+            self._lock.release()
+
+    def read_changes(self):
+        """Datubāzē nav izmaiņu žurnāla - pēc citas programmas rakstīšanas tiek nolasīts viss saraksts"""
+        with self._lock:
+            version = self._version()
+            if version == self._data_version:
+                return "ops", [], self._delivered
+            self._data_version = version
+            self._delivered += 1
+            return "todos", self._select(), self._delivered
+
+    def _migrate(self):
+        """Vienreizēja pārnešana no vecā todos.json formāta"""
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()
+        if done is not None or not self.migrate_from or not os.path.exists(self.migrate_from):
+            return
+
+        source = JournalStorage(self.migrate_from)
+        todos = source.load()
+        source.release()
+        with self.conn:
+            self._insert_all(todos)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                              (self.migrate_from,))
+
+    def _insert_all(self, todos):
+        """Ieraksta visu sarakstu tukšā tabulā"""
+        self.conn.executemany(
+            "INSERT INTO todos (uid, position, text, completed, completed_at, due, remind_at, tags, priority) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((todo["id"], i, todo["text"], int(todo.get("completed", False)), todo.get("completed_at"),
+              todo.get("due"), todo.get("remind_at"), tags_column(todo.get("tags")), todo.get("priority"))
+             for i, todo in enumerate(snapshot_of(todos)))
+        )
+
+    def append(self, op):
+        """Izpilda vienu izmaiņu kā vienu SQL darbību"""
+        self.append_many([op])
+
+    def append_many(self, ops):
+        """Izpilda vairākas izmaiņas vienā transakcijā"""
+        with self._lock, self.conn:
+            # Rakstīšanas transakcija uzreiz - cita programma pa vidu nevar pievienot rindas tajās pašās pozīcijās
+            self.conn.execute("BEGIN IMMEDIATE")
+            last = self.conn.execute("SELECT MAX(position) FROM todos").fetchone()[0]
+            if last is not None:
+                self._next_position = max(self._next_position, last + 1)
+            for op in ops:
+                self._execute_op(op)
+
+    def _execute_op(self, op):
+        kind = op["op"]
+        if kind == "add":
+            todo = op["todo"]
+            position = self._position_before(op.get("before"))
+            if position is None:
+                position = self._next_position
+                self._next_position += 1
+            self.conn.execute(
+                "INSERT INTO todos (uid, position, text, completed, completed_at, due, remind_at, tags, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (todo["id"], position, todo["text"], int(todo.get("completed", False)), todo.get("completed_at"),
+                 todo.get("due"), todo.get("remind_at"), tags_column(todo.get("tags")), todo.get("priority"))
+            )
+        elif kind == "update":
+            fields = op["fields"]
+            if "text" in fields:
+                self.conn.execute("UPDATE todos SET text = ? WHERE uid = ?", (fields["text"], op["id"]))
+            if "completed" in fields:
+                self.conn.execute("UPDATE todos SET completed = ?, completed_at = ? WHERE uid = ?",
+                                  (int(fields["completed"]), fields.get("completed_at"), op["id"]))
+            for column in ("due", "remind_at"):
+                if column in fields:
+                    self.conn.execute(f"UPDATE todos SET {column} = ? WHERE uid = ?", (fields[column], op["id"]))
+            if "tags" in fields:
+                self.conn.execute("UPDATE todos SET tags = ? WHERE uid = ?", (tags_column(fields["tags"]), op["id"]))
+            if "priority" in fields:
+                self.conn.execute("UPDATE todos SET priority = ? WHERE uid = ?", (fields["priority"], op["id"]))
+        elif kind == "delete":
+            self.conn.execute("DELETE FROM todos WHERE uid = ?", (op["id"],))
+        else:
+            raise ValueError(f"Nezināms izmaiņas veids: {kind}")
+
+    def _position_before(self, uid):
+        """Pozīcija tieši pirms dotā uzdevuma (None, ja tāda nav) - parasti bez citu rindu pārrakstīšanas"""
+        if uid is None:
+            return None
+        row = self.conn.execute("SELECT position FROM todos WHERE uid = ?", (uid,)).fetchone()
+        if row is None:
+            return None
+        after = row[0]
+        before = self.conn.execute("SELECT MAX(position) FROM todos WHERE position < ?", (after,)).fetchone()[0]
+        if before is None:
+            return after - 1
+        position = (before + after) / 2
+        if not before < position < after:
+            # Starp abām pozīcijām vairs nav vietas - pabīda visas nākamās rindas
+            self.conn.execute("UPDATE todos SET position = position + 1 WHERE position >= ?", (after,))
+            self._next_position += 1
+            position = after
+        return position
+
+    def save(self, todos, merged=None):
+        """Pārraksta visu tabulu vienā transakcijā"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM todos")
+            self._insert_all(todos)
+        self._next_position = len(todos)
+
+    def counts(self, todos=None):
+        """Skaitītājus aprēķina ar vaicājumu pa completed indeksu"""
+        completed = active = 0
+        # Savienojumu vienlaikus lieto fona rakstītājs
+        with self._lock:
+            rows = self.conn.execute("SELECT completed, COUNT(*) FROM todos GROUP BY completed").fetchall()
+        for is_completed, count in rows:
+            if is_completed:
+                completed = count
+            else:
+                active = count
+        return completed, active
+
+    def query(self, completed=None):
+        """Atgriež uzdevumus, pēc izvēles filtrējot pēc statusa"""
+        with self._lock:
+            return self._select(completed)
+
+    def _select(self, completed=None):
+        """query bez slēdzenes - tai jābūt paņemtai"""
+        if completed is None:
+            rows = self.conn.execute(f"SELECT {SQLITE_COLUMNS} FROM todos ORDER BY position")
+        else:
+            rows = self.conn.execute(
+                f"SELECT {SQLITE_COLUMNS} FROM todos WHERE completed = ? ORDER BY position",
+                (int(completed),)
+            )
+        return [row_to_dict(row) for row in rows]
+
+    def close(self, todos):
+        """Visas izmaiņas jau ir saglabātas - tikai aizver savienojumu"""
+        self.conn.close()
+
+    def release(self):
+        self.conn.close()
+
+
+class BackgroundSaver:
+    """Raksta izmaiņas fona pavedienā un apvieno secīgas izmaiņas vienā rakstīšanā"""
+
+    # Cik ilgi pagaidīt pēc pirmās izmaiņas, lai savāktu arī nākamās
+    COALESCE_DELAY = 0.05
+    # Pēc cik sekundēm atkārtot neizdevušos rakstīšanu
+    RETRY_DELAY = 2.0
+
+    def __init__(self, storage, on_written=None):
+        self.storage = storage
+        # Pēdējās neizdevušās rakstīšanas kļūda - None, kad viss ir uzrakstīts
+        self.last_error = None
+        self._failures = 0
+        # Funkcija, ko fona pavediens izsauc pēc katras rakstīšanas (piemēram, sinhronizācijas žurnālam)
+        self.on_written = on_written
+
+        # Rinda ar darbiem: ("op", op), ("save", (kopija, merged)) vai ("compact", (kopija, merged))
+        self._queue = []
+        self._busy = False
+        self._stopping = False
+        self._compact_queued = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, op):
+        """Pieņem vienu izmaiņu rakstīšanai - atgriežas uzreiz"""
+        self._put(("op", op))
+
+    def submit_many(self, ops):
+        """Pieņem vairākas izmaiņas - tās tiks uzrakstītas kopā"""
+        with self._cond:
+            self._queue.extend(("op", op) for op in ops)
+            self._cond.notify()
+
+    def request_save(self, todos):
+        """Pieprasa pilnu saglabāšanu no pašreizējā saraksta kopijas"""
+        self._put(("save", (snapshot_of(todos), self.storage.merged)))
+
+    def maybe_compact(self, todos):
+        """Ieliek rindā saspiešanu aiz visām jau iesniegtajām izmaiņām"""
+        if self._compact_queued or not self.storage.needs_compaction():
+            return
+        self._compact_queued = True
+        self._put(("compact", (snapshot_of(todos), self.storage.merged)))
+
+    def _put(self, job):
+        with self._cond:
+            self._queue.append(job)
+            self._cond.notify()
+
+    def _run(self):
+        """Fona pavediena cikls"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue and self._stopping:
+                    return
+                self._busy = True
+
+            # Dod laiku savākties arī pārējām izmaiņām no tās pašas darbības
+            if not self._stopping:
+                time.sleep(self.COALESCE_DELAY)
+
+            with self._cond:
+                jobs = self._queue
+                self._queue = []
+
+            try:
+                self._write(jobs)
+                if self.on_written is not None:
+                    self.on_written()
+            except Exception as e:
+                with self._cond:
+                    self.last_error = e
+                    self._failures += 1
+                    if not self._stopping:
+                        # Neuzrakstītie darbi paliek rindas sākumā - ja tie netiek uzrakstīti, close saglabā visu sarakstu
+                        self._queue[:0] = jobs
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait_for(lambda: self._stopping, self.RETRY_DELAY)
+                continue
+
+            with self._cond:
+                self.last_error = None
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write(self, jobs):
+        """Izpilda savāktos darbus secībā, apvienojot izmaiņas - uzrakstītie darbi tiek izņemti no jobs"""
+        # Izmaiņas pirms pēdējās pilnās saglabāšanas vairs nav vajadzīgas
+        for i in range(len(jobs) - 1, -1, -1):
+            if jobs[i][0] == "save":
+                self.storage.save(*jobs[i][1])
+                del jobs[:i + 1]
+                break
+
+        while jobs:
+            kind, payload = jobs[0]
+            if kind == "compact":
+                # Neizdevusies saspiešana netiek atkārtota ar veco kopiju - maybe_compact to ieliks rindā no jauna
+                del jobs[0]
+                try:
+                    self.storage.start_compaction(*payload)
+                finally:
+                    self._compact_queued = False
+                continue
+            end = 1
+            while end < len(jobs) and jobs[end][0] == "op":
+                end += 1
+            self.storage.append_many([payload for _, payload in jobs[:end]])
+            del jobs[:end]
+
+    def flush(self):
+        """Sagaida, kamēr visas iesniegtās izmaiņas ir uzrakstītas - ja rakstīšana neizdodas, izraisa tās kļūdu"""
+        with self._cond:
+            failures = self._failures
+            while (self._queue or self._busy) and self._failures == failures:
+                self._cond.wait()
+            if self.last_error is not None:
+                raise self.last_error
+
+    def close(self, todos):
+        """Uzraksta visu atlikušo, aptur pavedienu un aizver krātuvi"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+
+        if self.last_error is not None:
+            # Kāda fona rakstīšana neizdevās - saglabā visu sarakstu no jauna
+            self.storage.save(todos, self.storage.merged)
+        self.storage.close(todos)
+
+
+def open_storage(kind, json_path):
+    """Izveido krātuvi pēc nosaukuma ("journal", "binary" vai "sqlite")"""
+    if kind == "sqlite":
+        return SqliteStorage(os.path.splitext(json_path)[0] + ".db", migrate_from=json_path)
+    if kind == "binary":
+        return BinaryStorage(os.path.splitext(json_path)[0] + ".todobin", migrate_from=json_path)
+    if kind == "journal":
+        return JournalStorage(json_path)
+    raise ValueError(f"Nezināma krātuve: {kind}")
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+# Sarakstu sinhronizācija starp datoriem.
+#
+# Katra izmaiņa šajā datorā tiek atzīmēta izmaiņu žurnālā (outbox.py,
+# todos.sync.jsonl - tikai uzdevuma id un izmaiņas laiks), un sinhronizējot
+# uz serveri tiek sūtīti tikai šo uzdevumu pašreizējie ieraksti. Serveris katram saņemtajam
+# ierakstam piešķir augošu kārtas numuru, un dators saņem tikai ierakstus ar
+# numuru, kas lielāks par iepriekš saņemto (kursors todos.sync.json). Tā gan
+# sūtīšana, gan saņemšana maksā O(izmaiņas), nevis O(saraksta garums) - visu
+# sarakstu nosūta tikai pirmā sinhronizācija.
+#
+# Konflikti: uzvar ieraksts ar lielāko (laiks, klienta id) - to salīdzina
+# serveris, tāpēc visi datori nonāk pie tā paša rezultāta. Dzēšana ir ieraksts
+# bez uzdevuma, tāpēc arī tā sacenšas pēc laika. Izmaiņas laiks nekad nav
+# mazāks par jau redzētajiem, tāpēc izmaiņa, kas veikta pēc citas datora
+# izmaiņas saņemšanas, uzvar arī tad, ja šī datora pulkstenis atpaliek.
+# Uzdevumus, kas šeit mainīti pēc izmaiņu savākšanas, saņemtie ieraksti
+# nepārraksta - tie tiks nosūtīti nākamajā reizē.
+#
+# Ieraksti tiek sūtīti un saņemti porcijās pa BATCH_SIZE, un pieprasījumi,
+# kas lielāki par COMPRESS_MIN, tiek saspiesti ar zlib. Servera piemērs ir
+# sync_server.py. Modulis neimportē tkinter: tīkla un diska darbi (take,
+# exchange, commit) notiek fona pavedienā, bet uzdevumu saraksts tiek lasīts
+# tikai Tk pavedienā (outgoing, records, remote_ops).
+
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+
+from outbox import SyncOutbox, outbox_path, sync_state_path
+from storage import diff_op, write_atomic
+
+# Protokola versija - ceļa sākums visiem pieprasījumiem
+PROTOCOL = "v1"
+# Cik ierakstu sūtīt vai saņemt vienā pieprasījumā
+BATCH_SIZE = 500
+# No cik baitiem pieprasījumu saspiest
+COMPRESS_MIN = 1024
+# Cik sekundes gaidīt servera atbildi
+TIMEOUT = 30
+
+
+def encode_body(data):
+    """JSON pieprasījuma vai atbildes saturs - (baiti, saspiešanas veids vai None)"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(body) < COMPRESS_MIN:
+        return body, None
+    return zlib.compress(body), "deflate"
+
+
+def decode_body(body, encoding):
+    """Nolasa encode_body saturu"""
+    if encoding == "deflate":
+        body = zlib.decompress(body)
+    return json.loads(body.decode("utf-8")) if body else None
+
+
+class SyncError(Exception):
+    """Sinhronizācija neizdevās - serveris nav pieejams vai atbilde nav saprotama"""
+
+
+class SyncState:
+    """Šī datora id, saraksta nosaukums serverī un kursors - pēdējais saņemtais kārtas numurs"""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.client_id = uuid.uuid4().hex
+        self.key = key
+        # None - vēl nav sinhronizēts, pirmajā reizē jānosūta viss saraksts
+        self.cursor = None
+        self.clock = 0.0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.client_id = data["client"]
+            self.key = data["list"]
+            self.cursor = data.get("cursor")
+            self.clock = data.get("clock", 0.0)
+
+    def save(self):
+        data = {"client": self.client_id, "list": self.key, "cursor": self.cursor, "clock": self.clock}
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False))
+
+
+class SyncClient:
+    """Sinhronizācijas servera pieprasījumi - JSON, lielāki saspiesti ar zlib"""
+
+    def __init__(self, url, timeout=TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def push(self, key, records):
+        """Nosūta ierakstus - atgriež servera ierakstus tiem, kuros uzvarēja cita datora izmaiņa"""
+        return self._request("POST", f"{self._list_url(key)}/push", {"records": records})["rejected"]
+
+    def changes(self, key, since, client_id, limit=BATCH_SIZE):
+        """Ieraksti pēc kārtas numura since, izņemot šī datora paša - (ieraksti, jaunais kursors, vai ir vēl)"""
+        query = urllib.parse.urlencode({"since": since, "limit": limit, "client": client_id})
+        data = self._request("GET", f"{self._list_url(key)}/changes?{query}")
+        return data["records"], data["seq"], data["more"]
+
+    def _list_url(self, key):
+        return f"{self.url}/{PROTOCOL}/lists/{urllib.parse.quote(key, safe='')}"
+
+    def _request(self, method, url, data=None):
+        headers = {"Accept-Encoding": "deflate"}
+        body = None
+        if data is not None:
+            body, encoding = encode_body(data)
+            headers["Content-Type"] = "application/json"
+            if encoding:
+                headers["Content-Encoding"] = encoding
+        request = urllib.request.Request(url, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return decode_body(response.read(), response.headers.get("Content-Encoding"))
+        except urllib.error.HTTPError as e:
+            raise SyncError(f"Serveris atbildēja {e.code}: {e.reason}") from e
+        except urllib.error.URLError as e:
+            raise SyncError(f"Serveris nav pieejams: {e.reason}") from e
+        except (OSError, ValueError, KeyError, zlib.error) as e:
+            raise SyncError(f"Nesaprotama servera atbilde: {e}") from e
+
+
+class ListSync:
+    """Viena saraksta sinhronizācija ar serveri"""
+
+    def __init__(self, path, url, key=None, outbox=None):
+        self.client = SyncClient(url)
+        self.state = SyncState(sync_state_path(path), key or os.path.splitext(os.path.basename(path))[0])
+        self.outbox = outbox if outbox is not None else SyncOutbox(outbox_path(path))
+        self.outbox.clock = max(self.outbox.clock, self.state.clock)
+
+    def take(self):
+        """Fona pavediens - nenosūtītās izmaiņas {id: laiks}"""
+        return self.outbox.take()
+
+    def outgoing(self, todos, stamps):
+        """Sūtāmie (id, laiks) - pirmajā reizē visi uzdevumi, pēc tam tikai mainītie"""
+        # Vēlākas izmaiņas šeit nedrīkst pārrakstīt saņemtie ieraksti
+        self.outbox.recent.clear()
+        if self.state.cursor is None:
+            stamps = {**dict.fromkeys((todo.id for todo in todos), 0.0), **stamps}
+        return list(stamps.items())
+
+    def records(self, todos, items):
+        """Ieraksti serverim pašreizējam uzdevumu stāvoklim - dzēstam uzdevumam bez "todo" satura"""
+        client_id = self.state.client_id
+        result = []
+        for todo_id, stamp in items:
+            todo = todos.get(todo_id)
+            result.append({"id": todo_id, "stamp": stamp, "client": client_id,
+                           "todo": todo.to_dict() if todo is not None else None})
+        return result
+
+    def exchange(self, records, taken):
+        """Fona pavediens - nosūta ierakstus porcijās un saņem citu izmaiņas kopš kursora.
+        Atgriež (saņemtie ieraksti, jaunais kursors, id ar vēl nenosūtītām izmaiņām)"""
+        key = self.state.key
+        received = {}
+        for start in range(0, len(records), BATCH_SIZE):
+            for record in self.client.push(key, records[start:start + BATCH_SIZE]):
+                received[record["id"]] = record
+        cursor = self.state.cursor or 0
+        more = True
+        while more:
+            batch, cursor, more = self.client.changes(key, cursor, self.state.client_id)
+            for record in batch:
+                received[record["id"]] = record
+        # Serveris tās ir saņēmis - ja saglabāt neizdodas, nākamreiz tās tiks nosūtītas vēlreiz
+        pending = self.outbox.discard(taken)
+        return list(received.values()), cursor, pending
+
+    def remote_ops(self, todos, received, pending):
+        """Izmaiņu ieraksti, kas pārvērš šo sarakstu par servera stāvokli - tikai atšķirības"""
+        ops = []
+        for record in received:
+            self.outbox.clock = max(self.outbox.clock, record["stamp"])
+            todo_id = record["id"]
+            if todo_id in pending or todo_id in self.outbox.recent:
+                continue
+            todo = todos.get(todo_id)
+            data = record["todo"]
+            if data is None:
+                if todo is not None:
+                    ops.append({"op": "delete", "id": todo_id})
+            elif todo is None:
+                ops.append({"op": "add", "todo": data})
+            else:
+                op = diff_op(todo.to_dict(), data)
+                if op is not None:
+                    ops.append(op)
+        return ops
+
+    def commit(self, cursor):
+        """Fona pavediens - saglabā kursoru pēc tam, kad saņemtās izmaiņas ir saglabātas"""
+        if (cursor, self.outbox.clock) == (self.state.cursor, self.state.clock):
+            return
+        self.state.cursor = cursor
+        self.state.clock = self.outbox.clock
+        self.state.save()
+
+    def close(self):
+        self.outbox.close()
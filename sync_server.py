@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Sinhronizācijas servera piemērs (skatīt sync.py) - palaižams uz šī vai cita datora:
+#
+#   python3 sync_server.py --port 8765 --db sync.db
+#
+# Katram saraksta uzdevumam serveris glabā tikai pēdējo uzvarējušo ierakstu ar
+# tā kārtas numuru. Jauns ieraksts uzvar, ja tā (laiks, klienta id) ir lielāks
+# par glabāto - tad tas saņem jaunu kārtas numuru. Izmaiņu pieprasījums ir
+# indeksēts vaicājums pēc kārtas numura, tāpēc tas maksā O(izmaiņas), nevis
+# O(saraksta garums).
+#
+#   POST /v1/lists/<saraksts>/push      {"records": [...]} -> {"rejected": [...]}
+#   GET  /v1/lists/<saraksts>/changes?since=N&limit=N&client=ID
+#                                       -> {"records": [...], "seq": N, "more": bool}
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sync import BATCH_SIZE, PROTOCOL, decode_body, encode_body
+
+# Lielākā atļautā vienas atbildes porcija
+MAX_LIMIT = 5000
+
+
+class SyncStore:
+    """Sarakstu ieraksti SQLite datubāzē - viens savienojums, pieprasījumi pēc kārtas"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS records (list TEXT NOT NULL, id TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "stamp REAL NOT NULL, client TEXT NOT NULL, todo TEXT, PRIMARY KEY (list, id))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_seq ON records (list, seq)")
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def push(self, key, records):
+        """Saglabā uzvarējušos ierakstus - atgriež glabātos ierakstus tiem, kas zaudēja"""
+        rejected = []
+        with self._lock, self.conn:
+            seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM records WHERE list = ?", (key,)).fetchone()[0]
+            for record in records:
+                row = self.conn.execute("SELECT seq, stamp, client, todo FROM records WHERE list = ? AND id = ?",
+                                        (key, record["id"])).fetchone()
+                if row is not None and (row[1], row[2]) >= (record["stamp"], record["client"]):
+                    if (row[1], row[2]) != (record["stamp"], record["client"]):
+                        rejected.append(self._record(record["id"], *row))
+                    continue
+                seq += 1
+                todo = json.dumps(record["todo"], ensure_ascii=False) if record["todo"] is not None else None
+                self.conn.execute("INSERT OR REPLACE INTO records (list, id, seq, stamp, client, todo) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)",
+                                  (key, record["id"], seq, record["stamp"], record["client"], todo))
+        return rejected
+
+    def changes(self, key, since, limit, client):
+        """Ieraksti ar kārtas numuru pēc since - cita klienta vai visi, ja client nav norādīts"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, seq, stamp, client, todo FROM records WHERE list = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (key, since, limit + 1)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        seq = rows[-1][1] if rows else since
+        # Paša klienta ieraksti netiek sūtīti atpakaļ, bet kursors pāriet tiem pāri
+        records = [self._record(*row) for row in rows if row[3] != client]
+        return {"records": records, "seq": seq, "more": more}
+
+    @staticmethod
+    def _record(todo_id, seq, stamp, client, todo):
+        return {"id": todo_id, "seq": seq, "stamp": stamp, "client": client,
+                "todo": json.loads(todo) if todo is not None else None}
+
+    def close(self):
+        self.conn.close()
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    """HTTP pieprasījumi - store ir servera SyncStore"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        key, action = self._route(url.path)
+        if action != "changes":
+            return self._send(404, {"error": "nav tāda ceļa"})
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            since = int(query.get("since", ["0"])[0])
+            limit = min(int(query.get("limit", [str(BATCH_SIZE)])[0]), MAX_LIMIT)
+        except ValueError:
+            return self._send(400, {"error": "since un limit jābūt skaitļiem"})
+        client = query.get("client", [None])[0]
+        self._send(200, self.server.store.changes(key, since, limit, client))
+
+    def do_POST(self):
+        key, action = self._route(urllib.parse.urlsplit(self.path).path)
+        if action != "push":
+            return self._send(404, {"error": "nav tāda ceļa"})
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            records = decode_body(body, self.headers.get("Content-Encoding"))["records"]
+            for record in records:
+                if not isinstance(record["id"], str) or not isinstance(record["client"], str):
+                    raise ValueError(record)
+                record["stamp"] = float(record["stamp"])
+                if record["todo"] is not None and not isinstance(record["todo"], dict):
+                    raise ValueError(record)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send(400, {"error": f"nesaprotami ieraksti: {e}"})
+        self._send(200, {"rejected": self.server.store.push(key, records)})
+
+    def _route(self, path):
+        """(saraksts, darbība) no /v1/lists/<saraksts>/<darbība>"""
+        parts = path.strip("/").split("/")
+        if len(parts) != 4 or parts[0] != PROTOCOL or parts[1] != "lists":
+            return None, None
+        return urllib.parse.unquote(parts[2]), parts[3]
+
+    def _send(self, code, data):
+        body, encoding = encode_body(data)
+        if encoding and "deflate" not in self.headers.get("Accept-Encoding", ""):
+            body, encoding = json.dumps(data, ensure_ascii=False).encode("utf-8"), None
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(db_path, host="127.0.0.1", port=8765, quiet=False):
+    """Izveido serveri - serve_forever to palaiž"""
+    server = ThreadingHTTPServer((host, port), SyncHandler)
+    server.store = SyncStore(db_path)
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uzdevumu sarakstu sinhronizācijas serveris")
+    parser.add_argument("--host", default="127.0.0.1", help="adrese (noklusējums: 127.0.0.1 - tikai šis dators)")
+    parser.add_argument("--port", type=int, default=8765, help="ports (noklusējums: 8765)")
+    parser.add_argument("--db", default="sync.db", help="datubāzes fails (noklusējums: sync.db)")
+    parser.add_argument("--quiet", action="store_true", help="nerakstīt katru pieprasījumu")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.db, args.host, args.port, args.quiet)
+    print(f"Sinhronizācijas serveris: http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+# Moduļi atrodas projekta saknē - testiem tie jāvar importēt arī tad, ja pytest palaiž no citas mapes
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
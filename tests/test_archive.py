@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from archive import DAY, Archive, select_for_archive
+from storage import FileLock
+from todo_store import TodoStore
+
+
+def archived(todo_id, text="pabeigts"):
+    return {"id": todo_id, "text": text, "completed": True}
+
+
+def test_append_remove_and_load(tmp_path):
+    archive = Archive(str(tmp_path / "todos.archive.jsonl"))
+    assert archive.load() == []
+    archive.append([archived("a"), archived("b")])
+    archive.remove(["a"])
+    assert [data["id"] for data in archive.load()] == ["b"]
+    archive.close()
+
+
+def test_load_ignores_a_half_written_last_line(tmp_path):
+    path = tmp_path / "todos.archive.jsonl"
+    archive = Archive(str(path))
+    archive.append([archived("a")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "todo": {"id": "b"')
+    assert [data["id"] for data in archive.load()] == ["a"]
+
+
+def test_load_compacts_mostly_removed_archive(tmp_path):
+    path = tmp_path / "todos.archive.jsonl"
+    archive = Archive(str(path))
+    archive.append([archived(str(i)) for i in range(10)])
+    archive.remove([str(i) for i in range(9)])
+    assert [data["id"] for data in archive.load()] == ["9"]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_compaction_keeps_records_appended_by_another_program(tmp_path):
+    path = str(tmp_path / "todos.archive.jsonl")
+    lock_path = str(tmp_path / "todos.json.lock")
+    # Katrai programmai ir sava slēdzene uz tā paša faila
+    ours = Archive(path, FileLock(lock_path))
+    theirs = Archive(path, FileLock(lock_path))
+    ours.append([archived(str(i)) for i in range(10)])
+    ours.remove([str(i) for i in range(9)])
+
+    rewrite = ours._rewrite
+    other = threading.Thread(target=theirs.append, args=([archived("cits")],))
+
+    def rewrite_while_other_appends(todos):
+        # Otra programma mēģina pievienot ierakstu starp nolasīšanu un pārrakstīšanu
+        other.start()
+        other.join(0.2)
+        rewrite(todos)
+
+    ours._rewrite = rewrite_while_other_appends
+    ours.load()
+    other.join()
+    assert sorted(data["id"] for data in Archive(path).load()) == ["9", "cits"]
+
+
+def test_select_for_archive_by_age_and_count():
+    now = 100 * DAY
+    store = TodoStore()
+    old = store.add("vecs", completed=True, completed_at=now - 40 * DAY)
+    recent = [store.add(f"jauns {i}", completed=True, completed_at=now - i * DAY) for i in range(3)]
+    store.add("aktīvs")
+    assert select_for_archive(store, now, max_age_days=30, keep=0) == [old.id]
+    assert select_for_archive(store, now, max_age_days=0, keep=2) == [old.id, recent[2].id]
+    assert select_for_archive(store, now, max_age_days=30, keep=2) == [old.id, recent[2].id]
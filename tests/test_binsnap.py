@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+import binsnap
+from storage import new_todo_id
+
+
+def sample_todos():
+    return [
+        {"id": new_todo_id(), "text": "piens", "completed": False},
+        {"id": "vecs-id", "text": "ābols ✓", "completed": True, "completed_at": 12.5},
+        {"id": new_todo_id(), "text": "atskaite", "completed": False, "due": 100.0, "remind_at": 90.0,
+         "tags": ["darbs", "mājas"], "priority": 3},
+        {"id": "A" * 32, "text": "lieli burti id", "completed": True},
+    ]
+
+
+def test_round_trip_keeps_every_field(tmp_path):
+    path = str(tmp_path / "todos.todobin")
+    todos = sample_todos()
+    binsnap.write_snapshot(path, todos, seq=7)
+    assert binsnap.is_snapshot(path)
+    with binsnap.SnapshotReader(path) as reader:
+        assert (len(reader), reader.completed_count, reader.seq) == (4, 2, 7)
+        assert [todo for batch in reader.iter_batches(3) for todo in batch] == todos
+        assert reader.record(2) == (todos[2]["id"], "atskaite", False, None, 100.0, 90.0, ("darbs", "mājas"), 3)
+        assert [record[0] for record in reader.query(True)] == ["vecs-id", "A" * 32]
+        assert list(reader.iter_records(1, 2)) == [("vecs-id", "ābols ✓", True, 12.5, None, None, (), 0)]
+        with pytest.raises(IndexError):
+            reader.record(4)
+
+
+def test_writing_in_chunks_gives_same_file(tmp_path):
+    todos = [{"id": new_todo_id(), "text": f"uzdevums {i}", "completed": i % 3 == 0,
+              "tags": ["x"] if i % 5 == 0 else []} for i in range(25)]
+    whole = str(tmp_path / "viss.todobin")
+    chunked = str(tmp_path / "porcijas.todobin")
+    binsnap.write_snapshot(whole, todos)
+    assert list(binsnap.write_steps(chunked, todos, chunk_size=10)) == [10, 20, 25]
+    assert open(whole, "rb").read() == open(chunked, "rb").read()
+
+
+def test_interrupted_write_leaves_old_file(tmp_path):
+    path = str(tmp_path / "todos.todobin")
+    binsnap.write_snapshot(path, sample_todos())
+    before = open(path, "rb").read()
+    steps = binsnap.write_steps(path, ({"id": str(i), "text": "x"} for i in range(50)), chunk_size=10)
+    next(steps)
+    steps.close()
+    assert open(path, "rb").read() == before
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_old_version_records_are_read(tmp_path):
+    path = str(tmp_path / "v2.todobin")
+    todo_id = new_todo_id()
+    heap = "vecs".encode("utf-8")
+    header = binsnap.HEADER.pack(binsnap.MAGIC, 2, 0, 0, 1, 1, 3, binsnap.HEADER.size + binsnap.RECORD_V2.size)
+    record = binsnap.RECORD_V2.pack(bytes.fromhex(todo_id), 0, len(heap), binsnap.FLAG_COMPLETED, 4.0)
+    with open(path, "wb") as f:
+        f.write(header + record + heap)
+    with binsnap.SnapshotReader(path) as reader:
+        assert next(reader.iter_batches(10)) == [{"id": todo_id, "text": "vecs", "completed": True,
+                                                  "completed_at": 4.0}]
+
+
+def test_unknown_or_short_file_is_rejected(tmp_path):
+    short = tmp_path / "īss.todobin"
+    short.write_bytes(b"TODOSNAP")
+    with pytest.raises(ValueError):
+        binsnap.SnapshotReader(str(short))
+    future = tmp_path / "nākotne.todobin"
+    future.write_bytes(binsnap.HEADER.pack(binsnap.MAGIC, 99, 0, 0, 0, 0, 0, binsnap.HEADER.size))
+    with pytest.raises(ValueError):
+        binsnap.SnapshotReader(str(future))
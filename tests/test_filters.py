@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import todo_cli
+from filters import parse_priority, parse_query, parse_tags
+from search import SearchIndex
+from todo_store import ALL_KEY, TodoStore
+
+
+def make_store():
+    store = TodoStore()
+    store.add("Nopirkt pienu", tags=("mājas",), priority=1)
+    store.add("Uzrakstīt atskaiti", tags=("darbs",), priority=3)
+    store.add("Zvanīt klientam", tags=("darbs",), completed=True)
+    store.add("Nopļaut zāli", tags=("dārzs",))
+    return store
+
+
+def texts(store, query):
+    index = SearchIndex(store)
+    bits = query.evaluate(store, lambda: index, 0)
+    return [todo.text for todo in store.bitmaps.todos(bits)]
+
+
+def test_plain_text_is_not_a_query():
+    assert parse_query("piens") is None
+    assert parse_query("") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("#darbs", ["Uzrakstīt atskaiti", "Zvanīt klientam"]),
+    ("#darbs AND active", ["Uzrakstīt atskaiti"]),
+    ("#darbs active", ["Uzrakstīt atskaiti"]),
+    ("#mājas OR #dārzs", ["Nopirkt pienu", "Nopļaut zāli"]),
+    ("NOT #darbs", ["Nopirkt pienu", "Nopļaut zāli"]),
+    ("priority>=low", ["Nopirkt pienu", "Uzrakstīt atskaiti"]),
+    ("p=none", ["Zvanīt klientam", "Nopļaut zāli"]),
+    ("(#mājas OR #darbs) pienu", ["Nopirkt pienu"]),
+    ("pabeigti #darbs", ["Zvanīt klientam"]),
+])
+def test_evaluate(text, expected):
+    assert texts(make_store(), parse_query(text)) == expected
+
+
+def test_matches_agrees_with_evaluate():
+    store = make_store()
+    index = SearchIndex(store)
+    for text in ("#darbs AND NOT completed", "#mājas OR p>=high", "NOT (#darbs OR #dārzs)"):
+        query = parse_query(text)
+        bits = query.evaluate(store, lambda: index, 0)
+        assert [todo for todo in store if query.matches(todo, lambda: index, 0)] == store.bitmaps.todos(bits)
+
+
+@pytest.mark.parametrize("text", [
+    "NOT", "#darbs AND NOT", "#darbs NOT", "NOT )", "NOT OR #darbs", "NOT AND #darbs", "(NOT)", "NOT NOT",
+    "#darbs AND (NOT", "NOT (", "#darbs AND", "#darbs OR", "(#darbs", "#darbs)", ")(", "AND", "OR OR",
+    "priority>=", "p>=kaut kas", "#", "# AND",
+])
+def test_unfinished_queries_do_not_raise(text):
+    query = parse_query(text)
+    if query is not None:
+        texts(make_store(), query)
+
+
+def test_dangling_not_is_ignored():
+    assert parse_query("#darbs AND NOT").tree == parse_query("#darbs").tree
+    assert parse_query("NOT").tree == ("key", ALL_KEY)
+    assert parse_query("NOT OR #darbs").tree == parse_query("#darbs").tree
+
+
+def test_unknown_priority_matches_nothing():
+    assert texts(make_store(), parse_query("priority>=kaut")) == []
+
+
+def test_cli_filter_with_unfinished_query(tmp_path, capsys):
+    path = str(tmp_path / "todos.json")
+    todo_cli.main(["--file", path, "add", "Uzrakstīt atskaiti", "Nopirkt pienu"])
+    todo_cli.main(["--file", path, "tag", "1", "darbs"])
+    capsys.readouterr()
+    assert todo_cli.main(["--file", path, "list", "--filter", "#darbs AND NOT"]) == 0
+    out = capsys.readouterr().out
+    assert "Uzrakstīt atskaiti" in out and "Nopirkt pienu" not in out
+
+
+def test_parse_priority_and_tags():
+    assert parse_priority("high") == parse_priority("augsta") == parse_priority("3") == 3
+    with pytest.raises(ValueError):
+        parse_priority("4")
+    assert parse_tags("#Darbs, mājas #darbs") == ("darbs", "mājas")
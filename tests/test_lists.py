@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from lists import ListManifest, shard_files
+from sync import SyncState
+from outbox import sync_state_path
+from todo_core import TodoList
+
+
+def test_new_list_is_saved_in_the_manifest(tmp_path):
+    base = str(tmp_path / "todos.json")
+    manifest = ListManifest.open(base)
+    entry = manifest.create("Darbs")
+    manifest.save()
+    reopened = ListManifest.open(base)
+    assert [item.name for item in reopened.entries] == ["Mani uzdevumi", "Darbs"]
+    assert reopened.find("darbs").file == entry.file
+
+
+@pytest.mark.parametrize("kind", ["journal", "binary", "sqlite"])
+def test_removing_a_list_deletes_all_its_files(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("TODO_SYNC_URL", "http://127.0.0.1:1")
+    base = str(tmp_path / "todos.json")
+    manifest = ListManifest.open(base)
+    entry = manifest.create("Darbs")
+    manifest.save()
+
+    todo_list = TodoList.open(entry.file, kind)
+    todo_list.add_many(["viens", "divi"])
+    todo_list.toggle(todo_list.todos[0].id)
+    todo_list.archive_completed([todo_list.todos[0].id])
+    todo_list.archive.load()
+    todo_list.close()
+    SyncState(sync_state_path(entry.file), "Darbs").save()
+    before = set(os.listdir(tmp_path))
+
+    manifest.remove(entry.id)
+    manifest.save()
+    left = set(os.listdir(tmp_path))
+    assert left == {"todos.lists.json"}, left
+    assert before - left <= {os.path.basename(path) for path in shard_files(entry.file)}
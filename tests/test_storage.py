@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+
+import pytest
+
+import storage
+from storage import (BackgroundSaver, BinaryStorage, JournalStorage, SqliteStorage, TodoStorage, diff_op, replay_ops,
+                     supersede, touched_fields)
+
+
+def todo(todo_id, text, completed=False):
+    return {"id": todo_id, "text": text, "completed": completed}
+
+
+def add_op(todo_id, text):
+    return {"op": "add", "todo": todo(todo_id, text)}
+
+
+@pytest.fixture(autouse=True)
+def fast_saver(monkeypatch):
+    monkeypatch.setattr(BackgroundSaver, "COALESCE_DELAY", 0.0)
+    monkeypatch.setattr(BackgroundSaver, "RETRY_DELAY", 0.01)
+
+
+def ids(todos):
+    return [item["id"] for item in todos]
+
+
+@pytest.fixture(params=[JournalStorage, BinaryStorage])
+def journal_class(request):
+    return request.param
+
+
+def open_journal(cls, tmp_path, **kwargs):
+    journal = cls(str(tmp_path / ("todos.todobin" if cls is BinaryStorage else "todos.json")), **kwargs)
+    journal.load()
+    return journal
+
+
+def test_replay_applies_every_kind_of_change():
+    todos = [todo("a", "viens"), todo("b", "divi")]
+    replay_ops(todos, [
+        add_op("c", "trīs"),
+        {"op": "add", "todo": todo("z", "atjaunots"), "before": "b"},
+        {"op": "update", "id": "a", "fields": {"completed": True, "completed_at": 5.0}},
+        {"op": "delete", "id": "b"},
+        {"op": "update", "id": "b", "fields": {"text": "dzēsts"}},
+        add_op("c", "dublikāts"),
+    ])
+    assert ids(todos) == ["a", "z", "c"]
+    assert todos[0]["completed"] and todos[0]["completed_at"] == 5.0
+    assert todos[2]["text"] == "trīs"
+
+
+def test_replay_understands_old_positional_records():
+    todos = [todo("a", "viens"), todo("b", "divi"), todo("c", "trīs")]
+    replay_ops(todos, [{"op": "delete", "id": "a"}, {"op": "delete", "index": 0},
+                       {"op": "update", "index": 0, "fields": {"text": "TRĪS"}}])
+    assert todos == [todo("c", "TRĪS")]
+    with pytest.raises(ValueError):
+        replay_ops(todos, [{"op": "move"}])
+
+
+def test_diff_op_writes_completion_with_its_time():
+    old = todo("a", "viens")
+    assert diff_op(old, dict(old)) is None
+    assert diff_op(old, dict(old, completed_at=3.0)) == {
+        "op": "update", "id": "a", "fields": {"completed": False, "completed_at": 3.0}}
+    assert diff_op(dict(old, tags=["x"]), dict(old, tags=("x",), text="jauns")) == {
+        "op": "update", "id": "a", "fields": {"text": "jauns"}}
+
+
+def test_supersede_drops_fields_changed_here_later():
+    theirs = [{"op": "update", "id": "a", "fields": {"text": "viņu", "completed": True, "completed_at": 1.0}},
+              {"op": "update", "id": "b", "fields": {"text": "viņu"}}, add_op("c", "jauns")]
+    mine = touched_fields([{"op": "update", "id": "a", "fields": {"completed": False}},
+                           {"op": "update", "id": "b", "fields": {"text": "mans"}}])
+    assert supersede(theirs, mine) == [{"op": "update", "id": "a", "fields": {"text": "viņu"}}, add_op("c", "jauns")]
+
+
+def test_journal_is_replayed_over_snapshot(tmp_path, journal_class):
+    journal = open_journal(journal_class, tmp_path)
+    journal.save([todo("a", "viens")])
+    journal.append_many([add_op("b", "divi"), {"op": "delete", "id": "a"}])
+    journal.append({"op": "update", "id": "b", "fields": {"text": "DIVI"}})
+    journal.release()
+
+    again = journal_class(journal.path)
+    assert again.load() == [todo("b", "DIVI")]
+    again.append(add_op("c", "trīs"))
+    lines = [json.loads(line) for line in open(again.journal_path, "rb")]
+    assert [line["seq"] for line in lines] == [1, 2, 3, 4]
+    again.close(again.load())
+    assert not os.path.exists(again.journal_path)
+    assert ids(journal_class(journal.path).load()) == ["b", "c"]
+
+
+def test_other_programs_changes_are_read_one_by_one(tmp_path, journal_class):
+    first = open_journal(journal_class, tmp_path)
+    second = open_journal(journal_class, tmp_path)
+    assert first.read_changes() == ("ops", [], 0)
+
+    second.append_many([add_op("a", "viens"), add_op("b", "divi")])
+    first.append(add_op("c", "trīs"))
+    assert first.changed()
+    kind, ops, merged = first.read_changes()
+    assert kind == "ops" and merged == 1
+    assert [(op["todo"]["id"], op["seq"]) for op in ops] == [("a", 1), ("b", 2)]
+    assert not first.changed()
+
+    kind, ops, _ = second.read_changes()
+    assert [op["todo"]["id"] for op in ops] == ["c"]
+    second.append(add_op("d", "četri"))
+    assert [line["seq"] for line in map(json.loads, open(first.journal_path, "rb"))] == [1, 2, 3, 4]
+    first.release()
+    second.release()
+
+
+def test_compaction_by_another_program_delivers_whole_list(tmp_path, journal_class):
+    first = open_journal(journal_class, tmp_path)
+    second = open_journal(journal_class, tmp_path)
+    second.append(add_op("a", "viens"))
+    second.compact([todo("a", "viens")])
+    assert first.changed()
+    kind, todos, merged = first.read_changes()
+    assert (kind, ids(todos), merged) == ("todos", ["a"], 1)
+
+    # Saspiešana pēc tam, kad visas izmaiņas jau ir nolasītas, sarakstu vēlreiz nesūta
+    second.append(add_op("b", "divi"))
+    assert ids(op["todo"] for op in first.read_changes()[1]) == ["b"]
+    second.compact([todo("a", "viens"), todo("b", "divi")])
+    assert first.read_changes()[:2] == ("ops", [])
+    first.release()
+    second.release()
+
+
+def test_compaction_includes_changes_not_yet_delivered(tmp_path, journal_class):
+    first = open_journal(journal_class, tmp_path)
+    second = open_journal(journal_class, tmp_path)
+    second.append(add_op("a", "viens"))
+    first.append(add_op("b", "divi"))
+    # Lietotne vēl nav nolasījusi a - kopijā ir tikai b
+    first.save([todo("b", "divi")], first.merged)
+    assert ids(journal_class(first.path).load()) == ["b", "a"]
+    first.release()
+    second.release()
+
+
+def test_interrupted_compaction_is_finished_on_load(tmp_path, journal_class):
+    journal = open_journal(journal_class, tmp_path)
+    journal.save([todo("a", "viens")])
+    journal.append(add_op("b", "divi"))
+    journal.release()
+    # Avārija pēc žurnāla pārdēvēšanas, pirms momentuzņēmums tika uzrakstīts
+    os.replace(journal.journal_path, journal.rotated_path)
+    again = journal_class(journal.path)
+    assert ids(again.load()) == ["a", "b"]
+    assert not os.path.exists(again.rotated_path)
+    again.release()
+    assert ids(journal_class(journal.path).load()) == ["a", "b"]
+
+
+def test_torn_line_is_ignored_and_removed_before_writing(tmp_path):
+    journal = open_journal(JournalStorage, tmp_path)
+    journal.append(add_op("a", "viens"))
+    with open(journal.journal_path, "ab") as f:
+        f.write(b'{"op": "add", "todo": {"id": "x"')
+    other = JournalStorage(journal.path)
+    assert ids(other.load()) == ["a"]
+    other.append(add_op("b", "divi"))
+    lines = [json.loads(line) for line in open(journal.journal_path, "rb")]
+    assert [line["todo"]["id"] for line in lines] == ["a", "b"]
+    journal.release()
+    other.release()
+
+
+def test_old_list_file_gets_ids_and_is_rewritten(tmp_path):
+    path = tmp_path / "todos.json"
+    path.write_text(json.dumps([{"text": "viens", "completed": False}, {"text": "divi", "completed": True}]))
+    journal = JournalStorage(str(path))
+    todos = journal.load()
+    assert [item["text"] for item in todos] == ["viens", "divi"] and all(item["id"] for item in todos)
+    data = json.loads(path.read_text())
+    assert data["todos"] == todos
+    journal.release()
+
+
+def test_binary_storage_migrates_json_list(tmp_path):
+    old = JournalStorage(str(tmp_path / "todos.json"))
+    old.load()
+    old.append_many([add_op("a", "viens"), add_op("b", "divi")])
+    old.release()
+    binary = BinaryStorage(str(tmp_path / "todos.todobin"), migrate_from=old.path)
+    assert ids(binary.load()) == ["a", "b"]
+    assert os.path.exists(binary.path)
+    binary.release()
+
+
+class FlakyStorage(TodoStorage):
+    """Atmiņas krātuve, kuras rakstīšana neizdodas, kamēr fail ir patiess"""
+
+    def __init__(self):
+        self.ops = []
+        self.saved = None
+        self.compactions = 0
+        self.fail = False
+        self.fail_compaction = False
+
+    def append_many(self, ops):
+        if self.fail:
+            raise OSError(28, "No space left on device")
+        self.ops.extend(ops)
+
+    def save(self, todos, merged=None):
+        self.saved = list(todos)
+        self.ops = []
+
+    def needs_compaction(self):
+        return True
+
+    def start_compaction(self, snapshot, merged=None):
+        self.compactions += 1
+        if self.fail_compaction:
+            raise OSError(28, "No space left on device")
+
+    def close(self, todos):
+        pass
+
+
+def test_failed_write_is_retried():
+    store = FlakyStorage()
+    store.fail = True
+    saver = BackgroundSaver(store)
+    saver.submit(add_op("a", "viens"))
+    saver.submit(add_op("b", "divi"))
+    with pytest.raises(OSError):
+        saver.flush()
+    assert isinstance(saver.last_error, OSError)
+
+    store.fail = False
+    saver.flush()
+    assert [op["todo"]["id"] for op in store.ops] == ["a", "b"]
+    assert saver.last_error is None
+    saver.close([])
+
+
+def test_later_changes_wait_behind_failed_ones():
+    store = FlakyStorage()
+    store.fail = True
+    saver = BackgroundSaver(store)
+    saver.submit(add_op("a", "viens"))
+    with pytest.raises(OSError):
+        saver.flush()
+    saver.submit(add_op("b", "divi"))
+    store.fail = False
+    saver.flush()
+    assert [op["todo"]["id"] for op in store.ops] == ["a", "b"]
+    saver.close([])
+
+
+def test_close_saves_everything_when_changes_still_cannot_be_written():
+    store = FlakyStorage()
+    store.fail = True
+    saver = BackgroundSaver(store)
+    saver.submit(add_op("a", "viens"))
+    with pytest.raises(OSError):
+        saver.flush()
+    todos = [todo("a", "viens")]
+    saver.close(todos)
+    assert store.saved == todos
+
+
+def test_close_writes_changes_that_were_retried():
+    store = FlakyStorage()
+    store.fail = True
+    saver = BackgroundSaver(store)
+    saver.submit(add_op("a", "viens"))
+    with pytest.raises(OSError):
+        saver.flush()
+    store.fail = False
+    saver.close([todo("a", "viens")])
+    assert [op["todo"]["id"] for op in store.ops] == ["a"]
+    assert store.saved is None
+
+
+def test_failed_compaction_can_be_queued_again():
+    store = FlakyStorage()
+    store.fail_compaction = True
+    saver = BackgroundSaver(store)
+    saver.submit(add_op("a", "viens"))
+    saver.maybe_compact([])
+    with pytest.raises(OSError):
+        saver.flush()
+    assert not saver._compact_queued
+    saver.submit(add_op("b", "divi"))
+    saver.flush()
+    assert [op["todo"]["id"] for op in store.ops] == ["a", "b"]
+
+    store.fail_compaction = False
+    saver.maybe_compact([])
+    saver.flush()
+    assert store.compactions == 2
+    saver.close([])
+
+
+def test_failed_on_written_is_retried_with_the_next_write():
+    store = FlakyStorage()
+    calls = []
+
+    def on_written():
+        calls.append(len(store.ops))
+        if len(calls) == 1:
+            raise OSError("outbox")
+
+    saver = BackgroundSaver(store, on_written=on_written)
+    saver.submit(add_op("a", "viens"))
+    with pytest.raises(OSError):
+        saver.flush()
+    saver.submit(add_op("b", "divi"))
+    saver.flush()
+    assert saver.last_error is None
+    assert [op["todo"]["id"] for op in store.ops] == ["a", "b"]
+    saver.close([])
+
+
+class FullDisk(io.FileIO):
+    """Fails, kurā ietilpst tikai puse no rakstāmā"""
+
+    def write(self, data):
+        data = bytes(data)
+        super().write(data[:len(data) // 2])
+        raise OSError(28, "No space left on device")
+
+
+def test_journal_write_failure_leaves_no_partial_lines(tmp_path, monkeypatch):
+    path = str(tmp_path / "todos.json")
+    journal = JournalStorage(path)
+    journal.load()
+    journal.append_many([add_op("a", "viens")])
+    before = open(journal.journal_path, "rb").read()
+
+    def full_open(file, mode="r", *args, **kwargs):
+        if mode == "ab":
+            return FullDisk(file, "ab")
+        return open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(storage, "open", full_open, raising=False)
+    with pytest.raises(OSError):
+        journal.append_many([add_op("b", "divi"), add_op("c", "trīs")])
+    monkeypatch.undo()
+    assert open(journal.journal_path, "rb").read() == before
+
+    journal.append_many([add_op("b", "divi"), add_op("c", "trīs")])
+    lines = [json.loads(line) for line in open(journal.journal_path, "rb")]
+    assert [line["seq"] for line in lines] == [1, 2, 3]
+    journal.release()
+    assert [item["id"] for item in JournalStorage(path).load()] == ["a", "b", "c"]
+
+
+def test_sqlite_readers_never_see_a_half_written_save(tmp_path):
+    db = SqliteStorage(str(tmp_path / "todos.db"))
+    db.load()
+    todos = [todo(str(i), f"uzdevums {i}", completed=i % 2 == 0) for i in range(200)]
+    db.save(todos)
+    saver = BackgroundSaver(db)
+    seen = []
+    try:
+        for _ in range(20):
+            saver.request_save(todos)
+            for _ in range(20):
+                seen.append(sum(db.counts()))
+                seen.append(len(db.query(completed=True)) * 2)
+        saver.flush()
+    finally:
+        saver.close(todos)
+    assert set(seen) == {200}
+
+
+def test_sqlite_changes_from_another_connection(tmp_path):
+    path = str(tmp_path / "todos.db")
+    first = SqliteStorage(path)
+    second = SqliteStorage(path)
+    first.load()
+    second.load()
+    second.append_many([add_op("a", "viens"), add_op("c", "trīs"),
+                        {"op": "add", "todo": todo("b", "divi"), "before": "c"},
+                        {"op": "update", "id": "a", "fields": {"completed": True, "completed_at": 1.0}}])
+    assert first.changed()
+    kind, todos, merged = first.read_changes()
+    assert (kind, ids(todos), merged) == ("todos", ["a", "b", "c"], 1)
+    assert first.read_changes() == ("ops", [], 1)
+    assert first.counts() == (1, 2)
+    assert ids(first.query(completed=False)) == ["b", "c"]
+    first.release()
+    second.release()
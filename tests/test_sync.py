@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import pytest
+
+import outbox
+import sync
+import todo_cli
+from outbox import SyncOutbox
+from storage import JournalStorage
+from sync_server import make_server
+
+
+@pytest.fixture
+def server_url(tmp_path):
+    server = make_server(str(tmp_path / "serveris.db"), port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    server.store.close()
+    thread.join()
+
+
+@pytest.fixture
+def computers(tmp_path, server_url, monkeypatch):
+    """Divi "datori" - saraksti atsevišķās mapēs ar vienu nosaukumu serverī"""
+    monkeypatch.setenv("TODO_SYNC_URL", server_url)
+    paths = []
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        paths.append(str(tmp_path / name / "todos.json"))
+    return paths
+
+
+def run(path, *args):
+    todo_cli.main(["--file", path, *args])
+
+
+def texts(path):
+    storage = JournalStorage(path)
+    todos = storage.load()
+    storage.release()
+    return {todo["text"]: todo for todo in todos}
+
+
+def test_outbox_keeps_changes_made_after_take(tmp_path):
+    box = SyncOutbox(str(tmp_path / "todos.sync.jsonl"))
+    box.record([{"op": "add", "todo": {"id": "a"}}, {"op": "update", "id": "b", "fields": {}}])
+    taken = box.take()
+    assert set(taken) == {"a", "b"}
+    box.record([{"op": "delete", "id": "b"}])
+    assert box.discard(taken) == {"b"}
+    assert set(box.take()) == {"b"}
+    assert box.take()["b"] > taken["b"]
+    box.close()
+
+
+def test_outbox_ignores_torn_line_and_retries_failed_flush(tmp_path, monkeypatch):
+    path = tmp_path / "todos.sync.jsonl"
+    path.write_text('{"id": "a", "t": 1.0}\n{"id": "b", "t"', encoding="utf-8")
+    box = SyncOutbox(str(path))
+    assert box.take() == {"a": 1.0}
+
+    path.write_text("", encoding="utf-8")
+    box.record([{"op": "delete", "id": "c"}])
+
+    def full_disk(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(outbox, "open", full_disk, raising=False)
+    with pytest.raises(OSError):
+        box.flush()
+    monkeypatch.undo()
+    assert set(box.take()) == {"c"}
+    box.close()
+
+
+@pytest.mark.parametrize("size", [10, sync.COMPRESS_MIN * 2])
+def test_body_round_trip(size):
+    data = {"records": [{"id": "ā" * size}]}
+    body, encoding = sync.encode_body(data)
+    assert encoding == (None if size < sync.COMPRESS_MIN else "deflate")
+    assert sync.decode_body(body, encoding) == data
+    assert sync.decode_body(b"", None) is None
+
+
+def test_changes_reach_other_computer(computers):
+    a, b = computers
+    run(a, "add", "piens", "maize")
+    run(a, "sync")
+    run(b, "sync")
+    assert set(texts(b)) == {"piens", "maize"}
+
+    run(b, "done", "1")
+    run(a, "delete", "2")
+    run(b, "sync")
+    run(a, "sync")
+    run(b, "sync")
+    for path in computers:
+        assert list(texts(path)) == ["piens"]
+        assert texts(path)["piens"]["completed"]
+
+
+def test_later_change_wins_on_both_computers(computers):
+    a, b = computers
+    run(a, "add", "atskaite")
+    run(a, "sync")
+    run(b, "sync")
+
+    run(a, "tag", "1", "darbs")
+    run(b, "tag", "1", "mājas")
+    run(a, "sync")
+    # B izmaiņa ir vēlāka - servera ieraksts to nepārraksta
+    run(b, "sync")
+    run(a, "sync")
+    for path in computers:
+        assert texts(path)["atskaite"]["tags"] == ["mājas"]
+
+
+def test_sync_reports_unreachable_server(tmp_path):
+    path = str(tmp_path / "todos.json")
+    run(path, "add", "piens")
+    with pytest.raises(SystemExit, match="Sinhronizācija neizdevās"):
+        run(path, "sync", "--url", "http://127.0.0.1:9")
+    # Kursors netiek saglabāts - nākamā sinhronizācija atkal sūtīs visu sarakstu
+    assert not os.path.exists(tmp_path / "todos.sync.json")
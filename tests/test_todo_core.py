@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from todo_core import TodoList
+
+
+def make_list():
+    written = []
+    todo_list = TodoList(None, persist=written.append)
+    todo_list.add_many(["Nopirkt pienu", "Uzrakstīt atskaiti"])
+    written.clear()
+    return todo_list, written
+
+
+def test_update_returns_changed_fields_and_writes_once():
+    todo_list, written = make_list()
+    todo = todo_list.todos[0]
+    changed = todo_list.update(todo.id, text="Nopirkt maizi", due=None, remind_at=None, tags=["mājas"], priority=2)
+    assert changed == {"text", "tags", "priority"}
+    assert written == [[{"op": "update", "id": todo.id,
+                         "fields": {"text": "Nopirkt maizi", "tags": ["mājas"], "priority": 2}}]]
+    assert (todo.text, todo.tags, todo.priority) == ("Nopirkt maizi", ("mājas",), 2)
+
+
+def test_update_without_changes_is_not_saved_or_remembered():
+    todo_list, written = make_list()
+    todo = todo_list.todos[0]
+    assert todo_list.update(todo.id, text=todo.text, tags=(), priority=0) == set()
+    assert written == []
+    # Atsaukšana joprojām atsauc pievienošanu
+    assert todo_list.undo()[0] == "removed"
+
+
+def test_update_is_one_undo_step():
+    todo_list, written = make_list()
+    todo = todo_list.todos[1]
+    todo_list.update(todo.id, text="Atskaite", due=1000.0, priority=3)
+    kind, undone, fields = todo_list.undo()
+    assert (kind, undone, fields) == ("updated", todo, {"text", "due", "priority"})
+    assert (todo.text, todo.due, todo.priority) == ("Uzrakstīt atskaiti", None, 0)
+    todo_list.redo()
+    assert (todo.text, todo.due, todo.priority) == ("Atskaite", 1000.0, 3)
+
+
+def test_wrappers_return_the_todo():
+    todo_list, _ = make_list()
+    todo = todo_list.todos[0]
+    assert todo_list.edit(todo.id, "Piens") is todo
+    assert todo_list.set_due(todo.id, 50.0, 40.0) is todo
+    assert todo_list.set_attributes(todo.id, ("darbs",), 1) is todo
+    assert todo_list.set_attributes(todo.id, ("darbs",), 1) is todo
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+import todo_io
+from todo_store import TodoStore
+
+
+def sample_store():
+    store = TodoStore()
+    store.add("piens, maize", tags=("mājas",), due=50.0)
+    store.add("atskaite \"Q3\"", completed=True, completed_at=12.5, priority=3)
+    store.add("zvans", remind_at=40.0, tags=("darbs", "mājas"), priority=1)
+    return store
+
+
+def export(path, todos, fmt=None):
+    return list(todo_io.export_steps(str(path), todos, fmt))
+
+
+def read(path, fmt=None):
+    return list(todo_io.TaskSource(str(path), fmt))
+
+
+@pytest.mark.parametrize("name", ["todos.csv", "todos.jsonl", "kopija.json", "kopija.todobin"])
+def test_export_and_import_keep_every_field(tmp_path, name):
+    store = sample_store()
+    path = tmp_path / name
+    export(path, store)
+    assert read(path) == store.to_dicts()
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("todos.md", [("piens, maize", False), ("atskaite \"Q3\"", True), ("zvans", False)]),
+    ("todos.txt", [("piens, maize", False), ("atskaite \"Q3\"", False), ("zvans", False)]),
+])
+def test_plain_formats_keep_text_and_status(tmp_path, name, expected):
+    path = tmp_path / name
+    export(path, sample_store())
+    assert [(task["text"], task["completed"]) for task in read(path)] == expected
+
+
+def test_export_and_import_report_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(todo_io, "EXPORT_CHUNK", 2)
+    path = tmp_path / "todos.txt"
+    assert export(path, sample_store()) == [2, 3]
+    source = todo_io.TaskSource(str(path))
+    assert source.fraction == 0.0
+    list(source)
+    assert source.fraction == 1.0
+
+
+def test_cancelled_export_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(todo_io, "EXPORT_CHUNK", 1)
+    path = tmp_path / "todos.csv"
+    steps = todo_io.export_steps(str(path), sample_store())
+    next(steps)
+    steps.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_csv_without_header_and_other_column_names(tmp_path):
+    plain = tmp_path / "bez.csv"
+    plain.write_text("piens,x\nmaize,\n\n", encoding="utf-8")
+    assert read(plain) == [{"text": "piens", "completed": True}, {"text": "maize", "completed": False}]
+
+    named = tmp_path / "ar.csv"
+    named.write_text("﻿Task,Done,Priority,Tags\nzvans,yes,augsta,#darbs Mājas\n", encoding="utf-8")
+    assert read(named) == [{"text": "zvans", "completed": True, "tags": ["darbs", "mājas"], "priority": 3}]
+
+
+def test_markdown_skips_everything_but_checklist(tmp_path):
+    path = tmp_path / "todos.md"
+    path.write_text("# Virsraksts\n\nTeksts\n- [ ] piens\n* [X] maize\n- bez rūtiņas\n", encoding="utf-8")
+    assert read(path) == [{"text": "piens", "completed": False}, {"text": "maize", "completed": True}]
+
+
+def test_jsonl_reports_bad_line(tmp_path):
+    path = tmp_path / "todos.jsonl"
+    path.write_text('"piens"\n{"text": "maize", "completed": "true"}\n{bojāts\n', encoding="utf-8")
+    source = iter(todo_io.TaskSource(str(path)))
+    assert next(source) == {"text": "piens", "completed": False}
+    assert next(source) == {"text": "maize", "completed": True}
+    with pytest.raises(ValueError, match="3. rindā"):
+        next(source)
+
+
+def test_json_list_with_journal_is_replayed(tmp_path):
+    path = tmp_path / "cits.json"
+    export(path, sample_store())
+    (tmp_path / "cits.json.journal").write_text(
+        '{"op": "add", "todo": {"id": "z", "text": "no žurnāla", "completed": false}, "seq": 1}\n', encoding="utf-8")
+    assert [task["text"] for task in read(path)][-1] == "no žurnāla"
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+
+import pytest
+
+from todo_store import (ALL_KEY, COMPLETED_KEY, SORT_KEYS, BitmapIndex, Todo, TodoOrder, TodoStore, TodoView,
+                        priority_key, tag_key)
+
+WORDS = ["piens", "Maize", "atskaite", "zvans", "ābols", "dārzs", "Eksāmens"]
+TAGS = ["darbs", "mājas", "dārzs"]
+
+
+def random_store(rng, count):
+    store = TodoStore()
+    for i in range(count):
+        store.add(f"{rng.choice(WORDS)} {i}", completed=rng.random() < 0.4,
+                  completed_at=rng.choice([None, float(rng.randrange(100))]),
+                  due=rng.choice([None, float(rng.randrange(100))]),
+                  tags=tuple(rng.sample(TAGS, rng.randrange(3))), priority=rng.randrange(4))
+    return store
+
+
+def expected_order(todos, key, grouped, reverse):
+    if grouped:
+        groups = [sorted((todo for todo in todos if todo.completed == part), key=key, reverse=reverse)
+                  for part in (False, True)]
+        return groups[0] + groups[1]
+    return sorted(todos, key=key, reverse=reverse)
+
+
+def test_store_counters_and_positions():
+    store = TodoStore()
+    first = store.add("viens")
+    second = store.add("divi", completed=True)
+    third = store.add("trīs")
+    assert (len(store), store.completed_count, store.active_count) == (3, 1, 2)
+    assert store.index_of(third.id) == 2
+
+    index, removed = store.remove(second.id)
+    assert (index, removed, store.completed_count) == (1, second, 0)
+    store.insert_many([second])
+    assert list(store) == [first, second, third]
+    assert store.completed_count == 1
+
+    restored = Todo("jauns", "ievietots")
+    assert store.insert_before(restored, third.id) == 2
+    assert [todo.text for todo in store] == ["viens", "divi", "ievietots", "trīs"]
+    assert store.index_of(restored.id) == 2
+
+
+def test_remove_many_reports_first_position():
+    store = TodoStore()
+    todos = [store.add(str(i), completed=i % 2 == 0) for i in range(10)]
+    first, removed = store.remove_many([todos[7].id, todos[3].id, "nav"])
+    assert first == 3 and removed == [todos[3], todos[7]]
+    assert [todo.text for todo in store] == ["0", "1", "2", "4", "5", "6", "8", "9"]
+    assert store.completed_count == 5
+    assert store.remove_many(["nav"]) == (None, [])
+
+
+def test_view_keeps_insertion_order():
+    store = TodoStore()
+    todos = [store.add(str(i)) for i in range(6)]
+    view = TodoView([todos[4], todos[1]])
+    assert view.insert(todos[2]) == 1
+    assert [todo.text for todo in view] == ["1", "2", "4"]
+    assert view.remove_many([todos[4], todos[1]]) == 0
+    assert [todo.text for todo in view] == ["2"]
+
+
+@pytest.mark.parametrize("sort_key", sorted(SORT_KEYS))
+@pytest.mark.parametrize("grouped", [False, True])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_order_matches_sorting_after_changes(sort_key, grouped, reverse):
+    rng = random.Random(f"{sort_key}{grouped}{reverse}")
+    store = random_store(rng, 60)
+    key = SORT_KEYS[sort_key]
+    order = TodoOrder(store, key, grouped, reverse)
+
+    def check():
+        expected = expected_order(list(store), key, grouped, reverse)
+        assert list(order) == expected
+        for index, todo in enumerate(expected):
+            assert order[index] is todo
+            assert order.index_of(todo.id) == index
+
+    check()
+    for step in range(80):
+        action = rng.random()
+        if action < 0.3:
+            todo = store.add(f"{rng.choice(WORDS)} jauns {step}", completed=rng.random() < 0.3)
+            assert order.insert(todo) == expected_order(list(store), key, grouped, reverse).index(todo)
+        elif action < 0.5 and len(store):
+            todo = rng.choice(list(store))
+            index = order.index_of(todo.id)
+            assert order.remove(todo) == index
+            store.remove(todo.id)
+        elif action < 0.8 and len(store):
+            todo = rng.choice(list(store))
+            old = order.index_of(todo.id)
+            store.set_text(todo.id, f"{rng.choice(WORDS)} {step}")
+            store.set_completed(todo.id, not todo.completed, float(step))
+            moved = order.reposition(todo)
+            assert moved == (old, order.index_of(todo.id))
+        elif len(store) > 3:
+            todos = rng.sample(list(store), 3)
+            first = min(order.index_of(todo.id) for todo in todos)
+            assert order.remove_many(todos) == first
+            store.remove_many([todo.id for todo in todos])
+        check()
+
+
+def test_order_build_steps_merges_chunks(monkeypatch):
+    monkeypatch.setattr(TodoOrder, "BUILD_CHUNK", 7)
+    store = random_store(random.Random(1), 50)
+    order = TodoOrder(store, SORT_KEYS["text"], grouped=False)
+    assert list(order) == sorted(store, key=SORT_KEYS["text"])
+
+
+def expected_keys(todo):
+    return BitmapIndex.keys(todo)
+
+
+def test_bitmaps_follow_every_change():
+    rng = random.Random(5)
+    store = random_store(rng, 200)
+    removed = []
+
+    def check():
+        bitmaps = store.bitmaps
+        keys = {ALL_KEY, COMPLETED_KEY} | {priority_key(level) for level in range(1, 4)} | {tag_key(t) for t in TAGS}
+        for key in keys:
+            expected = [todo for todo in store if key in expected_keys(todo)]
+            assert bitmaps.todos(bitmaps.bitmap(key)) == expected, key
+            assert bitmaps.count(key) == len(expected)
+        assert bitmaps.tag_counts() == {tag: count for tag in TAGS
+                                        if (count := sum(tag in todo.tags for todo in store))}
+
+    check()
+    for step in range(300):
+        action = rng.random()
+        if action < 0.2:
+            store.add(str(step), tags=(rng.choice(TAGS),))
+        elif action < 0.4 and len(store) > 1:
+            _, todo = store.remove(rng.choice(list(store)).id)
+            removed.append(todo)
+        elif action < 0.5 and removed:
+            # Atsaukta dzēšana ievieto uzdevumus vidū - bitu secība vairs nesakrīt ar seq
+            store.insert_many([removed.pop(rng.randrange(len(removed)))])
+        elif action < 0.75:
+            todo = rng.choice(list(store))
+            store.set_attributes(todo.id, rng.sample(TAGS, rng.randrange(3)), rng.randrange(4))
+        else:
+            todo = rng.choice(list(store))
+            store.set_completed(todo.id, not todo.completed, float(step))
+        if step % 25 == 0:
+            check()
+    check()
+
+
+def test_bitmaps_renumber_after_many_removals(monkeypatch):
+    monkeypatch.setattr(BitmapIndex, "COMPACT_MIN", 8)
+    store = TodoStore()
+    todos = [store.add(str(i), tags=("darbs",) if i % 3 == 0 else ()) for i in range(40)]
+    store.remove_many([todo.id for todo in todos[:30]])
+    bitmaps = store.bitmaps
+    assert len(bitmaps._todos) < 40
+    assert bitmaps.todos(bitmaps.bitmap(tag_key("darbs"))) == [todo for todo in todos[30:] if "darbs" in todo.tags]
+    assert bitmaps.todos(bitmaps.bitmap_of([todos[35], todos[31]])) == [todos[31], todos[35]]
+
+
+def test_due_index_counts_and_next_deadline():
+    rng = random.Random(9)
+    store = TodoStore()
+    for i in range(100):
+        store.add(str(i), completed=rng.random() < 0.3, due=rng.choice([None, float(rng.randrange(50))]))
+
+    def active_due():
+        return [todo for todo in store if todo.due is not None and not todo.completed]
+
+    for step in range(200):
+        todo = rng.choice(list(store))
+        if step % 3 == 0:
+            store.set_completed(todo.id, not todo.completed, float(step))
+        elif step % 3 == 1:
+            store.set_due(todo.id, rng.choice([None, float(rng.randrange(50))]), None)
+        else:
+            store.remove(todo.id)
+            store.add(f"jauns {step}", due=float(rng.randrange(50)))
+        when = float(rng.randrange(-5, 55))
+        due = active_due()
+        index = store.due_index
+        assert len(index) == len(due)
+        assert index.count_until(when) == sum(todo.due <= when for todo in due)
+        assert sorted(index.between(10.0, 20.0), key=id) == sorted((t for t in due if 10 < t.due <= 20), key=id)
+        later = [todo.due for todo in due if todo.due > when]
+        assert index.next_after(when) == (min(later) if later else None)
+
+
+def test_due_index_loaded_in_batches_is_sorted_before_use():
+    store = TodoStore(Todo(str(i), str(i), due=float(100 - i)) for i in range(10))
+    assert store.due_index.count_until(math.inf) == 10
+    assert store.due_index.next_after(95.0) == 96.0
+
+
+def test_todo_round_trips_through_dict():
+    data = {"id": "a", "text": "piens", "completed": True, "completed_at": 5.0, "due": 7.0, "remind_at": 6.0,
+            "tags": ["darbs"], "priority": 2}
+    assert Todo.from_dict(data).to_dict() == data
+    assert Todo.from_dict({"id": "b", "text": "x"}).to_dict() == {"id": "b", "text": "x", "completed": False}
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Komandrinda uzdevumu sarakstam - strādā bez grafiskās saskarnes un neimportē tkinter.
+#
+# Piemēri:
+#   python3 todo_cli.py list
+#   python3 todo_cli.py add "Nopirkt pienu" "Izmazgāt traukus"
+#   python3 todo_cli.py done 1 3
+#   python3 todo_cli.py due 2 "24.12.2024 18:00" --remind "24.12.2024 9:00"
+#   python3 todo_cli.py tag 2 darbs --priority high
+#   python3 todo_cli.py list --filter "#darbs AND priority>=high AND active"
+#   python3 todo_cli.py import uzdevumi.csv
+#   python3 todo_cli.py export kopija.md
+#   python3 todo_cli.py archive --days 7
+#   python3 todo_cli.py --storage binary list
+#   python3 todo_cli.py lists --new Darbs
+#   python3 todo_cli.py --list Darbs add "Uzrakstīt atskaiti"
+#   python3 todo_cli.py sync --url http://127.0.0.1:8765
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from archive import ARCHIVE_AFTER_DAYS, KEEP_COMPLETED
+from filters import PRIORITY_NAMES, format_tags, parse_priority, parse_query, parse_tags
+from lists import ListManifest
+from reminders import MORNING, day_end, format_short, parse_when
+from search import SearchIndex
+from outbox import SyncOutbox, outbox_path
+from todo_core import TodoList
+from todo_io import FORMATS, TaskSource, export_steps
+
+
+def resolve(todo_list, refs):
+    """Pārvērš uzdevumu numurus (no 1) vai id sākumus par id"""
+    ids = []
+    for ref in refs:
+        if ref.isdigit() and 1 <= int(ref) <= len(todo_list):
+            ids.append(todo_list.todos[int(ref) - 1].id)
+            continue
+        matches = [todo.id for todo in todo_list if todo.id.startswith(ref)]
+        if len(matches) != 1:
+            raise SystemExit(f"Nav atrasts viennozīmīgs uzdevums: {ref}")
+        ids.append(matches[0])
+    return ids
+
+
+def filter_todos(todos, text):
+    """Uzdevumi, kas atbilst strukturētam vaicājumam vai tekstam - teksta indekss tiek veidots tikai vajadzības gadījumā"""
+    index = []
+
+    def search():
+        if not index:
+            index.append(SearchIndex(todos))
+        return index[0]
+
+    query = parse_query(text)
+    if query is None:
+        return sorted((todos.get(todo_id) for todo_id in search().search(text)), key=lambda todo: todo.seq)
+    return todos.bitmaps.todos(query.evaluate(todos, search, time.time()))
+
+
+def cmd_list(todo_list, args):
+    """Izdrukā uzdevumus"""
+    todos = todo_list.todos
+    shown = enumerate(todos, 1)
+    if args.filter:
+        # Numuri paliek tie paši, kas visā sarakstā, lai tos varētu izmantot citās komandās
+        shown = ((todos.index_of(todo.id) + 1, todo) for todo in filter_todos(todos, args.filter))
+    for number, todo in shown:
+        if args.active and todo.completed or args.completed and not todo.completed:
+            continue
+        status = "✓" if todo.completed else "○"
+        tags = f" {format_tags(todo.tags)}" if todo.tags else ""
+        priority = f"  ({PRIORITY_NAMES[todo.priority]} prioritāte)" if todo.priority else ""
+        due = f"  (termiņš {format_short(todo.due)})" if todo.due is not None else ""
+        print(f"{number:>5} {status} {todo.text}{tags}{priority}{due}  [{todo.id[:8]}]")
+    now = time.time()
+    overdue = todo_list.todos.due_index.count_until(now)
+    due_today = todo_list.todos.due_index.count_until(day_end(now)) - overdue
+    print(f"{todo_list.todos.completed_count} pabeigti, {todo_list.todos.active_count} aktīvi, "
+          f"{overdue} nokavēti, {due_today} šodien")
+
+
+def cmd_add(todo_list, args):
+    """Pievieno uzdevumus"""
+    texts = [text.strip() for text in args.texts if text.strip()]
+    todo_list.add_many(texts)
+    print(f"Pievienoti {len(texts)} uzdevumi")
+
+
+def cmd_done(todo_list, args):
+    """Atzīmē uzdevumus kā pabeigtus vai atkal aktīvus"""
+    changed = todo_list.set_completed_many(resolve(todo_list, args.refs), args.command == "done")
+    print(f"Mainīti {len(changed)} uzdevumi")
+
+
+def cmd_due(todo_list, args):
+    """Iestata vai noņem uzdevuma termiņu un atgādinājumu"""
+    todo_id = resolve(todo_list, [args.ref])[0]
+    try:
+        due = None if args.clear else parse_when(args.when or "")
+        remind_at = None if args.clear else parse_when(args.remind or "", MORNING)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    todo = todo_list.set_due(todo_id, due, remind_at)
+    if todo.due is None:
+        print(f"Termiņš noņemts: {todo.text}")
+    else:
+        print(f"Termiņš {format_short(todo.due)}: {todo.text}")
+
+
+def cmd_tag(todo_list, args):
+    """Pievieno uzdevumam birkas un maina prioritāti"""
+    todo = todo_list.get(resolve(todo_list, [args.ref])[0])
+    tags = () if args.clear else todo.tags
+    tags = tuple(dict.fromkeys(tags + parse_tags(args.tags)))
+    try:
+        priority = todo.priority if args.priority is None else parse_priority(args.priority)
+    except ValueError as error:
+        raise SystemExit(str(error))
+    todo_list.set_attributes(todo.id, tags, priority)
+    priority = f"{PRIORITY_NAMES[todo.priority]} prioritāte" if todo.priority else "bez prioritātes"
+    print(f"{todo.text}: {format_tags(todo.tags) or 'bez birkām'}, {priority}")
+
+
+def cmd_delete(todo_list, args):
+    """Dzēš uzdevumus"""
+    _, removed = todo_list.delete_many(resolve(todo_list, args.refs))
+    print(f"Dzēsti {len(removed)} uzdevumi")
+
+
+def cmd_clear(todo_list, args):
+    """Dzēš visus pabeigtos uzdevumus"""
+    _, removed = todo_list.clear_completed()
+    print(f"Dzēsti {len(removed)} pabeigti uzdevumi")
+
+
+def cmd_archive(todo_list, args):
+    """Pārvieto sen pabeigtos uzdevumus uz arhīvu, parāda arhīvu vai atjauno no tā"""
+    if args.list:
+        for todo in todo_list.archive.load():
+            completed_at = datetime.fromtimestamp(todo["completed_at"]).strftime("%d.%m.%Y") if "completed_at" in todo else ""
+            print(f"{completed_at:>10} {todo['text']}  [{todo['id'][:8]}]")
+        return
+    if args.restore:
+        archived = todo_list.archive.load()
+        restored = []
+        for ref in args.restore:
+            matches = [todo for todo in archived if todo["id"].startswith(ref)]
+            if len(matches) != 1:
+                raise SystemExit(f"Arhīvā nav atrasts viennozīmīgs uzdevums: {ref}")
+            restored.append(matches[0])
+        todo_list.restore_archived(restored)
+        print(f"Atjaunoti {len(restored)} uzdevumi")
+        return
+    _, archived = todo_list.archive_old(args.days, args.keep)
+    print(f"Arhivēti {len(archived)} uzdevumi")
+
+
+def cmd_lists(manifest, args):
+    """Parāda sarakstus ar skaitiem no manifesta vai izveido jaunu sarakstu"""
+    if args.new:
+        if manifest.find(args.new) is not None:
+            raise SystemExit(f"Saraksts jau ir: {args.new}")
+        entry = manifest.create(args.new)
+        manifest.save()
+        print(f"Izveidots saraksts {entry.name} ({entry.file})")
+        return
+    for entry in manifest.entries:
+        marker = "*" if entry.id == manifest.current_id else " "
+        counts = f"{entry.active} aktīvi, {entry.total} kopā" if entry.total is not None else "skaits nav zināms"
+        print(f"{marker} {entry.name}  ({counts})  [{entry.id}]")
+
+
+def cmd_sync(todo_list, args):
+    """Apmainās ar izmaiņām ar sinhronizācijas serveri - tiek sūtīti un saņemti tikai mainītie uzdevumi"""
+    # Tīkla moduļi tiek ielādēti tikai šai komandai - pārējās komandas startē ātrāk
+    from sync import ListSync, SyncError
+
+    url = args.url or os.environ.get("TODO_SYNC_URL")
+    if not url:
+        raise SystemExit("Nav norādīts serveris: --url vai TODO_SYNC_URL")
+    if todo_list.outbox is None:
+        todo_list.outbox = SyncOutbox(outbox_path(args.path))
+    sync = ListSync(args.path, url, args.list_name, todo_list.outbox)
+    taken = sync.take()
+    records = sync.records(todo_list.todos, sync.outgoing(todo_list.todos, taken))
+    try:
+        received, cursor, pending = sync.exchange(records, taken)
+    except SyncError as e:
+        raise SystemExit(f"Sinhronizācija neizdevās: {e}")
+    ops = sync.remote_ops(todo_list.todos, received, pending)
+    todo_list.merge_remote(ops)
+    sync.commit(cursor)
+    print(f"Nosūtīti {len(records)} uzdevumi, saņemtas {len(ops)} izmaiņas")
+
+
+def show_progress(text):
+    """Progresa rinda termināļa stderr (pāradresētā izvadē netiek rakstīta)"""
+    if sys.stderr.isatty():
+        sys.stderr.write("\r" + text + " ")
+        sys.stderr.flush()
+
+
+def cmd_import(todo_list, args):
+    """Pievieno uzdevumus no faila pa porcijām - Ctrl+C pārtrauc, saglabājot jau importēto"""
+    source = TaskSource(args.source, args.format)
+    steps = todo_list.import_steps(source)
+    count = 0
+    try:
+        for todos in steps:
+            count += len(todos)
+            fraction = source.fraction
+            show_progress(f"{count} uzdevumi" + (f" ({fraction:.0%})" if fraction is not None else ""))
+    except KeyboardInterrupt:
+        show_progress("")
+        print(f"Pārtraukts - importēti {count} uzdevumi")
+        return
+    except ValueError as error:
+        show_progress("")
+        print(f"Kļūda failā: {error} - importēti {count} uzdevumi")
+        return
+    finally:
+        steps.close()
+        source.close()
+    show_progress("")
+    print(f"Importēti {count} uzdevumi")
+
+
+def cmd_export(todo_list, args):
+    """Saglabā sarakstu citā failā - formāts pēc faila paplašinājuma vai --format"""
+    total = len(todo_list)
+    steps = export_steps(args.dest, todo_list, args.format)
+    try:
+        for count in steps:
+            show_progress(f"{count}/{total} uzdevumi")
+    except KeyboardInterrupt:
+        show_progress("")
+        print("Pārtraukts - fails netika saglabāts")
+        return
+    finally:
+        steps.close()
+    show_progress("")
+    print(f"Eksportēti {total} uzdevumi")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Uzdevumu saraksts komandrindā")
+    parser.add_argument("--file", default="todos.json", help="uzdevumu fails (noklusējums: todos.json)")
+    parser.add_argument("--storage", choices=("journal", "binary", "sqlite"), help="krātuves veids")
+    parser.add_argument("--list", help="saraksta nosaukums vai id (noklusējums: --file)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="parādīt uzdevumus")
+    list_parser.add_argument("--active", action="store_true", help="tikai aktīvie")
+    list_parser.add_argument("--completed", action="store_true", help="tikai pabeigtie")
+    list_parser.add_argument("--filter", metavar="VAICĀJUMS",
+                             help='teksts vai vaicājums, piemēram "#darbs AND priority>=high AND active"')
+    list_parser.set_defaults(handler=cmd_list)
+
+    add_parser = commands.add_parser("add", help="pievienot uzdevumus")
+    add_parser.add_argument("texts", nargs="+")
+    add_parser.set_defaults(handler=cmd_add)
+
+    for name, help_text in (("done", "atzīmēt kā pabeigtus"), ("undone", "atzīmēt kā aktīvus")):
+        done_parser = commands.add_parser(name, help=help_text)
+        done_parser.add_argument("refs", nargs="+", help="uzdevuma numurs vai id sākums")
+        done_parser.set_defaults(handler=cmd_done)
+
+    due_parser = commands.add_parser("due", help="iestatīt uzdevuma termiņu un atgādinājumu")
+    due_parser.add_argument("ref", help="uzdevuma numurs vai id sākums")
+    due_parser.add_argument("when", nargs="?", help="termiņš: dd.mm.gggg [hh:mm], dd.mm. vai hh:mm")
+    due_parser.add_argument("--remind", metavar="LAIKS", help="atgādinājuma laiks tajā pašā formātā")
+    due_parser.add_argument("--clear", action="store_true", help="noņemt termiņu un atgādinājumu")
+    due_parser.set_defaults(handler=cmd_due)
+
+    tag_parser = commands.add_parser("tag", help="pievienot birkas un mainīt prioritāti")
+    tag_parser.add_argument("ref", help="uzdevuma numurs vai id sākums")
+    tag_parser.add_argument("tags", nargs="*", help="birkas (ar vai bez #)")
+    tag_parser.add_argument("--priority", metavar="LĪMENIS", help="none/low/medium/high vai nav/zema/vidēja/augsta")
+    tag_parser.add_argument("--clear", action="store_true", help="vispirms noņemt esošās birkas")
+    tag_parser.set_defaults(handler=cmd_tag)
+
+    delete_parser = commands.add_parser("delete", help="dzēst uzdevumus")
+    delete_parser.add_argument("refs", nargs="+", help="uzdevuma numurs vai id sākums")
+    delete_parser.set_defaults(handler=cmd_delete)
+
+    clear_parser = commands.add_parser("clear", help="dzēst visus pabeigtos uzdevumus")
+    clear_parser.set_defaults(handler=cmd_clear)
+
+    archive_parser = commands.add_parser("archive", help="pārvietot sen pabeigtos uzdevumus uz arhīvu")
+    archive_parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS,
+                                help=f"pabeigti senāk par tik dienām (noklusējums: {ARCHIVE_AFTER_DAYS}, 0 - neņemt vērā)")
+    archive_parser.add_argument("--keep", type=int, default=KEEP_COMPLETED,
+                                help=f"cik jaunākos pabeigtos paturēt sarakstā (noklusējums: {KEEP_COMPLETED}, 0 - visus)")
+    archive_parser.add_argument("--list", action="store_true", help="parādīt arhivētos uzdevumus")
+    archive_parser.add_argument("--restore", nargs="+", metavar="ID", help="atjaunot uzdevumus no arhīva pēc id sākuma")
+    archive_parser.set_defaults(handler=cmd_archive)
+
+    lists_parser = commands.add_parser("lists", help="parādīt sarakstus (projektus)")
+    lists_parser.add_argument("--new", metavar="NOSAUKUMS", help="izveidot jaunu sarakstu")
+    lists_parser.set_defaults(handler=cmd_lists)
+
+    sync_parser = commands.add_parser("sync", help="sinhronizēt sarakstu ar serveri (sync_server.py)")
+    sync_parser.add_argument("--url", help="servera adrese (noklusējums: TODO_SYNC_URL)")
+    sync_parser.set_defaults(handler=cmd_sync)
+
+    formats = sorted(set(FORMATS.values()))
+    import_parser = commands.add_parser("import", help="importēt uzdevumus no faila")
+    import_parser.add_argument("source", help=".csv, .jsonl, .md, .txt, .json, .todobin vai - (standarta ievade)")
+    import_parser.add_argument("--format", choices=formats, help="faila formāts (noklusējums: pēc paplašinājuma)")
+    import_parser.set_defaults(handler=cmd_import)
+
+    export_parser = commands.add_parser("export", help="saglabāt sarakstu citā failā")
+    export_parser.add_argument("dest", help=".csv, .jsonl, .md, .txt, .json vai .todobin")
+    export_parser.add_argument("--format", choices=formats, help="faila formāts (noklusējums: pēc paplašinājuma)")
+    export_parser.set_defaults(handler=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    manifest = ListManifest.open(args.file)
+    if args.command == "lists":
+        args.handler(manifest, args)
+        return 0
+
+    if args.list:
+        entry = manifest.find(args.list)
+        if entry is None:
+            raise SystemExit(f"Nav tāda saraksta: {args.list}")
+    else:
+        entry = manifest.for_file(args.file)
+    # Sinhronizācijai vajag saraksta failu un nosaukumu, ar kuru tas ir zināms serverī
+    args.path = entry.file if entry is not None else args.file
+    args.list_name = entry.name if entry is not None else None
+    todo_list = TodoList.open(args.path, args.storage)
+    try:
+        args.handler(todo_list, args)
+    finally:
+        todo_list.close()
+
+    # Manifests tiek atjaunots tikai tad, ja tāds jau ir - viena saraksta lietotājiem jauns fails nerodas
+    if entry is not None and os.path.exists(manifest.path):
+        if manifest.set_counts(entry.id, todo_list.todos.completed_count, todo_list.todos.active_count):
+            manifest.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
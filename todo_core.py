@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+
+# Uzdevumu saraksta darbības bez lietotāja saskarnes.
+#
+# TodoList apvieno TodoStore (saraksts atmiņā) ar krātuvi: katra darbība
+# izmaina sarakstu un nodod izmaiņu ierakstus saglabāšanai. Darbības ar
+# vairākiem uzdevumiem (add_many, toggle_many, delete_many) tiek saglabātas ar
+# vienu rakstīšanu. Šis modulis neimportē tkinter, tāpēc to var izmantot gan
+# grafiskā lietotne, gan komandrinda un skripti.
+#
+# Atsaukšanai tiek glabāts darbību žurnāls: katrs solis ir tikai skartie
+# uzdevumi (un mainīto lauku vecās vērtības), nevis visa saraksta kopija, tāpēc
+# viena soļa atmiņa nav atkarīga no saraksta garuma. Atsaukšana un atkārtošana
+# iet caur tām pašām izmaiņu saglabāšanas funkcijām kā parastās darbības.
+
+import os
+import time
+from collections import deque
+from itertools import islice
+
+from archive import Archive, archive_path, select_for_archive
+from storage import open_storage
+from outbox import SyncOutbox, outbox_path, sync_enabled
+from todo_store import Todo, TodoStore
+
+# Cik uzdevumu importēt vienā saglabāšanā
+IMPORT_CHUNK = 1000
+
+
+def completion_op(todo):
+    """Izmaiņas ieraksts uzdevuma statusam kopā ar pabeigšanas laiku"""
+    return {"op": "update", "id": todo.id, "fields": {"completed": todo.completed, "completed_at": todo.completed_at}}
+
+
+def fields_op(todo_id, fields):
+    """Izmaiņas ieraksts tikai norādītajiem uzdevuma laukiem"""
+    return {"op": "update", "id": todo_id,
+            "fields": {key: list(value) if key == "tags" else value for key, value in fields.items()}}
+
+
+class TodoList:
+    """Uzdevumu saraksts, kas pats saglabā savas izmaiņas"""
+
+    def __init__(self, storage, todos=None, persist=None, history_limit=None, archive=None, outbox=None):
+        self.storage = storage
+        self.todos = todos if todos is not None else TodoStore()
+        # Sen pabeigto uzdevumu fails - tiek nolasīts tikai pēc pieprasījuma
+        self.archive = archive
+        # Sinhronizācijas izmaiņu žurnāls (SyncOutbox) vai None, ja saraksts netiek sinhronizēts
+        self.outbox = outbox
+        # Funkcija, kas saņem izmaiņu sarakstu - grafiskā lietotne to nodod fona rakstītājam
+        self._save = persist or self._write
+        # Atsaukšanas un atkārtošanas soļi: ("add"|"delete", [uzdevumi]), ("toggle", [[uzdevums, otrs pabeigšanas laiks]])
+        # vai ("update", (uzdevums, {lauks: vecā vērtība}, {lauks: jaunā vērtība}))
+        self._undo = deque(maxlen=history_limit)
+        self._redo = []
+
+    @classmethod
+    def open(cls, path="todos.json", kind=None):
+        """Atver un ielādē sarakstu no faila"""
+        storage = open_storage(kind or os.environ.get("TODO_STORAGE", "journal"), path)
+        # Izmaiņas tiek atzīmētas sinhronizācijai, ja saraksts jau ir sinhronizēts vai serveris ir norādīts
+        outbox = SyncOutbox(outbox_path(path)) if sync_enabled(path) or os.environ.get("TODO_SYNC_URL") else None
+        return cls(storage, TodoStore.from_dicts(storage.load()), archive=Archive(archive_path(path), storage.lock), outbox=outbox)
+
+    def _persist(self, ops):
+        """Saglabā šī saraksta izmaiņas un atzīmē tās sinhronizācijai"""
+        if self.outbox is not None:
+            self.outbox.record(ops)
+        self._save(ops)
+
+    def _write(self, ops):
+        """Noklusētā saglabāšana - visas izmaiņas vienā rakstīšanā"""
+        self.storage.append_many(ops)
+        self.storage.maybe_compact(self.todos)
+        if self.outbox is not None:
+            self.outbox.flush()
+
+    def merge_remote(self, ops):
+        """Izpilda no servera saņemtās izmaiņas un saglabā tās - sinhronizācijai tās netiek atzīmētas"""
+        todos = self.todos
+        for op in ops:
+            if op["op"] == "add":
+                todos.append(Todo.from_dict(op["todo"]))
+            elif op["op"] == "delete":
+                todos.remove(op["id"])
+            else:
+                todo = todos.get(op["id"])
+                fields = op["fields"]
+                if "completed" in fields:
+                    todos.set_completed(todo.id, bool(fields["completed"]), fields.get("completed_at"))
+                if "text" in fields:
+                    todos.set_text(todo.id, fields["text"])
+                if "due" in fields or "remind_at" in fields:
+                    todos.set_due(todo.id, fields.get("due", todo.due), fields.get("remind_at", todo.remind_at))
+                if "tags" in fields or "priority" in fields:
+                    todos.set_attributes(todo.id, fields.get("tags", todo.tags), fields.get("priority", todo.priority))
+        if ops:
+            self._save(ops)
+
+    def close(self):
+        """Pabeidz rakstīšanu un atbrīvo failus"""
+        self.storage.release()
+        if self.archive is not None:
+            self.archive.close()
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def __len__(self):
+        return len(self.todos)
+
+    def __iter__(self):
+        return iter(self.todos)
+
+    def get(self, todo_id):
+        """Atrod uzdevumu pēc id"""
+        return self.todos.get(todo_id)
+
+    def add(self, text):
+        """Pievieno vienu uzdevumu"""
+        return self.add_many([text])[0]
+
+    def add_many(self, texts):
+        """Pievieno vairākus uzdevumus ar vienu saglabāšanu"""
+        added = [self.todos.add(text) for text in texts]
+        if added:
+            self._persist([{"op": "add", "todo": todo.to_dict()} for todo in added])
+            self._remember("add", added)
+        return added
+
+    def import_dicts(self, dicts):
+        """Pievieno uzdevumus no cita saraksta faila, saglabājot statusu un (ja nav aizņemts) id"""
+        added = self._add_dicts(dicts)
+        if added:
+            self._remember("add", added)
+        return added
+
+    def import_steps(self, dicts, chunk_size=IMPORT_CHUNK):
+        """Importē uzdevumus porcijās (katra ir viena saglabāšana) - dod katras porcijas pievienotos uzdevumus.
+        Viss imports ir viens atsaukšanas solis, arī ja ģenerators tiek aizvērts pusceļā."""
+        added = []
+        dicts = iter(dicts)
+        try:
+            while True:
+                todos = self._add_dicts(islice(dicts, chunk_size))
+                if not todos:
+                    return
+                added.extend(todos)
+                yield todos
+        finally:
+            if added:
+                self._remember("add", added)
+
+    def _add_dicts(self, dicts):
+        added = []
+        for data in dicts:
+            todo_id = data.get("id")
+            if todo_id in self.todos:
+                todo_id = None
+            added.append(self.todos.add(data["text"], data.get("completed", False), todo_id, data.get("completed_at"),
+                                        data.get("due"), data.get("remind_at"), data.get("tags") or (),
+                                        data.get("priority") or 0))
+        if added:
+            self._persist([{"op": "add", "todo": todo.to_dict()} for todo in added])
+        return added
+
+    def toggle(self, todo_id):
+        """Pārslēdz uzdevuma pabeigšanas statusu"""
+        todo = self.todos.get(todo_id)
+        self.set_completed_many([todo_id], not todo.completed)
+        return todo
+
+    def toggle_many(self, todo_ids):
+        """Pārslēdz vairāku uzdevumu statusu ar vienu saglabāšanu"""
+        now = time.time()
+        changed = []
+        for todo_id in todo_ids:
+            todo = self.todos.get(todo_id)
+            changed.append([todo, todo.completed_at])
+            self.todos.set_completed(todo_id, not todo.completed, now)
+        if changed:
+            self._persist([completion_op(todo) for todo, _ in changed])
+            self._remember("toggle", changed)
+        return [todo for todo, _ in changed]
+
+    def set_completed_many(self, todo_ids, completed):
+        """Iestata vienādu statusu vairākiem uzdevumiem - saglabā tikai tos, kas mainījās"""
+        now = time.time()
+        changed = []
+        for todo_id in todo_ids:
+            todo = self.todos.get(todo_id)
+            previous = todo.completed_at
+            if self.todos.set_completed(todo_id, completed, now):
+                changed.append([todo, previous])
+        if changed:
+            self._persist([completion_op(todo) for todo, _ in changed])
+            self._remember("toggle", changed)
+        return [todo for todo, _ in changed]
+
+    def edit(self, todo_id, text):
+        """Maina uzdevuma tekstu"""
+        self.update(todo_id, text=text)
+        return self.todos.get(todo_id)
+
+    def set_due(self, todo_id, due, remind_at):
+        """Maina uzdevuma termiņu un atgādinājuma laiku (None - nav)"""
+        self.update(todo_id, due=due, remind_at=remind_at)
+        return self.todos.get(todo_id)
+
+    def set_attributes(self, todo_id, tags, priority):
+        """Maina uzdevuma birkas un prioritāti"""
+        self.update(todo_id, tags=tags, priority=priority)
+        return self.todos.get(todo_id)
+
+    def update(self, todo_id, **fields):
+        """Maina uzdevuma laukus (text, due, remind_at, tags, priority) ar vienu saglabāšanu un vienu atsaukšanas soli.
+        Lauki ar to pašu vērtību tiek izlaisti - neko nemainoša saglabāšana netiek ne rakstīta, ne sinhronizēta.
+        Atgriež mainīto lauku kopu (tukšu, ja nekas nav mainīts)"""
+        todo = self.todos.get(todo_id)
+        if "tags" in fields:
+            fields["tags"] = tuple(fields["tags"])
+        new = {key: value for key, value in fields.items() if getattr(todo, key) != value}
+        if not new:
+            return set()
+        old = {key: getattr(todo, key) for key in new}
+        self._set_fields(todo, new)
+        self._remember("update", (todo, old, new))
+        return set(new)
+
+    def clear_reminder(self, todo_id):
+        """Noņem parādītu atgādinājumu, lai tas neatkārtotos - atsaukšanas vēsturē netiek pierakstīts"""
+        todo = self.todos.get(todo_id)
+        self.todos.set_due(todo_id, todo.due, None)
+        self._persist([{"op": "update", "id": todo_id, "fields": {"remind_at": None}}])
+        return todo
+
+    def delete(self, todo_id):
+        """Dzēš vienu uzdevumu - atgriež (pozīcija, uzdevums)"""
+        index, todo = self.todos.remove(todo_id)
+        self._persist([{"op": "delete", "id": todo_id}])
+        self._remember("delete", [todo])
+        return index, todo
+
+    def delete_many(self, todo_ids):
+        """Dzēš vairākus uzdevumus ar vienu saglabāšanu - atgriež (pirmā pozīcija, dzēstie uzdevumi)"""
+        first_index, removed = self.todos.remove_many(todo_ids)
+        if removed:
+            self._persist([{"op": "delete", "id": todo.id} for todo in removed])
+            self._remember("delete", removed)
+        return first_index, removed
+
+    def clear_completed(self):
+        """Dzēš visus pabeigtos uzdevumus ar vienu saglabāšanu"""
+        return self.delete_many([todo.id for todo in self.todos if todo.completed])
+
+    def archive_old(self, max_age_days, keep, now=None):
+        """Arhivē pabeigtos uzdevumus pēc vecuma un skaita noteikumiem"""
+        return self.archive_completed(select_for_archive(self.todos, now or time.time(), max_age_days, keep))
+
+    def archive_completed(self, todo_ids):
+        """Pārvieto pabeigtus uzdevumus uz arhīvu - atgriež (pirmā pozīcija, arhivētie).
+        Tā nav lietotāja darbība, tāpēc atsaukšanas vēsturē tā netiek pierakstīta."""
+        todos = [self.todos.get(todo_id) for todo_id in todo_ids if todo_id in self.todos]
+        todos = [todo for todo in todos if todo.completed]
+        if not todos:
+            return None, []
+        # Vispirms arhīvā - avārijas gadījumā uzdevums drīzāk paliek abos failos nekā nevienā
+        self.archive.append([todo.to_dict() for todo in todos])
+        first_index, removed = self.todos.remove_many([todo.id for todo in todos])
+        self._persist([{"op": "delete", "id": todo.id} for todo in removed])
+        return first_index, removed
+
+    def restore_archived(self, dicts):
+        """Atgriež arhivētus uzdevumus saraksta beigās kā aktīvus - atgriež pievienotos uzdevumus"""
+        added = self._add_dicts({"id": data["id"], "text": data["text"], "completed": False,
+                                 "tags": data.get("tags"), "priority": data.get("priority")} for data in dicts)
+        self.archive.remove([data["id"] for data in dicts])
+        return added
+
+    def _remember(self, kind, payload):
+        """Pieraksta darbību atsaukšanai - jauna darbība padara atkārtošanu neiespējamu"""
+        self._undo.append((kind, payload))
+        self._redo.clear()
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        """Atsauc pēdējo darbību - atgriež notikušo izmaiņu (skatīt _apply) vai None"""
+        if not self._undo:
+            return None
+        kind, payload = self._undo.pop()
+        self._redo.append((kind, payload))
+        return self._apply(kind, payload, undo=True)
+
+    def redo(self):
+        """Atkārto pēdējo atsaukto darbību"""
+        if not self._redo:
+            return None
+        kind, payload = self._redo.pop()
+        self._undo.append((kind, payload))
+        return self._apply(kind, payload, undo=False)
+
+    def _apply(self, kind, payload, undo):
+        """Izpilda darbību vai tās pretējo - atgriež ("inserted", uzdevumi), ("removed", pirmā pozīcija,
+        uzdevumi), ("toggled", uzdevumi) vai ("updated", uzdevums, mainīto lauku kopa)"""
+        if kind == "toggle":
+            return self._flip(payload)
+        if kind == "update":
+            todo, old, new = payload
+            return self._set_fields(todo, old if undo else new)
+        if (kind == "add") == undo:
+            return self._remove(payload)
+        return self._insert(payload)
+
+    def _insert(self, todos):
+        """Atgriež uzdevumus to iepriekšējās vietās"""
+        inserted = self.todos.insert_many(todos)
+        ops = []
+        # No beigām, lai uzdevums, pirms kura jāievieto, žurnālā jau būtu atjaunots
+        for todo in reversed(inserted):
+            # Žurnālā pieraksta, pirms kura uzdevuma tas atrodas, lai pēc ielādes vieta būtu tā pati
+            index = self.todos.index_of(todo.id)
+            following = self.todos[index + 1].id if index + 1 < len(self.todos) else None
+            ops.append({"op": "add", "todo": todo.to_dict(), "before": following})
+        if ops:
+            self._persist(ops)
+        return "inserted", inserted
+
+    def _remove(self, todos):
+        first_index, removed = self.todos.remove_many([todo.id for todo in todos])
+        if removed:
+            self._persist([{"op": "delete", "id": todo.id} for todo in removed])
+        return "removed", first_index, removed
+
+    def _flip(self, pairs):
+        ops = []
+        for pair in pairs:
+            todo, other_time = pair
+            if todo.id in self.todos:
+                # Pabeigšanas laiki tiek apmainīti, lai atsaukšana atjaunotu arī iepriekšējo laiku
+                pair[1] = todo.completed_at
+                self.todos.set_completed(todo.id, not todo.completed, other_time)
+                ops.append(completion_op(todo))
+        if ops:
+            self._persist(ops)
+        return "toggled", [todo for todo, _ in pairs]
+
+    def _set_fields(self, todo, fields):
+        if todo.id in self.todos:
+            todos = self.todos
+            if "text" in fields:
+                todos.set_text(todo.id, fields["text"])
+            if "due" in fields or "remind_at" in fields:
+                todos.set_due(todo.id, fields.get("due", todo.due), fields.get("remind_at", todo.remind_at))
+            if "tags" in fields or "priority" in fields:
+                todos.set_attributes(todo.id, fields.get("tags", todo.tags), fields.get("priority", todo.priority))
+            self._persist([fields_op(todo.id, fields)])
+        return "updated", todo, set(fields)
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+# Uzdevumu imports un eksports citos formātos.
+#
+# Atbalstītie formāti (pēc faila paplašinājuma):
+#   .csv                 kolonnas text, completed (un pēc izvēles id, completed_at, due, remind_at,
+#                        tags, priority)
+#   .jsonl, .ndjson      viens JSON objekts (vai teksts) rindā
+#   .md, .markdown       kontrolsaraksts "- [ ] uzdevums" / "- [x] uzdevums"
+#   .txt                 viens uzdevums rindā
+#   .json, .todobin      šīs lietotnes saraksta faili
+#
+# Gan imports, gan eksports ir ģeneratoru virknes: fails tiek lasīts un
+# rakstīts pa rindai, tāpēc atmiņa nav atkarīga no faila izmēra. Eksports
+# raksta pagaidu failā, kas tiek pārdēvēts tikai pēc veiksmīgām beigām.
+# Modulis neimportē tkinter.
+
+import csv
+import json
+import os
+import re
+import sys
+from itertools import islice
+
+import binsnap
+from filters import parse_priority, parse_tags
+from storage import SNAPSHOT_FORMAT, JournalStorage
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".txt": "text",
+    ".json": "json",
+    ".todobin": "binary",
+}
+
+# Failu dialogiem - (nosaukums, paraugs)
+FILE_TYPES = (
+    ("CSV", "*.csv"),
+    ("JSON Lines", "*.jsonl *.ndjson"),
+    ("Markdown", "*.md *.markdown"),
+    ("Teksts", "*.txt"),
+    ("Uzdevumu saraksts", "*.json *.todobin"),
+)
+
+# Cik uzdevumu rakstīt vienā eksporta solī
+EXPORT_CHUNK = 2000
+
+CSV_FIELDS = ("text", "completed", "completed_at", "id", "due", "remind_at", "tags", "priority")
+# CSV galvenes nosaukumi, kas tiek atpazīti arī no citām programmām
+TEXT_COLUMNS = ("text", "task", "title", "name", "uzdevums")
+COMPLETED_COLUMNS = ("completed", "done", "status", "pabeigts")
+TRUE_VALUES = ("1", "true", "yes", "y", "x", "✓", "done", "completed", "jā")
+
+# Viens kodētājs visam eksportam - json.dumps ar parametriem katrā izsaukumā veido jaunu
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+CHECKLIST_ITEM = re.compile(r"\s*[-*+]\s+\[([ xX])\]\s+(.*\S)")
+
+
+def format_of(path):
+    """Faila formāts pēc paplašinājuma - nezināms paplašinājums nozīmē tekstu"""
+    return FORMATS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def iter_chunks(items, size):
+    """Sadala iteratoru sarakstos pa size elementiem"""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_bool(value):
+    """Pabeigšanas statuss no teksta ("x", "true", "1", ...)"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def parse_time(value):
+    """Laiks (time.time() vienībās) no teksta - tukšs vai nesaprotams ir None"""
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def parse_level(value):
+    """Prioritāte no teksta ("high", "augsta", "3") - tukša vai nesaprotama ir 0"""
+    try:
+        return parse_priority(value) if value not in (None, "") else 0
+    except ValueError:
+        return 0
+
+
+def make_task(text, completed=False, completed_at=None, todo_id=None, due=None, remind_at=None, tags=(), priority=0):
+    """Importējamā uzdevuma ieraksts - None, ja teksts ir tukšs"""
+    text = " ".join(str(text).split())
+    if not text:
+        return None
+    task = {"text": text, "completed": completed}
+    if completed and completed_at is not None:
+        task["completed_at"] = completed_at
+    if todo_id:
+        task["id"] = str(todo_id)
+    if due is not None:
+        task["due"] = due
+    if remind_at is not None:
+        task["remind_at"] = remind_at
+    if tags:
+        task["tags"] = list(tags)
+    if priority:
+        task["priority"] = priority
+    return task
+
+
+class TaskSource:
+    """Importējamā faila uzdevumi pa vienam - fraction rāda, cik liela faila daļa jau ir nolasīta"""
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.format = fmt or format_of(path)
+        self.done = 0
+        self.total = None if path == "-" else max(1, os.path.getsize(path))
+        self._tasks = self._read()
+
+    @property
+    def fraction(self):
+        """Nolasītā daļa no 0 līdz 1 (standarta ievadei - None)"""
+        if self.total is None:
+            return None
+        return min(1.0, self.done / self.total)
+
+    def __iter__(self):
+        return self._tasks
+
+    def close(self):
+        """Aizver failu, ja imports tiek pārtraukts"""
+        self._tasks.close()
+
+    def _read(self):
+        if self.format in ("json", "binary") and self.path != "-" and binsnap.is_snapshot(self.path):
+            yield from self._read_binary()
+        elif self.format == "binary":
+            yield from self._read_binary()
+        elif self.format == "json":
+            yield from self._read_json()
+        else:
+            parse = {"csv": parse_csv, "jsonl": parse_jsonl, "markdown": parse_markdown}.get(self.format, parse_text)
+            if self.path == "-":
+                yield from (task for task in parse(self._lines(sys.stdin.buffer)) if task is not None)
+                return
+            with open(self.path, "rb") as f:
+                yield from (task for task in parse(self._lines(f)) if task is not None)
+
+    def _lines(self, f):
+        """Faila rindas kā teksts - skaita nolasītos baitus"""
+        first = True
+        for raw in f:
+            self.done += len(raw)
+            line = raw.decode("utf-8")
+            if first:
+                line = line.lstrip("﻿")
+                first = False
+            yield line
+
+    def _read_binary(self):
+        with binsnap.SnapshotReader(self.path) as reader:
+            total = max(1, len(reader))
+            for batch in reader.iter_batches(EXPORT_CHUNK):
+                self.done += len(batch) * self.total // total
+                yield from batch
+
+    def _read_json(self):
+        storage = JournalStorage(self.path)
+        if os.path.exists(storage.journal_path) or os.path.exists(storage.rotated_path):
+            # Sarakstam ir nesaspiestas izmaiņas - tās jāatkārto uz visu sarakstu
+            yield from storage.load()
+            storage.release()
+            return
+        for kind, payload in storage.iter_load():
+            if kind == "todos":
+                yield from payload
+            elif kind == "progress":
+                self.done = int(payload * self.total)
+
+
+def parse_text(lines):
+    """Viens uzdevums katrā netukšā rindā"""
+    for line in lines:
+        yield make_task(line)
+
+
+def parse_markdown(lines):
+    """Kontrolsaraksta rindas - pārējās rindas (virsraksti, teksts) tiek izlaistas"""
+    for line in lines:
+        match = CHECKLIST_ITEM.match(line)
+        if match:
+            yield make_task(match.group(2), match.group(1) != " ")
+
+
+def parse_jsonl(lines):
+    """JSON objekts ar "text" (un pēc izvēles "completed") vai vienkāršs teksts katrā rindā"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Nederīgs JSON {number}. rindā") from None
+        if isinstance(data, str):
+            yield make_task(data)
+        elif isinstance(data, dict) and "text" in data:
+            yield make_task(data["text"], parse_bool(data.get("completed", False)),
+                            parse_time(data.get("completed_at")), data.get("id"),
+                            parse_time(data.get("due")), parse_time(data.get("remind_at")),
+                            parse_tags(data.get("tags") or ()), parse_level(data.get("priority")))
+        else:
+            raise ValueError(f"{number}. rindā nav uzdevuma teksta")
+
+
+def parse_csv(lines):
+    """CSV ar galveni (text/task/title, completed/done/status) vai bez tās (teksts, statuss)"""
+    rows = csv.reader(lines)
+    header = next(rows, None)
+    if header is None:
+        return
+    names = [name.strip().lower() for name in header]
+    text_column = next((names.index(name) for name in TEXT_COLUMNS if name in names), None)
+    if text_column is None:
+        # Bez galvenes - pirmā kolonna ir teksts, otrā statuss
+        columns = {"text": 0, "completed": 1}
+        rows = _prepend(header, rows)
+    else:
+        columns = {"text": text_column}
+        completed_column = next((names.index(name) for name in COMPLETED_COLUMNS if name in names), None)
+        if completed_column is not None:
+            columns["completed"] = completed_column
+        for name in ("completed_at", "id", "due", "remind_at", "tags", "priority"):
+            if name in names:
+                columns[name] = names.index(name)
+
+    for row in rows:
+        def cell(name):
+            index = columns.get(name)
+            return row[index] if index is not None and index < len(row) else ""
+        if not row:
+            continue
+        yield make_task(cell("text"), parse_bool(cell("completed")), parse_time(cell("completed_at")), cell("id"),
+                        parse_time(cell("due")), parse_time(cell("remind_at")), parse_tags(cell("tags")),
+                        parse_level(cell("priority")))
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def export_steps(path, todos, fmt=None):
+    """Raksta uzdevumus failā pa porcijām - dod uzrakstīto skaitu pēc katras porcijas.
+    Pārtraukts eksports (ģeneratora aizvēršana) neatstāj pusrakstītu failu."""
+    fmt = fmt or format_of(path)
+    if fmt == "binary":
+        yield from binsnap.write_steps(path, (todo.to_dict() for todo in todos), chunk_size=EXPORT_CHUNK)
+        return
+
+    tmp_path = path + ".tmp"
+    finished = False
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            write_chunk = _chunk_writer(f, fmt)
+            count = 0
+            for chunk in iter_chunks(todos, EXPORT_CHUNK):
+                write_chunk(chunk)
+                count += len(chunk)
+                yield count
+            if fmt == "json":
+                f.write("]}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        finished = True
+    finally:
+        if not finished and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _chunk_writer(f, fmt):
+    """Funkcija, kas ieraksta vienu uzdevumu porciju dotajā formātā (galvene tiek uzrakstīta uzreiz)"""
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+
+        def write_csv(chunk):
+            writer.writerows((todo.text, int(todo.completed), "" if todo.completed_at is None else todo.completed_at,
+                              todo.id, "" if todo.due is None else todo.due,
+                              "" if todo.remind_at is None else todo.remind_at, " ".join(todo.tags),
+                              todo.priority or "") for todo in chunk)
+        return write_csv
+
+    if fmt == "jsonl":
+        encode = JSON_ENCODER.encode
+
+        def write_jsonl(chunk):
+            f.write("".join(encode(todo.to_dict()) + "\n" for todo in chunk))
+        return write_jsonl
+
+    if fmt == "markdown":
+        def write_markdown(chunk):
+            f.write("".join(f"- [{'x' if todo.completed else ' '}] {' '.join(todo.text.split())}\n"
+                            for todo in chunk))
+        return write_markdown
+
+    if fmt == "json":
+        # Tāds pats sākums kā krātuves momentuzņēmumam, lai to varētu lasīt pa daļām
+        f.write('{"format": "' + SNAPSHOT_FORMAT + '", "seq": 0, "todos": [')
+        encode = JSON_ENCODER.encode
+        first = [True]
+
+        def write_json(chunk):
+            data = ", ".join(encode(todo.to_dict()) for todo in chunk)
+            f.write(data if first[0] else ", " + data)
+            first[0] = False
+        return write_json
+
+    def write_text(chunk):
+        f.write("".join(" ".join(todo.text.split()) + "\n" for todo in chunk))
+    return write_text
@@ -0,0 +1,781 @@
+# -*- coding: utf-8 -*-
+
+# Uzdevumu datu modelis atmiņā.
+#
+# Katrs uzdevums ir kompakts Todo ieraksts ar __slots__ (bez vārdnīcas katram
+# uzdevumam), un TodoStore uztur pabeigto uzdevumu skaitu pie katras izmaiņas,
+# lai skaitītājs nekad nebūtu jāpārrēķina, pārlūkojot visu sarakstu.
+#
+# TodoView ir sakārtota uzdevumu apakškopa (piemēram, meklēšanas rezultāti),
+# ko var papildināt un samazināt pa vienam uzdevumam ar bināro meklēšanu.
+#
+# TodoOrder ir tie paši uzdevumi citā kārtojumā (pēc teksta, pabeigšanas laika).
+# Aktīvie un pabeigtie glabājas divos atsevišķi sakārtotos sarakstos, tāpēc
+# grupēšanu pēc statusa un apgriezto secību var ieslēgt bez pārkārtošanas, un
+# viena uzdevuma izmaiņa maksā divas binārās meklēšanas.
+#
+# DueIndex ir aktīvie uzdevumi ar termiņu, sakārtoti pēc termiņa - nokavēto
+# un šodien izpildāmo skaits ir divas binārās meklēšanas, nevis saraksta pārlūkošana.
+#
+# BitmapIndex katram uzdevumam piešķir bita numuru un katrai birkai, prioritātei
+# un statusam uztur bitu masīvu - strukturētie filtri (filters.py) ir AND/OR/NOT
+# ar veseliem skaitļiem, nevis visa saraksta pārlūkošana.
+
+import heapq
+import math
+from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from itertools import chain, compress
+from operator import attrgetter, itemgetter
+
+from storage import new_todo_id
+
+
+# Kārtojumu atslēgas - katrā ir arī seq, lai atslēgas būtu unikālas un vienādi uzdevumi paliktu pievienošanas secībā
+SORT_KEYS = {
+    "seq": lambda todo: todo.seq,
+    "text": lambda todo: (todo.text.casefold(), todo.seq),
+    # Uzdevumi bez pabeigšanas laika (aktīvie un no vecajiem failiem) ir beigās
+    "completed_at": lambda todo: (todo.completed_at if todo.completed_at is not None else math.inf, todo.seq),
+    # Uzdevumi bez termiņa ir beigās
+    "due": lambda todo: (todo.due if todo.due is not None else math.inf, todo.seq),
+}
+
+
+def bisect_seq(items, seq):
+    """Binārā meklēšana pēc kārtas numura sarakstā, kas sakārtots pēc seq"""
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if items[mid].seq < seq:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def without_indices(items, indices):
+    """Jauns saraksts bez dotajām (augošā secībā sakārtotajām) pozīcijām - viena pārkopēšana"""
+    kept = []
+    start = 0
+    for index in indices:
+        kept.extend(items[start:index])
+        start = index + 1
+    kept.extend(items[start:])
+    return kept
+
+
+class Todo:
+    """Viens uzdevums"""
+
+    # seq ir ievietošanas kārtas numurs - to piešķir TodoStore un failā tas netiek glabāts
+    # completed_at ir pabeigšanas laiks (time.time()) vai None, due un remind_at - termiņš un atgādinājuma laiks vai None
+    # tags ir birku kortežs (mazie burti), priority - 0 (nav) līdz 3 (augsta), slot - bita numurs BitmapIndex
+    __slots__ = ("id", "text", "completed", "seq", "completed_at", "due", "remind_at", "tags", "priority", "slot")
+
+    def __init__(self, todo_id, text, completed=False, completed_at=None, due=None, remind_at=None,
+                 tags=(), priority=0):
+        self.id = todo_id
+        self.text = text
+        self.completed = completed
+        self.completed_at = completed_at if completed else None
+        self.due = due
+        self.remind_at = remind_at
+        self.tags = tuple(tags)
+        self.priority = priority
+        self.seq = 0
+        self.slot = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Izveido uzdevumu no faila ieraksta"""
+        return cls(data["id"], data["text"], bool(data.get("completed", False)), data.get("completed_at"),
+                   data.get("due"), data.get("remind_at"), data.get("tags") or (), data.get("priority") or 0)
+
+    def to_dict(self):
+        """Pārvērš uzdevumu faila ierakstā"""
+        data = {"id": self.id, "text": self.text, "completed": self.completed}
+        # Vecajos failos laika nav - lauks tiek rakstīts tikai tad, kad tas ir zināms
+        if self.completed_at is not None:
+            data["completed_at"] = self.completed_at
+        if self.due is not None:
+            data["due"] = self.due
+        if self.remind_at is not None:
+            data["remind_at"] = self.remind_at
+        if self.tags:
+            data["tags"] = list(self.tags)
+        if self.priority:
+            data["priority"] = self.priority
+        return data
+
+    def __repr__(self):
+        return f"Todo({self.id!r}, {self.text!r}, completed={self.completed!r})"
+
+
+class DueIndex:
+    """Aktīvie uzdevumi ar termiņu - saraksts ar (termiņš, seq, uzdevums), sakārtots pēc termiņa.
+    (termiņš, seq) ir unikāls, tāpēc salīdzināšana nekad nenonāk līdz uzdevumam.
+
+    Ielādes porcijas tiek krātas atsevišķi un sakārtotas vienreiz pirms nākamā vaicājuma.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._pending = []
+
+    def __len__(self):
+        self._settle()
+        return len(self._entries)
+
+    def _settle(self):
+        """Iekļauj uzkrātās porcijas sakārtotajā sarakstā"""
+        if self._pending:
+            self._entries.extend(self._pending)
+            self._pending = []
+            self._entries.sort()
+
+    def add(self, todo):
+        """Pievieno uzdevumu, ja tas ir aktīvs un tam ir termiņš"""
+        if todo.due is None or todo.completed:
+            return
+        self._settle()
+        entry = (todo.due, todo.seq, todo)
+        self._entries.insert(bisect_left(self._entries, entry[:2]), entry)
+
+    def add_many(self, todos):
+        """Pievieno vairākus uzdevumus - tie tiek sakārtoti tikai tad, kad indekss ir vajadzīgs"""
+        self._pending.extend((todo.due, todo.seq, todo) for todo in todos
+                             if todo.due is not None and not todo.completed)
+
+    def discard(self, todo):
+        """Izņem uzdevumu - jāizsauc pirms termiņa vai statusa maiņas"""
+        if todo.due is None:
+            return
+        self._settle()
+        index = bisect_left(self._entries, (todo.due, todo.seq))
+        if index < len(self._entries) and self._entries[index][2] is todo:
+            del self._entries[index]
+
+    def discard_many(self, todos):
+        """Izņem vairākus uzdevumus - daudziem viena pārkopēšana"""
+        if len(todos) < 32:
+            for todo in todos:
+                self.discard(todo)
+            return
+        self._settle()
+        removed = {id(todo) for todo in todos}
+        self._entries = [entry for entry in self._entries if id(entry[2]) not in removed]
+
+    def count_until(self, when):
+        """Cik uzdevumu termiņš ir līdz when (ieskaitot)"""
+        self._settle()
+        return bisect_right(self._entries, (when, math.inf))
+
+    def between(self, start, end):
+        """Uzdevumi, kuru termiņš ir pēc start un līdz end (ieskaitot)"""
+        return [todo for _, _, todo in self._entries[self.count_until(start):self.count_until(end)]]
+
+    def next_after(self, when):
+        """Tuvākais termiņš pēc when vai None"""
+        index = self.count_until(when)
+        return self._entries[index][0] if index < len(self._entries) else None
+
+
+# BitmapIndex atslēgas - visi uzdevumi, pabeigtie, prioritātes līmenis un birka
+ALL_KEY = "all"
+COMPLETED_KEY = "completed"
+
+
+def priority_key(level):
+    return ("priority", level)
+
+
+def tag_key(tag):
+    return ("tag", tag)
+
+
+# Bitkartes bināro ciparu pārvēršana baitos 0/1 - itertools.compress atlasītājiem
+BIT_VALUES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class BitmapIndex:
+    """Bitu masīvi (bytearray) pēc birkām, prioritātes un statusa
+
+    Katram uzdevumam ir bita numurs (slot). Jauni numuri tiek piešķirti tikai beigās,
+    tāpēc parasti numuri ir tajā pašā secībā kā seq un rezultāti nav jākārto; kad
+    izņemto uzdevumu caurumu ir vairāk nekā dzīvo, numuri tiek piešķirti no jauna.
+    Vaicājumam masīvs tiek pārvērsts veselā skaitlī, ar kuru AND/OR/NOT ir viena
+    operācija visam sarakstam.
+    """
+
+    # Numuri tiek pārkārtoti, ja caurumu ir vairāk par šo un vairāk nekā dzīvo uzdevumu
+    COMPACT_MIN = 1024
+
+    def __init__(self):
+        # Bita numurs -> uzdevums (vai None izņemtam)
+        self._todos = []
+        self._holes = 0
+        self._bits = {}
+        self._counts = {}
+        # Vai numuru secība sakrīt ar seq - ievietošana vidū (atsaukta dzēšana) to izjauc
+        self._ordered = True
+        self._last_seq = -math.inf
+
+    @staticmethod
+    def keys(todo):
+        """Uzdevuma atslēgas - jāpaņem pirms birku, prioritātes vai statusa maiņas"""
+        keys = [ALL_KEY]
+        if todo.completed:
+            keys.append(COMPLETED_KEY)
+        if todo.priority:
+            keys.append(priority_key(todo.priority))
+        keys.extend(tag_key(tag) for tag in todo.tags)
+        return keys
+
+    def _track_order(self, first_seq, last_seq):
+        if first_seq < self._last_seq:
+            self._ordered = False
+        self._last_seq = max(self._last_seq, last_seq)
+
+    def add(self, todo):
+        """Piešķir uzdevumam bita numuru un ieslēdz tā bitus"""
+        slot = len(self._todos)
+        self._todos.append(todo)
+        self._track_order(todo.seq, todo.seq)
+        todo.slot = slot
+        for key in self.keys(todo):
+            self._set(key, slot)
+
+    def add_many(self, todos):
+        """Pievieno vairākus uzdevumus (sakārtotus pēc seq) - "visi" biti tiek ieslēgti kopā"""
+        if not todos:
+            return
+        self._track_order(todos[0].seq, todos[-1].seq)
+        start = len(self._todos)
+        self._todos.extend(todos)
+        # Numuri katrai atslēgai augošā secībā - katrs masīvs tiek paplašināts vienreiz
+        completed = []
+        by_priority = defaultdict(list)
+        by_tag = defaultdict(list)
+        for slot, todo in enumerate(todos, start):
+            todo.slot = slot
+            if todo.completed:
+                completed.append(slot)
+            if todo.priority:
+                by_priority[todo.priority].append(slot)
+            for tag in todo.tags:
+                by_tag[tag].append(slot)
+        if completed:
+            self._set_many(COMPLETED_KEY, completed)
+        for level, key_slots in by_priority.items():
+            self._set_many(priority_key(level), key_slots)
+        for tag, key_slots in by_tag.items():
+            self._set_many(tag_key(tag), key_slots)
+        self._set_range(ALL_KEY, start, len(self._todos))
+
+    def discard(self, todo):
+        """Izslēdz uzdevuma bitus un atbrīvo tā numuru"""
+        slot = todo.slot
+        if slot is None or self._todos[slot] is not todo:
+            return
+        for key in self.keys(todo):
+            self._clear(key, slot)
+        self._todos[slot] = None
+        todo.slot = None
+        self._holes += 1
+        if self._holes > self.COMPACT_MIN and self._holes * 2 > len(self._todos):
+            self._compact()
+
+    def _compact(self):
+        """Piešķir dzīvajiem uzdevumiem jaunus numurus pēc kārtas seq secībā"""
+        live = sorted((todo for todo in self._todos if todo is not None), key=attrgetter("seq"))
+        self.__init__()
+        self.add_many(live)
+
+    def update(self, todo, old_keys):
+        """Pārslēdz bitus pēc izmaiņas - old_keys ir keys(todo) pirms tās"""
+        new_keys = self.keys(todo)
+        for key in old_keys:
+            if key not in new_keys:
+                self._clear(key, todo.slot)
+        for key in new_keys:
+            if key not in old_keys:
+                self._set(key, todo.slot)
+
+    def _set(self, key, slot):
+        bits = self._bits.get(key)
+        if bits is None:
+            bits = self._bits[key] = bytearray()
+            self._counts[key] = 0
+        byte = slot >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        mask = 1 << (slot & 7)
+        if not bits[byte] & mask:
+            bits[byte] |= mask
+            self._counts[key] += 1
+
+    def _set_many(self, key, slots):
+        """Ieslēdz augošā secībā dotus jaunus bitus - visiem jābūt izslēgtiem"""
+        self._set(key, slots[-1])
+        bits = self._bits[key]
+        self._counts[key] += len(slots) - 1
+        for slot in slots[:-1]:
+            bits[slot >> 3] |= 1 << (slot & 7)
+
+    def _set_range(self, key, start, end):
+        """Ieslēdz bitus no start līdz end - visiem jābūt izslēgtiem"""
+        self._set(key, end - 1)
+        bits = self._bits[key]
+        self._counts[key] += end - start - 1
+        first_full, last_full = (start + 7) >> 3, (end - 1) >> 3
+        if first_full < last_full:
+            bits[first_full:last_full] = b"\xff" * (last_full - first_full)
+            slots = chain(range(start, first_full << 3), range(last_full << 3, end - 1))
+        else:
+            slots = range(start, end - 1)
+        for slot in slots:
+            bits[slot >> 3] |= 1 << (slot & 7)
+
+    def _clear(self, key, slot):
+        bits = self._bits.get(key)
+        byte = slot >> 3
+        if bits is None or byte >= len(bits):
+            return
+        mask = 1 << (slot & 7)
+        if bits[byte] & mask:
+            bits[byte] &= ~mask
+            self._counts[key] -= 1
+            if not self._counts[key]:
+                # Birka vairs netiek lietota - tās masīvs nav jāglabā
+                del self._bits[key]
+                del self._counts[key]
+
+    def count(self, key):
+        """Cik uzdevumu ir ar atslēgu"""
+        return self._counts.get(key, 0)
+
+    def tag_counts(self):
+        """Visas lietotās birkas ar uzdevumu skaitu"""
+        return {key[1]: count for key, count in self._counts.items() if key[0] == "tag"}
+
+    def bitmap(self, key):
+        """Atslēgas bitkarte kā vesels skaitlis"""
+        bits = self._bits.get(key)
+        return int.from_bytes(bits, "little") if bits else 0
+
+    def bitmap_of(self, todos):
+        """Bitkarte no uzdevumiem (piemēram, teksta meklēšanas rezultātiem)"""
+        bits = bytearray((len(self._todos) + 7) >> 3)
+        for todo in todos:
+            if todo is not None and todo.slot is not None:
+                bits[todo.slot >> 3] |= 1 << (todo.slot & 7)
+        return int.from_bytes(bits, "little")
+
+    def todos(self, bitmap):
+        """Bitkartes uzdevumi ievietošanas secībā"""
+        # Binārie cipari no jaunākā bita - viens baits katram numuram, atlasīšana notiek C līmenī
+        selectors = bin(bitmap)[:1:-1].encode("ascii").translate(BIT_VALUES)
+        found = list(compress(self._todos, selectors))
+        if not self._ordered:
+            found.sort(key=attrgetter("seq"))
+        return found
+
+
+class TodoStore:
+    """Uzdevumu saraksts ar id indeksu un uzturētiem skaitītājiem"""
+
+    def __init__(self, todos=()):
+        self._items = []
+        self._by_id = {}
+        self.completed_count = 0
+        # Aktīvie uzdevumi ar termiņu - nokavēto un šodienas skaitam
+        self.due_index = DueIndex()
+        # Birkas, prioritāte un statuss strukturētajiem filtriem
+        self.bitmaps = BitmapIndex()
+        self._next_seq = 0
+        self.extend(todos)
+
+    @classmethod
+    def from_dicts(cls, dicts):
+        """Izveido sarakstu no faila ierakstiem"""
+        return cls(Todo.from_dict(data) for data in dicts)
+
+    def to_dicts(self):
+        """Pārvērš visu sarakstu faila ierakstos"""
+        return [todo.to_dict() for todo in self._items]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __contains__(self, todo_id):
+        return todo_id in self._by_id
+
+    @property
+    def active_count(self):
+        return len(self._items) - self.completed_count
+
+    @property
+    def next_seq(self):
+        """Kārtas numurs, ko saņems nākamais pievienotais uzdevums"""
+        return self._next_seq
+
+    def get(self, todo_id):
+        """Atrod uzdevumu pēc id"""
+        return self._by_id.get(todo_id)
+
+    def index_of(self, todo_id, hint=None):
+        """Atrod uzdevuma pozīciju - saraksts vienmēr ir sakārtots pēc seq, tāpēc O(log N)"""
+        todo = self._by_id[todo_id]
+        if hint is not None and 0 <= hint < len(self._items) and self._items[hint] is todo:
+            return hint
+        return bisect_seq(self._items, todo.seq)
+
+    def _append(self, todo):
+        todo.seq = self._next_seq
+        self._next_seq += 1
+        self._items.append(todo)
+        self._by_id[todo.id] = todo
+        if todo.completed:
+            self.completed_count += 1
+
+    def append(self, todo):
+        """Pievieno gatavu uzdevumu saraksta beigās"""
+        self._append(todo)
+        self.due_index.add(todo)
+        self.bitmaps.add(todo)
+
+    def extend(self, todos):
+        """Pievieno vairākus gatavus uzdevumus saraksta beigās"""
+        start = len(self._items)
+        for todo in todos:
+            self._append(todo)
+        self.due_index.add_many(self._items[start:])
+        self.bitmaps.add_many(self._items[start:])
+
+    def add(self, text, completed=False, todo_id=None, completed_at=None, due=None, remind_at=None,
+            tags=(), priority=0):
+        """Pievieno jaunu uzdevumu saraksta beigās"""
+        todo = Todo(todo_id or new_todo_id(), text, completed, completed_at, due, remind_at, tags, priority)
+        self.append(todo)
+        return todo
+
+    def insert_many(self, todos):
+        """Atgriež uzdevumus to iepriekšējās vietās pēc seq (piemēram, atsaucot dzēšanu) - atgriež ievietotos"""
+        todos = sorted((todo for todo in todos if todo.id not in self._by_id), key=lambda todo: todo.seq)
+        if len(todos) < 32:
+            for todo in todos:
+                self._items.insert(bisect_seq(self._items, todo.seq), todo)
+        else:
+            # Daudz uzdevumu - viena sapludināšana ir lētāka nekā ievietošana pa vienam
+            self._items = list(heapq.merge(self._items, todos, key=lambda todo: todo.seq))
+        for todo in todos:
+            self._by_id[todo.id] = todo
+            if todo.completed:
+                self.completed_count += 1
+        self.due_index.add_many(todos)
+        self.bitmaps.add_many(todos)
+        return todos
+
+    def insert_before(self, todo, before_id):
+        """Ievieto jaunu uzdevumu pirms cita (ja tāda vairs nav - beigās) - atgriež tā pozīciju"""
+        before = self._by_id.get(before_id)
+        if before is None:
+            self.append(todo)
+            return len(self._items) - 1
+        index = bisect_seq(self._items, before.seq)
+        previous_seq = self._items[index - 1].seq if index else before.seq - 1
+        # Kārtas numurs starp abiem kaimiņiem, lai saraksts paliktu sakārtots pēc seq
+        todo.seq = (previous_seq + before.seq) / 2
+        self._items.insert(index, todo)
+        self._by_id[todo.id] = todo
+        if todo.completed:
+            self.completed_count += 1
+        self.due_index.add(todo)
+        self.bitmaps.add(todo)
+        return index
+
+    def set_completed(self, todo_id, completed, completed_at=None):
+        """Iestata pabeigšanas statusu un laiku - atgriež True, ja statuss mainījās"""
+        todo = self._by_id[todo_id]
+        if todo.completed == completed:
+            return False
+        self.due_index.discard(todo)
+        old_keys = self.bitmaps.keys(todo)
+        todo.completed = completed
+        todo.completed_at = completed_at if completed else None
+        self.completed_count += 1 if completed else -1
+        self.due_index.add(todo)
+        self.bitmaps.update(todo, old_keys)
+        return True
+
+    def set_text(self, todo_id, text):
+        """Maina uzdevuma tekstu"""
+        self._by_id[todo_id].text = text
+
+    def set_due(self, todo_id, due, remind_at):
+        """Maina uzdevuma termiņu un atgādinājuma laiku"""
+        todo = self._by_id[todo_id]
+        self.due_index.discard(todo)
+        todo.due = due
+        todo.remind_at = remind_at
+        self.due_index.add(todo)
+
+    def set_attributes(self, todo_id, tags, priority):
+        """Maina uzdevuma birkas un prioritāti"""
+        todo = self._by_id[todo_id]
+        old_keys = self.bitmaps.keys(todo)
+        todo.tags = tuple(tags)
+        todo.priority = priority
+        self.bitmaps.update(todo, old_keys)
+
+    def remove(self, todo_id, hint=None):
+        """Izņem uzdevumu - atgriež (pozīcija, uzdevums)"""
+        index = self.index_of(todo_id, hint)
+        todo = self._items.pop(index)
+        del self._by_id[todo_id]
+        if todo.completed:
+            self.completed_count -= 1
+        self.due_index.discard(todo)
+        self.bitmaps.discard(todo)
+        return index, todo
+
+    def remove_many(self, todo_ids):
+        """Izņem vairākus uzdevumus vienā piegājienā - atgriež (pirmā pozīcija, izņemtie uzdevumi)"""
+        removed = sorted((self._by_id[todo_id] for todo_id in set(todo_ids) if todo_id in self._by_id),
+                         key=lambda todo: todo.seq)
+        if not removed:
+            return None, []
+        indices = [bisect_seq(self._items, todo.seq) for todo in removed]
+        self._items = without_indices(self._items, indices)
+        for todo in removed:
+            del self._by_id[todo.id]
+            if todo.completed:
+                self.completed_count -= 1
+            self.bitmaps.discard(todo)
+        self.due_index.discard_many([todo for todo in removed if todo.due is not None])
+        return indices[0], removed
+
+
+class TodoView:
+    """Uzdevumu apakškopa, sakārtota ievietošanas secībā"""
+
+    def __init__(self, todos=()):
+        self._items = sorted(todos, key=lambda todo: todo.seq)
+        self._by_id = {todo.id: todo for todo in self._items}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __contains__(self, todo_id):
+        return todo_id in self._by_id
+
+    def index_of(self, todo_id, hint=None):
+        """Atrod uzdevuma pozīciju skatā"""
+        todo = self._by_id[todo_id]
+        if hint is not None and 0 <= hint < len(self._items) and self._items[hint] is todo:
+            return hint
+        return bisect_seq(self._items, todo.seq)
+
+    def insert(self, todo):
+        """Ievieto uzdevumu pareizajā vietā - atgriež tā pozīciju"""
+        index = bisect_seq(self._items, todo.seq)
+        self._items.insert(index, todo)
+        self._by_id[todo.id] = todo
+        return index
+
+    def remove(self, todo):
+        """Izņem uzdevumu - atgriež pozīciju, kur tas bija"""
+        index = bisect_seq(self._items, todo.seq)
+        del self._items[index]
+        del self._by_id[todo.id]
+        return index
+
+    def remove_many(self, todos):
+        """Izņem vairākus skata uzdevumus - atgriež pirmo pozīciju, kur kāds no tiem bija"""
+        removed = sorted((todo for todo in todos if todo.id in self._by_id), key=lambda todo: todo.seq)
+        if not removed:
+            return None
+        indices = [bisect_seq(self._items, todo.seq) for todo in removed]
+        self._items = without_indices(self._items, indices)
+        for todo in removed:
+            del self._by_id[todo.id]
+        return indices[0]
+
+    def reposition(self, todo):
+        """Skats ir sakārtots pēc seq, kas nemainās - atgriež (pozīcija, pozīcija)"""
+        index = self.index_of(todo.id)
+        return index, index
+
+
+class TodoOrder:
+    """Uzdevumi, sakārtoti pēc atslēgas - aktīvie un pabeigtie atsevišķos sarakstos
+
+    Ar grouped=True vispirms ir visi aktīvie, tad visi pabeigtie; citādi abi saraksti
+    tiek sapludināti tikai lasot. reverse apgriež secību katrā grupā.
+    """
+
+    # Cik uzdevumu kārtot vienā build_steps solī
+    BUILD_CHUNK = 20000
+
+    def __init__(self, todos, key, grouped=False, reverse=False):
+        self.key = key
+        self.grouped = grouped
+        self.reverse = reverse
+        # Katra uzdevuma atslēga ievietošanas brīdī - pēc teksta maiņas pēc tās atrod veco vietu
+        self._keys = {}
+        # [aktīvie, pabeigtie] un to atslēgas tajā pašā secībā binārajai meklēšanai
+        self._items = [[], []]
+        self._sort_keys = [[], []]
+        for _ in self.build_steps(todos):
+            pass
+
+    def build_steps(self, todos):
+        """Piepilda tukšu kārtojumu pa porcijām - lielam sarakstam katru soli var izpildīt citā kadrā"""
+        todos = list(todos)
+        runs = ([], [])
+        for start in range(0, len(todos), self.BUILD_CHUNK):
+            parts = ([], [])
+            for todo in todos[start:start + self.BUILD_CHUNK]:
+                parts[todo.completed].append((self.key(todo), todo))
+            for part, part_runs in zip(parts, runs):
+                part.sort(key=itemgetter(0))
+                part_runs.append(part)
+            yield
+
+        # Sakārtotās porcijas tiek sapludinātas, arī pa porcijām
+        for part, part_runs in enumerate(runs):
+            keys = []
+            items = []
+            merged = part_runs[0] if len(part_runs) == 1 else heapq.merge(*part_runs, key=itemgetter(0))
+            for count, (todo_key, todo) in enumerate(merged, 1):
+                keys.append(todo_key)
+                items.append(todo)
+                self._keys[todo.id] = todo_key
+                if count % self.BUILD_CHUNK == 0:
+                    yield
+            self._sort_keys[part] = keys
+            self._items[part] = items
+
+    def __len__(self):
+        return len(self._items[0]) + len(self._items[1])
+
+    def __iter__(self):
+        active, completed = self._items
+        if self.grouped:
+            if self.reverse:
+                return chain(reversed(active), reversed(completed))
+            return chain(active, completed)
+        if self.reverse:
+            return heapq.merge(reversed(active), reversed(completed), key=self.key, reverse=True)
+        return heapq.merge(active, completed, key=self.key)
+
+    def __getitem__(self, index):
+        part, local = self._locate(index)
+        return self._items[part][local]
+
+    def __contains__(self, todo_id):
+        return todo_id in self._keys
+
+    def _locate(self, index):
+        """Pozīcija skatā -> (daļa, pozīcija daļā)"""
+        total = len(self)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError(index)
+        active, completed = self._sort_keys
+        if self.grouped:
+            part, local = (0, index) if index < len(active) else (1, index - len(active))
+            if self.reverse:
+                local = len(self._sort_keys[part]) - 1 - local
+            return part, local
+
+        if self.reverse:
+            index = total - 1 - index
+        # index-tais mazākais abos sarakstos - binārā meklēšana pēc tā, cik no tiem ir aktīvi
+        lo, hi = max(0, index - len(completed)), min(index, len(active))
+        while lo < hi:
+            taken = (lo + hi) // 2
+            if completed[index - taken - 1] > active[taken]:
+                lo = taken + 1
+            else:
+                hi = taken
+        rest = index - lo
+        if lo < len(active) and (rest >= len(completed) or active[lo] < completed[rest]):
+            return 0, lo
+        return 1, rest
+
+    def _position(self, part, local, todo_key):
+        """(daļa, pozīcija daļā) -> pozīcija skatā"""
+        if self.grouped:
+            if self.reverse:
+                local = len(self._items[part]) - 1 - local
+            return local if part == 0 else len(self._items[0]) + local
+        index = local + bisect_left(self._sort_keys[1 - part], todo_key)
+        return len(self) - 1 - index if self.reverse else index
+
+    def _find(self, todo_id):
+        """Atrod uzdevumu pēc saglabātās atslēgas - atgriež (daļa, pozīcija daļā, atslēga)"""
+        todo_key = self._keys[todo_id]
+        # Statuss var jau būt mainīts, tāpēc jāpārbauda abas daļas
+        for part in (0, 1):
+            keys = self._sort_keys[part]
+            local = bisect_left(keys, todo_key)
+            if local < len(keys) and keys[local] == todo_key and self._items[part][local].id == todo_id:
+                return part, local, todo_key
+        raise KeyError(todo_id)
+
+    def index_of(self, todo_id, hint=None):
+        """Atrod uzdevuma pozīciju skatā"""
+        return self._position(*self._find(todo_id))
+
+    def insert(self, todo):
+        """Ievieto uzdevumu pareizajā vietā - atgriež tā pozīciju"""
+        todo_key = self.key(todo)
+        part = int(todo.completed)
+        local = bisect_left(self._sort_keys[part], todo_key)
+        self._sort_keys[part].insert(local, todo_key)
+        self._items[part].insert(local, todo)
+        self._keys[todo.id] = todo_key
+        return self._position(part, local, todo_key)
+
+    def remove(self, todo):
+        """Izņem uzdevumu - atgriež pozīciju, kur tas bija"""
+        part, local, todo_key = self._find(todo.id)
+        index = self._position(part, local, todo_key)
+        del self._sort_keys[part][local]
+        del self._items[part][local]
+        del self._keys[todo.id]
+        return index
+
+    def remove_many(self, todos):
+        """Izņem vairākus uzdevumus - atgriež pirmo pozīciju, kur kāds no tiem bija"""
+        found = [self._find(todo.id) for todo in todos if todo.id in self._keys]
+        if not found:
+            return None
+        first = min(self._position(*place) for place in found)
+        for part in (0, 1):
+            indices = sorted(local for found_part, local, _ in found if found_part == part)
+            if indices:
+                self._items[part] = without_indices(self._items[part], indices)
+                self._sort_keys[part] = without_indices(self._sort_keys[part], indices)
+        for todo in todos:
+            self._keys.pop(todo.id, None)
+        return first
+
+    def reposition(self, todo):
+        """Pārvieto uzdevumu pēc teksta vai statusa maiņas - atgriež (vecā pozīcija, jaunā pozīcija)"""
+        return self.remove(todo), self.insert(todo)